@@ -1,40 +1,835 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, Form, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Form, Depends, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from markupsafe import Markup
+from passlib.context import CryptContext
+from pymongo import (
+    ASCENDING, DESCENDING, CursorType, IndexModel, InsertOne, UpdateOne, DeleteOne, ReturnDocument, monitoring
+)
+from pymongo.collation import Collation
+from pymongo.errors import DuplicateKeyError, BulkWriteError, CollectionInvalid
+from bson import json_util, encode as bson_encode
+from bson.errors import InvalidDocument
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Dict, Any, Union
 import uuid
-from datetime import datetime, date, time, timedelta
+from datetime import datetime, date, time, timedelta, timezone
 from enum import Enum
+from abc import ABC, abstractmethod
 import secrets
+import asyncio
+import threading
+import time as clock
+import tempfile
+import base64
+import json
+import csv
+import io
+import re
+import hashlib
+import ipaddress
+from email.utils import format_datetime, parsedate_to_datetime
+import heapq
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from itertools import islice
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics
+# Minimal in-process Prometheus registry. Recording is a dict update under a
+# lock (Mongo command events arrive on Motor's worker threads); histograms
+# keep per-bucket counts and only cumulate when /metrics is scraped.
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.series: Dict[tuple, Any] = {}
+        self.lock = threading.Lock()
+        metrics_registry.append(self)
+
+    def _labels(self, values: tuple, extra: tuple = ()) -> str:
+        pairs = [*zip(self.labelnames, values), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_label_value(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            series = list(self.series.items())
+        for labels, value in series:
+            lines.append(f"{self.name}{self._labels(labels)} {value}")
+        return lines
+
+class CounterMetric(Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+class GaugeMetric(CounterMetric):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+class HistogramMetric(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = HTTP_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # one count per bucket, one for +Inf, then the running sum
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            series = [(labels, list(values)) for labels, values in self.series.items()]
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {values[-1]}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+metrics_registry: List[Metric] = []
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in metrics_registry for line in metric.render()) + "\n"
+
+http_requests_total = CounterMetric(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+http_request_duration = HistogramMetric(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+http_requests_in_flight = GaugeMetric("http_requests_in_flight", "HTTP requests currently being served.")
+mongo_command_duration = HistogramMetric(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection and command.",
+    ("collection", "command"), buckets=MONGO_LATENCY_BUCKETS
+)
+mongo_command_failures = CounterMetric(
+    "mongodb_command_failures_total", "Failed MongoDB commands by collection and command.", ("collection", "command")
+)
+mongo_documents = CounterMetric(
+    "mongodb_documents_total", "Documents returned or written by collection and command.", ("collection", "command")
+)
+template_render_duration = HistogramMetric(
+    "template_render_duration_seconds", "Jinja template render time.", ("template",)
+)
+
+class MongoMetricsListener(monitoring.CommandListener):
+    # succeeded/failed events don't carry the command, so the collection and
+    # command are remembered from the started event by request id
+    def __init__(self):
+        self.commands: Dict[int, tuple] = {}
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            collection = event.command.get("collection", "")
+        else:
+            collection = event.command.get(event.command_name)
+        collection = collection if isinstance(collection, str) else ""
+        self.commands[event.request_id] = (collection, event.command)
+
+    def succeeded(self, event):
+        collection, command = self.commands.pop(event.request_id, ("", {}))
+        labels = (collection, event.command_name)
+        mongo_command_duration.observe(labels, event.duration_micros / 1e6)
+        documents = self._documents(event.command_name, event.reply)
+        if documents:
+            mongo_documents.inc(labels, documents)
+        slow_query_log.observe(collection, event.command_name, command, event.duration_micros / 1000)
+
+    def failed(self, event):
+        collection, _ = self.commands.pop(event.request_id, ("", {}))
+        labels = (collection, event.command_name)
+        mongo_command_duration.observe(labels, event.duration_micros / 1e6)
+        mongo_command_failures.inc(labels)
+
+    @staticmethod
+    def _documents(command_name: str, reply: Dict[str, Any]) -> int:
+        cursor = reply.get("cursor")
+        if cursor is not None:
+            return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+        if command_name == "findAndModify":
+            return 1 if reply.get("value") is not None else 0
+        if command_name in ("insert", "update", "delete", "count"):
+            return reply.get("n", 0)
+        return 0
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: no per-request Request/Response objects and
+    # streaming responses pass through untouched
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        scope_token = request_scope.set(scope)
+        start = clock.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = clock.perf_counter() - start
+            request_scope.reset(scope_token)
+            http_requests_in_flight.dec()
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get("route")
+            route = route.path if route is not None else scope.get("root_path") or "unmatched"
+            http_requests_total.inc((scope["method"], route, status))
+            http_request_duration.observe((scope["method"], route), elapsed)
+
+# Slow query log
+# Reads slower than SLOW_QUERY_MS are logged with their filter, sort, route
+# and duration. The first time a query shape is seen it is explained in the
+# background on the event loop, and the log line carries the winning plan
+# (COLLSCAN or index name). Repeats of a shape are reported at most once per
+# SLOW_QUERY_LOG_INTERVAL with a count of the suppressed occurrences.
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))  # 0 disables
+SLOW_QUERY_LOG_INTERVAL = float(os.environ.get("SLOW_QUERY_LOG_INTERVAL", "60"))  # seconds per shape
+SLOW_QUERY_COMMANDS = {"find": "filter", "count": "query", "aggregate": "pipeline", "distinct": "query"}
+# Command fields worth replaying in explain; session/read-concern fields are dropped
+EXPLAIN_FIELDS = ("filter", "sort", "projection", "limit", "skip", "hint", "collation", "query", "key", "pipeline")
+
+# The ASGI scope of the request being served. Motor copies the context into
+# its executor threads, so command listeners can attribute queries to routes.
+request_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_scope", default=None)
+
+mongo_slow_queries = CounterMetric(
+    "mongodb_slow_queries_total", "Queries slower than SLOW_QUERY_MS by collection and command.",
+    ("collection", "command")
+)
+
+def query_shape(value: Any) -> Any:
+    # Replace literal values with placeholders, keeping field names and operators
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return [query_shape(item) for item in value]
+    return "?"
+
+def _winning_plan(explanation: Any) -> Optional[Dict[str, Any]]:
+    # find/count put queryPlanner at the top; aggregate nests it under a stage
+    if isinstance(explanation, dict):
+        if "winningPlan" in explanation:
+            return explanation["winningPlan"]
+        values = explanation.values()
+    elif isinstance(explanation, list):
+        values = explanation
+    else:
+        return None
+    for value in values:
+        plan = _winning_plan(value)
+        if plan is not None:
+            return plan
+    return None
+
+def _plan_indexes(plan: Any) -> List[str]:
+    if isinstance(plan, dict):
+        names = [plan["indexName"]] if "indexName" in plan else []
+        for value in plan.values():
+            names.extend(_plan_indexes(value))
+        return names
+    if isinstance(plan, list):
+        return [name for item in plan for name in _plan_indexes(item)]
+    return []
+
+def describe_plan(explanation: Dict[str, Any]) -> str:
+    plan = _winning_plan(explanation)
+    if plan is None:
+        return "unknown"
+    if "COLLSCAN" in _plan_stages(plan):
+        return "COLLSCAN"
+    indexes = _plan_indexes(plan)
+    return "IXSCAN " + ",".join(dict.fromkeys(indexes)) if indexes else "/".join(_plan_stages(plan)) or "unknown"
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, interval: float):
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.loop: Optional[asyncio.AbstractEventLoop] = None  # set at startup
+        self.lock = threading.Lock()
+        self.shapes: Dict[str, Dict[str, Any]] = {}  # shape key -> plan, last report, suppressed count
+
+    def observe(self, collection: str, command_name: str, command: Dict[str, Any], duration_ms: float):
+        # Called from command listener threads
+        if not self.threshold_ms or duration_ms < self.threshold_ms or command_name not in SLOW_QUERY_COMMANDS:
+            return
+        mongo_slow_queries.inc((collection, command_name))
+        fields = {key: command[key] for key in EXPLAIN_FIELDS if key in command}
+        key = json_util.dumps([collection, command_name, query_shape(fields)], sort_keys=True)
+        scope = request_scope.get()
+        route = "-"
+        if scope is not None:
+            route = scope["route"].path if "route" in scope else scope["path"]
+            route = f"{scope['method']} {route}"
+        entry = {
+            "collection": collection,
+            "command": command_name,
+            "fields": fields,
+            "route": route,
+            "duration_ms": duration_ms
+        }
+
+        now = clock.monotonic()
+        with self.lock:
+            shape = self.shapes.get(key)
+            if shape is None:
+                # First sighting: explain off the request path, then log
+                self.shapes[key] = {"plan": None, "reported_at": now, "suppressed": 0}
+                explain = True
+            elif now - shape["reported_at"] >= self.interval and shape["plan"] is not None:
+                entry["suppressed"], entry["plan"] = shape["suppressed"], shape["plan"]
+                shape["reported_at"], shape["suppressed"] = now, 0
+                explain = False
+            else:
+                shape["suppressed"] += 1
+                return
+        if explain:
+            if self.loop is None or self.loop.is_closed():
+                entry["plan"] = "not explained"
+                self.report(entry)
+            else:
+                asyncio.run_coroutine_threadsafe(self.explain(key, entry), self.loop)
+        else:
+            self.report(entry)
+
+    async def explain(self, key: str, entry: Dict[str, Any]):
+        explain_command = {entry["command"]: entry["collection"], **entry["fields"]}
+        if entry["command"] == "aggregate":
+            explain_command["cursor"] = {}
+        try:
+            explanation = await db.command({"explain": explain_command, "verbosity": "queryPlanner"})
+            plan = describe_plan(explanation)
+        except Exception as e:
+            plan = f"explain failed: {e}"
+        with self.lock:
+            self.shapes[key]["plan"] = plan
+        self.report({**entry, "plan": plan})
+
+    def report(self, entry: Dict[str, Any]):
+        fields = entry["fields"]
+        logger.warning(
+            "Slow query %.1f ms %s.%s route=%s plan=%s %s%s",
+            entry["duration_ms"],
+            entry["collection"],
+            entry["command"],
+            entry["route"],
+            entry["plan"],
+            json_util.dumps(fields),
+            f" (+{entry['suppressed']} similar since last report)" if entry.get("suppressed") else ""
+        )
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG_INTERVAL)
+
+# Serving
+# WEB_CONCURRENCY is the number of uvicorn worker processes (entrypoint.sh
+# passes it to --workers). Anything per-process is sized from it, and all
+# workers must share SESSION_SECRET or sessions break across workers.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+SESSION_SECRET = os.environ.get("SESSION_SECRET")
+if not SESSION_SECRET:
+    if WEB_CONCURRENCY > 1:
+        raise RuntimeError("SESSION_SECRET must be set when running more than one worker")
+    logging.getLogger(__name__).warning("SESSION_SECRET is not set; sessions will not survive a restart")
+    SESSION_SECRET = secrets.token_urlsafe(32)
+
+# Connections are budgeted across workers so N workers don't open N times the
+# pool: every worker gets an equal share and the total never exceeds the budget
+MONGO_POOL_BUDGET = int(os.environ.get("MONGO_POOL_BUDGET", "100"))
+if WEB_CONCURRENCY > MONGO_POOL_BUDGET:
+    raise RuntimeError(
+        f"WEB_CONCURRENCY={WEB_CONCURRENCY} workers cannot share MONGO_POOL_BUDGET={MONGO_POOL_BUDGET} connections"
+    )
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", str(MONGO_POOL_BUDGET // WEB_CONCURRENCY)))
+if MONGO_MAX_POOL_SIZE < 10:
+    logging.getLogger(__name__).warning(
+        "Only %d MongoDB connections per worker (MONGO_POOL_BUDGET=%d over %d workers); "
+        "requests will queue for connections under load", MONGO_MAX_POOL_SIZE, MONGO_POOL_BUDGET, WEB_CONCURRENCY
+    )
+if MONGO_MAX_POOL_SIZE * WEB_CONCURRENCY > MONGO_POOL_BUDGET:
+    logging.getLogger(__name__).warning(
+        "MONGO_MAX_POOL_SIZE=%d over %d workers exceeds MONGO_POOL_BUDGET=%d",
+        MONGO_MAX_POOL_SIZE, WEB_CONCURRENCY, MONGO_POOL_BUDGET
+    )
+# Opened by the startup warm-up so the first requests after a deploy don't pay for connection setup
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", str(min(4, MONGO_MAX_POOL_SIZE))))
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+# Unset options keep the driver defaults
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": MONGO_MAX_POOL_SIZE,
+    "minPoolSize": MONGO_MIN_POOL_SIZE,
+    "maxIdleTimeMS": _optional_int("MONGO_MAX_IDLE_TIME_MS"),
+    "waitQueueTimeoutMS": _optional_int("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+    "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    "socketTimeoutMS": _optional_int("MONGO_SOCKET_TIMEOUT_MS"),
+    "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+}
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    **{option: value for option, value in MONGO_CLIENT_OPTIONS.items() if value is not None},
+    event_listeners=[MongoMetricsListener()]
+)
 db = client[os.environ['DB_NAME']]
 
+# Deleted tasks/activities leave a tombstone for delta sync, kept this long
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get("TOMBSTONE_RETENTION_DAYS", "30"))
+PASSWORD_RESET_HOURS = int(os.environ.get("PASSWORD_RESET_HOURS", "24"))
+
+# Case-insensitive ordering for task titles; queries must pass the same
+# collation to use the matching index
+TITLE_COLLATION = Collation(locale="en", strength=2)
+
+# Index registry
+# Every index the hot queries below rely on is declared here and built at
+# startup. QUERY_SHAPES mirrors those queries so their plans can be checked
+# with explain(); add an entry whenever a new query pattern is introduced.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "tasks": [
+        IndexModel(
+            [("user_id", ASCENDING), ("completed", ASCENDING), ("due_date", ASCENDING), ("id", ASCENDING)],
+            name="user_completed_due_id",
+            background=True
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("due_date", ASCENDING), ("id", ASCENDING)],
+            name="user_due_id",
+            background=True
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("completed", ASCENDING), ("priority_rank", DESCENDING), ("due_date", ASCENDING)],
+            name="user_completed_priority_due",
+            background=True
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("completed", ASCENDING), ("title", ASCENDING)],
+            name="user_completed_title_ci",
+            collation=TITLE_COLLATION,
+            background=True
+        ),
+        IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING)], name="user_updated", background=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True, background=True),
+    ],
+    "activities": [
+        IndexModel(
+            [("user_id", ASCENDING), ("start_datetime", ASCENDING), ("id", ASCENDING)],
+            name="user_start_id",
+            background=True
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("end_datetime", ASCENDING)],
+            name="user_end",
+            background=True
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("activity_type", ASCENDING), ("start_datetime", ASCENDING)],
+            name="user_type_start",
+            background=True
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("start_datetime", ASCENDING)],
+            name="user_start_recurring",
+            partialFilterExpression={"recurrence": {"$type": "object"}},
+            background=True
+        ),
+        IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING)], name="user_updated", background=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True, background=True),
+    ],
+    "tombstones": [
+        IndexModel([("user_id", ASCENDING), ("deleted_at", ASCENDING)], name="user_deleted", background=True),
+        IndexModel(
+            [("deleted_at", ASCENDING)],
+            name="deleted_ttl",
+            expireAfterSeconds=TOMBSTONE_RETENTION_DAYS * 24 * 3600,
+            background=True
+        ),
+    ],
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True, background=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True, background=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_id", background=True),
+        IndexModel([("year_level", ASCENDING), ("id", ASCENDING)], name="year_level_id", background=True),
+    ],
+    "user_stats": [
+        IndexModel([("user_id", ASCENDING)], name="user_unique", unique=True, background=True),
+    ],
+    "password_resets": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0, background=True),
+    ],
+}
+
+# (collection, filter, sort[, collation]) for each registered query shape.
+# Values are placeholders; only the shape matters to the planner.
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "", "completed": {"$in": [False, True]}},
+        "sort": [("priority_rank", DESCENDING), ("due_date", ASCENDING)]
+    },
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "", "completed": False, "due_date": {"$lt": datetime(2000, 1, 1)}},
+        "sort": [("priority_rank", DESCENDING), ("due_date", ASCENDING)]
+    },
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "", "completed": {"$in": [False, True]}},
+        "sort": [("title", ASCENDING)],
+        "collation": TITLE_COLLATION
+    },
+    {
+        "collection": "activities",
+        "filter": {"user_id": "", "activity_type": ""},
+        "sort": [("start_datetime", ASCENDING)]
+    },
+    {
+        "collection": "activities",
+        "filter": {"user_id": "", "start_datetime": {"$lt": datetime(2000, 1, 1)},
+                   "end_datetime": {"$lt": datetime(2000, 1, 1)}},
+        "sort": [("start_datetime", ASCENDING)]
+    },
+    {"collection": "tasks", "filter": {"user_id": ""}, "sort": [("due_date", ASCENDING)]},
+    {"collection": "tasks", "filter": {"user_id": "", "completed": True}, "sort": None},
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "", "completed": False, "due_date": {"$lt": datetime(2000, 1, 1)}},
+        "sort": None
+    },
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "", "completed": False},
+        "sort": [("due_date", ASCENDING)]
+    },
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "", "due_date": {"$gte": datetime(2000, 1, 1), "$lte": datetime(2000, 1, 1)}},
+        "sort": None
+    },
+    {"collection": "tasks", "filter": {"id": ""}, "sort": None},
+    {"collection": "activities", "filter": {"user_id": ""}, "sort": [("start_datetime", ASCENDING)]},
+    {
+        "collection": "activities",
+        "filter": {"user_id": "", "start_datetime": {"$gt": datetime(2000, 1, 1)}},
+        "sort": [("start_datetime", ASCENDING)]
+    },
+    {
+        "collection": "activities",
+        "filter": {"user_id": "", "$or": [
+            {"start_datetime": {"$gte": datetime(2000, 1, 1), "$lte": datetime(2000, 1, 1)}},
+            {"recurrence": {"$type": "object"}, "start_datetime": {"$lte": datetime(2000, 1, 1)}}
+        ]},
+        "sort": None
+    },
+    {
+        "collection": "activities",
+        "filter": {"user_id": "", "$or": [
+            {"end_datetime": {"$gt": datetime(2000, 1, 1)}, "start_datetime": {"$lt": datetime(2000, 1, 1)}},
+            {"recurrence": {"$type": "object"}, "start_datetime": {"$lt": datetime(2000, 1, 1)}}
+        ]},
+        "sort": None
+    },
+    {"collection": "activities", "filter": {"id": ""}, "sort": None},
+    {"collection": "user_stats", "filter": {"user_id": ""}, "sort": None},
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "", "$or": [
+            {"due_date": {"$gt": datetime(2000, 1, 1)}},
+            {"due_date": datetime(2000, 1, 1), "id": {"$gt": ""}}
+        ]},
+        "sort": [("due_date", ASCENDING), ("id", ASCENDING)]
+    },
+    {
+        "collection": "activities",
+        "filter": {"user_id": "", "$or": [
+            {"start_datetime": {"$gt": datetime(2000, 1, 1)}},
+            {"start_datetime": datetime(2000, 1, 1), "id": {"$gt": ""}}
+        ]},
+        "sort": [("start_datetime", ASCENDING), ("id", ASCENDING)]
+    },
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "", "updated_at": {"$gt": datetime(2000, 1, 1)}},
+        "sort": [("updated_at", ASCENDING)]
+    },
+    {
+        "collection": "activities",
+        "filter": {"user_id": "", "updated_at": {"$gt": datetime(2000, 1, 1)}},
+        "sort": [("updated_at", ASCENDING)]
+    },
+    {
+        "collection": "tombstones",
+        "filter": {"user_id": "", "deleted_at": {"$gt": datetime(2000, 1, 1)}},
+        "sort": [("deleted_at", ASCENDING)]
+    },
+    {"collection": "users", "filter": {}, "sort": [("created_at", ASCENDING), ("id", ASCENDING)]},
+    {"collection": "users", "filter": {"id": ""}, "sort": None},
+    {"collection": "users", "filter": {"email": ""}, "sort": None},
+    {"collection": "users", "filter": {"year_level": 0}, "sort": None},
+    {
+        "collection": "tasks",
+        "filter": {"user_id": {"$in": [""]}, "due_date": {"$gte": datetime(2000, 1, 1), "$lt": datetime(2000, 1, 1)}},
+        "sort": None
+    },
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "", "due_date": {"$in": [datetime(2000, 1, 1)]}},
+        "sort": None
+    },
+    {
+        "collection": "activities",
+        "filter": {"user_id": "", "start_datetime": {"$in": [datetime(2000, 1, 1)]}},
+        "sort": None
+    },
+]
+
+async def ensure_indexes():
+    # createIndexes is a no-op for indexes that already exist with the same spec
+    for collection, models in INDEXES.items():
+        created = await db[collection].create_indexes(models)
+        logger.info("Indexes ensured on %s: %s", collection, ", ".join(created))
+
+def _plan_stages(plan: Any) -> List[str]:
+    # Walk an explain() winning plan (classic or SBE layout) and collect stage names
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+async def verify_query_plans():
+    collscans = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape["sort"]:
+            cursor = cursor.sort(shape["sort"])
+        if shape.get("collation"):
+            cursor = cursor.collation(shape["collation"])
+        explanation = await cursor.explain()
+        stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages:
+            collscans.append(f"{shape['collection']} {shape['filter']} sort={shape['sort']}")
+    if collscans:
+        raise RuntimeError("Query shapes resolved to COLLSCAN: " + "; ".join(collscans))
+
+# One-off data migrations, recorded in the migrations collection so the
+# full-collection updates only ever run once per database
+async def backfill_priority_rank():
+    for priority, rank in PRIORITY_RANK.items():
+        await db.tasks.update_many(
+            {"priority": priority, "priority_rank": {"$exists": False}},
+            {"$set": {"priority_rank": rank}}
+        )
+
+# Duplicate emails are only merged once MERGE_DUPLICATE_EMAILS=1; until then
+# startup logs the merges it would make and stops before building email_unique
+MERGE_DUPLICATE_EMAILS = os.environ.get("MERGE_DUPLICATE_EMAILS", "0") == "1"
+
+async def plan_duplicate_email_merges() -> List[Dict[str, Any]]:
+    # One entry per email held by several users: the user kept (the one with
+    # a password, else the oldest) and the users merged into it
+    duplicates = db.users.aggregate([
+        {"$group": {"_id": "$email", "count": {"$sum": 1}}},
+        {"$match": {"_id": {"$ne": None}, "count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+    plans = []
+    async for group in duplicates:
+        users = await db.users.find({"email": group["_id"]}).to_list(None)
+        users.sort(key=lambda user: (user.get("password_hash") is None, user.get("created_at") or datetime.min))
+        merged_ids = [user["id"] for user in users[1:]]
+        plans.append({
+            "email": group["_id"],
+            "keeper": users[0],
+            "merged": users[1:],
+            "tasks": await db.tasks.count_documents({"user_id": {"$in": merged_ids}}),
+            "activities": await db.activities.count_documents({"user_id": {"$in": merged_ids}})
+        })
+    return plans
+
+async def merge_duplicate_emails():
+    # POST /api/users used to create a new user on every React login, so
+    # older databases hold several users per email and email_unique cannot
+    # be built. The other users' tasks and activities move to the kept user
+    # and their documents are copied to users_merged before being deleted.
+    plans = await plan_duplicate_email_merges()
+    for plan in plans:
+        logger.warning(
+            "%s duplicate users for %s into %s: %s (%d tasks, %d activities)",
+            "Merging" if MERGE_DUPLICATE_EMAILS else "Would merge", plan["email"], plan["keeper"]["id"],
+            ", ".join(user["id"] for user in plan["merged"]), plan["tasks"], plan["activities"]
+        )
+    if plans and not MERGE_DUPLICATE_EMAILS:
+        raise RuntimeError(
+            f"{len(plans)} emails belong to more than one user, so email_unique cannot be built. "
+            "Review the merges logged above and restart with MERGE_DUPLICATE_EMAILS=1 to apply them."
+        )
+
+    for plan in plans:
+        keeper, merged = plan["keeper"], plan["merged"]
+        merged_ids = [user["id"] for user in merged]
+        now = datetime.utcnow()
+        for user in merged:
+            await db.users_merged.replace_one(
+                {"_id": user["_id"]}, {**user, "merged_into": keeper["id"], "merged_at": now}, upsert=True
+            )
+        # Fresh updated_at so delta-sync clients of the kept user pick them up
+        for collection in (db.tasks, db.activities):
+            await collection.update_many(
+                {"user_id": {"$in": merged_ids}}, {"$set": {"user_id": keeper["id"], "updated_at": now}}
+            )
+        await db.tombstones.update_many({"user_id": {"$in": merged_ids}}, {"$set": {"user_id": keeper["id"]}})
+        # Materialized stats are rebuilt on the next read
+        await db.user_stats.delete_many({"user_id": {"$in": [keeper["id"], *merged_ids]}})
+        await db.users.delete_many({"_id": {"$in": [user["_id"] for user in merged]}})
+        await db.users.update_one(
+            {"_id": keeper["_id"]}, {"$inc": {"data_version": 1}, "$set": {"data_changed_at": now}}
+        )
+
+MIGRATIONS = [
+    ("tasks_priority_rank", backfill_priority_rank),
+    ("users_merge_duplicate_emails", merge_duplicate_emails),
+]
+
+async def run_migrations():
+    # Migrations are idempotent; with several workers starting at once more
+    # than one may run the same migration, and only the first records it
+    for name, migration in MIGRATIONS:
+        if await db.migrations.find_one({"_id": name}):
+            continue
+        await migration()
+        try:
+            await db.migrations.insert_one({"_id": name, "applied_at": datetime.utcnow()})
+        except DuplicateKeyError:
+            continue
+        logger.info("Applied migration %s", name)
+
+async def acquire_lease(name: str, seconds: float) -> bool:
+    # Cross-worker lease for periodic jobs: the upsert only inserts when no
+    # unexpired lease exists, and a held lease makes it hit the unique _id
+    now = datetime.utcnow()
+    try:
+        await db.leases.update_one(
+            {"_id": name, "expires_at": {"$lt": now}},
+            {"$set": {"expires_at": now + timedelta(seconds=seconds), "holder": os.getpid()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
 # Create the main app without a prefix
 app = FastAPI()
+app.state.ready = False
+app.state.started_at = clock.monotonic()
 
 # Add session middleware
-app.add_middleware(SessionMiddleware, secret_key=secrets.token_urlsafe(32))
+app.add_middleware(SessionMiddleware, secret_key=SESSION_SECRET)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory=ROOT_DIR / "static"), name="static")
 
 # Templates
-templates = Jinja2Templates(directory=ROOT_DIR / "templates")
+# Compiled templates are cached on disk so new workers skip compilation, and
+# every render is timed: pages report it in a Server-Timing header and the
+# per-template totals are served from /api/render/stats.
+JINJA_BYTECODE_CACHE_DIR = Path(
+    os.environ.get("JINJA_BYTECODE_CACHE_DIR", Path(tempfile.gettempdir()) / "studytime-jinja-cache")
+)
+JINJA_BYTECODE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+template_render_stats: Dict[str, Dict[str, float]] = {}
+
+def record_render(name: str, elapsed_ms: float):
+    entry = template_render_stats.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+    entry["count"] += 1
+    entry["total_ms"] += elapsed_ms
+    entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+    template_render_duration.observe((name,), elapsed_ms / 1000)
+
+class TimedJinja2Templates(Jinja2Templates):
+    def TemplateResponse(self, *args, **kwargs):
+        start = clock.perf_counter()
+        response = super().TemplateResponse(*args, **kwargs)
+        elapsed_ms = (clock.perf_counter() - start) * 1000
+        record_render(response.template.name, elapsed_ms)
+        response.headers["Server-Timing"] = f"template;dur={elapsed_ms:.2f}"
+        return response
+
+    def render_fragment(self, name: str, **context) -> Markup:
+        start = clock.perf_counter()
+        html = self.get_template(name).render(**context)
+        record_render(name, (clock.perf_counter() - start) * 1000)
+        return Markup(html)
+
+templates = TimedJinja2Templates(env=Environment(
+    loader=FileSystemLoader(ROOT_DIR / "templates"),
+    autoescape=True,
+    bytecode_cache=FileSystemBytecodeCache(str(JINJA_BYTECODE_CACHE_DIR))
+))
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -139,7 +934,72 @@ class RecurrencePattern(BaseModel):
     frequency: str  # daily, weekly, monthly
     interval: int = 1  # every X days/weeks/months
     days_of_week: Optional[List[int]] = None  # 0=Monday, 6=Sunday
-    end_date: Optional[date] = None
+    end_date: Optional[Union[date, datetime]] = None  # a date includes that whole day
+
+# In-process caches
+class TTLCache:
+    # Bounded LRU whose entries also expire after `ttl` seconds
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at < clock.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (value, clock.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+# Hydrated User objects for logged-in sessions. Writes to a user go through
+# session_user_cache.invalidate(); the TTL bounds staleness across workers.
+session_user_cache = TTLCache(
+    maxsize=int(os.environ.get("SESSION_USER_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("SESSION_USER_CACHE_TTL", "60"))
+)
+
+# Rendered dashboard fragments keyed by (user, data version, time window);
+# a write bumps the version, so stale entries are never read and age out
+fragment_cache = TTLCache(
+    maxsize=int(os.environ.get("FRAGMENT_CACHE_SIZE", "5000")),
+    ttl=float(os.environ.get("FRAGMENT_CACHE_TTL", "60"))
+)
 
 # Authentication helpers
 def get_current_user(request: Request):
@@ -152,8 +1012,633 @@ async def get_user_from_session(request: Request):
     user_id = get_current_user(request)
     if not user_id:
         return None
-    user = await db.users.find_one({"id": user_id})
-    return User(**user) if user else None
+    user = session_user_cache.get(user_id)
+    if user is None:
+        user_data = await db.users.find_one({"id": user_id})
+        if not user_data:
+            return None
+        user = User(**user_data)
+        session_user_cache.set(user_id, user)
+    return user
+
+# Passwords
+# bcrypt costs ~100+ ms of CPU per hash at the default cost, so hashing and
+# verification run on a small dedicated thread pool instead of the event
+# loop. Admission control keeps a login storm from queueing unbounded work:
+# past LOGIN_MAX_PENDING outstanding jobs, or LOGIN_RATE_LIMIT login (and
+# SIGNUP_RATE_LIMIT signup) attempts per client per LOGIN_RATE_WINDOW,
+# requests are shed with a 429. Attempt counts live in each worker process,
+# so with WEB_CONCURRENCY workers a client gets up to that many times the
+# limit; it bounds bcrypt work per worker rather than acting as a lockout.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+LOGIN_MAX_PENDING = int(os.environ.get("LOGIN_MAX_PENDING", "32"))
+LOGIN_RATE_LIMIT = int(os.environ.get("LOGIN_RATE_LIMIT", "10"))
+SIGNUP_RATE_LIMIT = int(os.environ.get("SIGNUP_RATE_LIMIT", "5"))
+LOGIN_RATE_WINDOW = float(os.environ.get("LOGIN_RATE_WINDOW", "60"))  # seconds
+# Peers allowed to report the client address in X-Forwarded-For (addresses or
+# CIDR blocks, comma separated); entrypoint.sh trusts the local nginx
+TRUSTED_PROXIES = tuple(
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.environ.get("TRUSTED_PROXIES", "").split(",") if entry.strip()
+)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password")
+password_jobs = 0
+# Verified against for unknown emails so they take as long as a wrong password
+dummy_password_hash: Optional[str] = None
+
+# Attempt counts per client; the window restarts from the latest attempt
+login_attempts = TTLCache(maxsize=100000, ttl=LOGIN_RATE_WINDOW)
+
+class LoginOverloaded(Exception):
+    pass
+
+async def run_password_job(func, *args):
+    global password_jobs
+    if password_jobs >= LOGIN_MAX_PENDING:
+        raise LoginOverloaded()
+    password_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+    finally:
+        password_jobs -= 1
+
+async def hash_password(password: str) -> str:
+    return await run_password_job(pwd_context.hash, password)
+
+async def verify_password(password: str, password_hash: Optional[str]) -> tuple:
+    # Returns (valid, replacement hash when the stored one uses an old cost)
+    global dummy_password_hash
+    if password_hash is None:
+        if dummy_password_hash is None:
+            dummy_password_hash = await hash_password(secrets.token_urlsafe(16))
+        await run_password_job(pwd_context.verify, password, dummy_password_hash)
+        return False, None
+    return await run_password_job(pwd_context.verify_and_update, password, password_hash)
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+def client_address(request: Request) -> str:
+    # Behind a proxy every request comes from the proxy's address. The header
+    # is only believed from a trusted peer (clients can send it themselves),
+    # and the rightmost hop that isn't a trusted proxy is the client
+    peer = request.client.host if request.client else "unknown"
+    if not is_trusted_proxy(peer):
+        return peer
+    forwarded = [
+        hop.strip() for header in request.headers.getlist("x-forwarded-for") for hop in header.split(",") if hop.strip()
+    ]
+    for hop in reversed(forwarded):
+        if not is_trusted_proxy(hop):
+            return hop
+    return forwarded[0] if forwarded else peer
+
+def admit_login_attempt(request: Request, action: str = "login") -> bool:
+    # Logins and signups are counted separately so one can't starve the other
+    client = client_address(request)
+    limit = SIGNUP_RATE_LIMIT if action == "signup" else LOGIN_RATE_LIMIT
+    attempts = login_attempts.get((action, client)) or 0
+    if attempts >= limit:
+        return False
+    login_attempts.set((action, client), attempts + 1)
+    return True
+
+# Set-password links for accounts without a hash (created before passwords
+# were stored, or through the JSON API). Tokens are single-use and only
+# their SHA-256 is stored; backend_password_reset.py issues them.
+def password_reset_id(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+async def create_password_reset(user_id: str) -> str:
+    token = secrets.token_urlsafe(32)
+    await db.password_resets.insert_one({
+        "_id": password_reset_id(token),
+        "user_id": user_id,
+        "expires_at": datetime.utcnow() + timedelta(hours=PASSWORD_RESET_HOURS)
+    })
+    return token
+
+async def find_password_reset(token: str) -> Optional[Dict[str, Any]]:
+    # The TTL monitor only runs once a minute, so expiry is checked here too
+    return await db.password_resets.find_one({"_id": password_reset_id(token), "expires_at": {"$gt": datetime.utcnow()}})
+
+def login_overloaded_response(request: Request, context: Dict[str, Any]):
+    return templates.TemplateResponse("login.html", {
+        "request": request,
+        **context,
+        "error": "Too many sign-in attempts right now. Please try again in a minute."
+    }, status_code=429, headers={"Retry-After": str(int(LOGIN_RATE_WINDOW))})
+
+# Shared by the HTML forms and the JSON API: each returns (user id, error
+# message) and raises LoginOverloaded when the hash pool is saturated
+async def check_login(email: str, password: str) -> tuple:
+    # Single lookup on the unique email index
+    user = await db.users.find_one({"email": email}, {"_id": 0, "id": 1, "password_hash": 1})
+    valid, new_hash = await verify_password(password, user and user.get("password_hash"))
+    if user and user.get("password_hash") is None:
+        # Nothing to check the password against; a set-password link proves ownership
+        return None, "This account doesn't have a password yet. Ask an administrator for a set-password link."
+    if not valid:
+        return None, "Incorrect email or password."
+    if new_hash:
+        await db.users.update_one({"id": user["id"]}, {"$set": {"password_hash": new_hash}})
+    return user["id"], None
+
+async def create_account(name: str, email: str, password: str, year_level: int) -> tuple:
+    if await db.users.find_one({"email": email}, {"_id": 1}):
+        return None, "User with this email already exists."
+    password_hash = await hash_password(password)
+    user_data = {
+        "id": str(uuid.uuid4()),
+        "name": name,
+        "email": email,
+        "year_level": year_level,
+        "subjects": ["Mathematics", "Physics", "Chemistry", "English", "History"],
+        "theme": "light",
+        "default_view": "month",
+        "password_hash": password_hash,
+        "created_at": datetime.utcnow()
+    }
+    try:
+        await db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        return None, "User with this email already exists."
+    session_user_cache.invalidate(user_data["id"])
+    return user_data["id"], None
+
+# Change feed
+# Write paths publish compact change events to a hub that SSE clients
+# subscribe to per user. ChangeHub is the extension point: a cross-worker
+# implementation (e.g. Redis pub/sub) only has to implement publish/subscribe/
+# unsubscribe. The in-memory hub serves a single worker; with several
+# workers the Mongo hub relays events through a capped collection.
+CHANGE_QUEUE_SIZE = 256
+CHANGE_HUB = os.environ.get("CHANGE_HUB", "mongo" if WEB_CONCURRENCY > 1 else "memory")
+CHANGE_LOG_BYTES = int(os.environ.get("CHANGE_LOG_BYTES", str(16 * 1024 * 1024)))
+CHANGE_LOG_RETRY_SECONDS = 1
+
+class ChangeHub(ABC):
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, user_id: str, event: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        ...
+
+class InMemoryChangeHub(ChangeHub):
+    def __init__(self, queue_size: int = CHANGE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, set] = {}
+
+    async def publish(self, user_id: str, event: Dict[str, Any]):
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                # A slow client can't catch up event by event; tell it to reload
+                self._resync(queue, event.get("version"))
+            else:
+                queue.put_nowait(event)
+
+    def resync_all(self):
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._resync(queue, None)
+
+    @staticmethod
+    def _resync(queue: asyncio.Queue, version: Optional[int]):
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({"action": "resync", "version": version})
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(user_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[user_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+class MongoChangeHub(InMemoryChangeHub):
+    # Every worker appends to a capped collection and tails it with an
+    # awaitable cursor, fanning events out to its own SSE subscribers
+    def __init__(self, collection: str = "change_log", size: int = CHANGE_LOG_BYTES,
+                 queue_size: int = CHANGE_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self.collection = collection
+        self.size = size
+        self._tail_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        try:
+            await db.create_collection(self.collection, capped=True, size=self.size)
+        except CollectionInvalid:
+            pass  # already created by another worker
+        self._tail_task = asyncio.create_task(self._tail())
+
+    async def stop(self):
+        if self._tail_task is not None:
+            self._tail_task.cancel()
+
+    async def publish(self, user_id: str, event: Dict[str, Any]):
+        await db[self.collection].insert_one({"user_id": user_id, "event": event})
+
+    async def _tail(self):
+        # Natural (insertion) order is the only order all workers' writes
+        # share; ObjectIds from different processes are not monotonic, so
+        # there is no "_id greater than" to resume from. The cursor is kept
+        # open for as long as it lives. A reopened one starts at the oldest
+        # entry and skips up to the last one relayed; if it catches up without
+        # meeting that entry, the entry was overwritten and events may have
+        # been lost, so every subscriber is told to resync.
+        collection = db[self.collection]
+        newest = await collection.find_one({}, {"_id": 1}, sort=[("$natural", DESCENDING)])
+        last_id = newest["_id"] if newest else None
+        cursor = None
+        while True:
+            if cursor is None or not cursor.alive:
+                cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                skip_to, position = last_id, None
+            try:
+                # Ends once a getMore comes back empty, i.e. caught up
+                async for doc in cursor:
+                    position = doc["_id"]
+                    if skip_to is not None:
+                        if doc["_id"] == skip_to:
+                            skip_to = None
+                        continue
+                    last_id = doc["_id"]
+                    await super().publish(doc["user_id"], doc["event"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change log tail failed; reopening")
+                cursor = None
+                await asyncio.sleep(CHANGE_LOG_RETRY_SECONDS)
+                continue
+            if skip_to is not None:
+                logger.warning("Change log overran the last relayed event; resyncing subscribers")
+                self.resync_all()
+                skip_to, last_id = None, position
+            if not cursor.alive:
+                # A tailable cursor on an empty collection closes immediately
+                await asyncio.sleep(CHANGE_LOG_RETRY_SECONDS)
+
+change_hub: ChangeHub = MongoChangeHub() if CHANGE_HUB == "mongo" else InMemoryChangeHub()
+
+def change_event(
+    kind: str,
+    action: str,
+    doc_id: str,
+    document: Optional[Dict[str, Any]] = None,
+    previous: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    # previous is the stored state before an update/delete; it feeds the
+    # materialized stats and is never published
+    fields = TASK_READ_FIELDS if kind == "task" else ACTIVITY_READ_FIELDS
+    event = {
+        "type": kind,
+        "action": action,
+        "id": doc_id,
+        "document": hydrate(document, fields) if document is not None else None
+    }
+    if previous is not None:
+        event["previous"] = previous
+    return event
+
+# Data versions
+# Every task/activity write and profile update bumps users.data_version. Read
+# endpoints derive weak ETags from it, so a matching If-None-Match is answered
+# with a 304 after a single indexed users lookup, without touching tasks or
+# activities.
+STATS_ETAG_WINDOW = 60  # seconds; stats also change as time passes
+
+async def record_user_change(user_id: str, changes: List[Dict[str, Any]] = ()):
+    now = datetime.utcnow()
+    user = await db.users.find_one_and_update(
+        {"id": user_id},
+        {"$inc": {"data_version": 1}, "$set": {"data_changed_at": now}},
+        projection={"_id": 0, "data_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    version = user["data_version"] if user else None
+    
+    tombstones = [
+        {"user_id": user_id, "type": change["type"], "id": change["id"], "deleted_at": now}
+        for change in changes if change["action"] == "deleted"
+    ]
+    if tombstones:
+        await db.tombstones.insert_many(tombstones, ordered=False)
+    await apply_stats_changes(user_id, changes, now)
+    
+    for change in changes:
+        event = {key: value for key, value in change.items() if key != "previous"}
+        await change_hub.publish(user_id, {**event, "version": version})
+    return version
+
+async def get_data_version(user_id: str) -> Optional[int]:
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "data_version": 1})
+    if user is None:
+        return None
+    return user.get("data_version", 0)
+
+def data_etag(user_id: str, version: int, *parts: Any) -> str:
+    return 'W/"' + "-".join([user_id, str(version), *(str(part) for part in parts)]) + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored on both sides
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def cache_headers(etag: Optional[str]) -> Dict[str, str]:
+    if etag is None:
+        return {}
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+# Stats engine
+# Counts are materialized in one user_stats document per user. Every write
+# path applies $inc deltas through record_user_change, so a stats read is a
+# single find_one. Overdue/upcoming depend on the clock as well as the data:
+# the document stores time_valid_until, the next moment a pending task crosses
+# a due or upcoming-window boundary, and is recounted lazily once that passes.
+# reconcile_user_stats periodically recounts everything and repairs drift.
+UPCOMING_WINDOW = timedelta(days=7)
+STATS_MAX_AGE = timedelta(hours=24)  # recount at least this often regardless
+STATS_RECONCILE_INTERVAL = int(os.environ.get("STATS_RECONCILE_INTERVAL", "3600"))  # seconds, 0 disables
+STATS_COUNTERS = ("total_tasks", "completed_tasks", "overdue_tasks", "upcoming_tasks", "total_activities")
+
+async def compute_user_stats(user_id: str) -> Dict[str, Any]:
+    # Full recount: all task counts from one $facet aggregation and activity
+    # counts from another, run concurrently
+    now = datetime.utcnow()
+    week_from_now = now + UPCOMING_WINDOW
+
+    task_facets = {
+        "total": [{"$count": "n"}],
+        "completed": [{"$match": {"completed": True}}, {"$count": "n"}],
+        "overdue": [
+            {"$match": {"completed": False, "due_date": {"$lt": now}}},
+            {"$count": "n"}
+        ],
+        "upcoming": [
+            {"$match": {"completed": False, "due_date": {"$gte": now, "$lte": week_from_now}}},
+            {"$count": "n"}
+        ],
+        # Earliest pending due date that will turn overdue / enter the window
+        "next_due": [
+            {"$match": {"completed": False, "due_date": {"$gte": now}}},
+            {"$group": {"_id": None, "due_date": {"$min": "$due_date"}}}
+        ],
+        "next_entering": [
+            {"$match": {"completed": False, "due_date": {"$gt": week_from_now}}},
+            {"$group": {"_id": None, "due_date": {"$min": "$due_date"}}}
+        ],
+    }
+    activity_facets = {
+        "total": [{"$count": "n"}],
+    }
+
+    task_result, activity_result = await asyncio.gather(
+        db.tasks.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$facet": task_facets}
+        ]).to_list(1),
+        db.activities.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$facet": activity_facets}
+        ]).to_list(1)
+    )
+    task_facet = task_result[0]
+    activity_facet = activity_result[0]
+
+    def count(facet, key):
+        return facet[key][0]["n"] if facet[key] else 0
+
+    boundaries = [now + STATS_MAX_AGE]
+    if task_facet["next_due"]:
+        boundaries.append(task_facet["next_due"][0]["due_date"])
+    if task_facet["next_entering"]:
+        boundaries.append(task_facet["next_entering"][0]["due_date"] - UPCOMING_WINDOW)
+
+    return {
+        "total_tasks": count(task_facet, "total"),
+        "completed_tasks": count(task_facet, "completed"),
+        "overdue_tasks": count(task_facet, "overdue"),
+        "upcoming_tasks": count(task_facet, "upcoming"),
+        "total_activities": count(activity_facet, "total"),
+        "time_valid_until": min(boundaries),
+        "computed_at": now
+    }
+
+async def rebuild_user_stats(user_id: str) -> Dict[str, Any]:
+    stats = await compute_user_stats(user_id)
+    await db.user_stats.update_one({"user_id": user_id}, {"$set": stats}, upsert=True)
+    return stats
+
+def public_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "total_tasks": stats["total_tasks"],
+        "completed_tasks": stats["completed_tasks"],
+        "pending_tasks": stats["total_tasks"] - stats["completed_tasks"],
+        "overdue_tasks": stats["overdue_tasks"],
+        "upcoming_tasks": stats["upcoming_tasks"],
+        "total_activities": stats["total_activities"]
+    }
+
+async def load_user_stats(user_id: str) -> Dict[str, Any]:
+    stats = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+    if stats is None or stats["time_valid_until"] <= datetime.utcnow():
+        stats = await rebuild_user_stats(user_id)
+    return public_stats(stats)
+
+def _task_stat_counts(task: Optional[Dict[str, Any]], now: datetime) -> Dict[str, int]:
+    # Which counters a task contributes to at time now
+    if task is None:
+        return {}
+    counts = {"total_tasks": 1}
+    due_date = _as_naive_utc(task["due_date"])
+    if task["completed"]:
+        counts["completed_tasks"] = 1
+    elif due_date < now:
+        counts["overdue_tasks"] = 1
+    elif due_date <= now + UPCOMING_WINDOW:
+        counts["upcoming_tasks"] = 1
+    return counts
+
+def _task_stat_boundaries(task: Optional[Dict[str, Any]], now: datetime) -> List[datetime]:
+    if task is None or task["completed"]:
+        return []
+    due_date = _as_naive_utc(task["due_date"])
+    return [boundary for boundary in (due_date, due_date - UPCOMING_WINDOW) if boundary > now]
+
+async def apply_stats_changes(user_id: str, changes: List[Dict[str, Any]], now: datetime):
+    # Net counter deltas for a set of change events: a task's new state is
+    # counted in and its previous state counted out
+    deltas = dict.fromkeys(STATS_COUNTERS, 0)
+    boundaries = []
+    for change in changes:
+        if change["type"] == "task":
+            for counter, n in _task_stat_counts(change["document"], now).items():
+                deltas[counter] += n
+            for counter, n in _task_stat_counts(change.get("previous"), now).items():
+                deltas[counter] -= n
+            boundaries.extend(_task_stat_boundaries(change["document"], now))
+        elif change["action"] == "created":
+            deltas["total_activities"] += 1
+        elif change["action"] == "deleted":
+            deltas["total_activities"] -= 1
+
+    update = {}
+    deltas = {counter: n for counter, n in deltas.items() if n}
+    if deltas:
+        update["$inc"] = deltas
+    if boundaries:
+        update["$min"] = {"time_valid_until": min(boundaries)}
+    if update:
+        # No upsert: a missing document is built by the next read
+        await db.user_stats.update_one({"user_id": user_id}, update)
+
+async def reconcile_user_stats(concurrency: int = 8) -> Dict[str, int]:
+    # Recount every user's stats and repair documents that drifted, e.g. from
+    # a write that raced a lazy recount or a crash between write and $inc
+    semaphore = asyncio.Semaphore(concurrency)
+    checked = repaired = 0
+
+    async def reconcile(user_id):
+        nonlocal checked, repaired
+        async with semaphore:
+            stored = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+            stats = await rebuild_user_stats(user_id)
+            checked += 1
+            if stored is not None and any(
+                stored.get(counter) != stats[counter]
+                for counter in ("total_tasks", "completed_tasks", "total_activities")
+            ):
+                repaired += 1
+                logger.warning("Repaired drifted stats for user %s", user_id)
+
+    tasks = []
+    async for user in db.users.find({}, {"_id": 0, "id": 1}):
+        tasks.append(asyncio.create_task(reconcile(user["id"])))
+    await asyncio.gather(*tasks)
+    return {"checked": checked, "repaired": repaired}
+
+async def stats_reconcile_loop():
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+        # Every worker runs this loop; one of them wins the run per interval
+        if not await acquire_lease("stats_reconcile", STATS_RECONCILE_INTERVAL * 0.9):
+            continue
+        try:
+            result = await reconcile_user_stats()
+            logger.info("Stats reconciliation checked %(checked)d users, repaired %(repaired)d", result)
+        except Exception:
+            logger.exception("Stats reconciliation failed")
+
+async def load_upcoming_items(user_id: str, limit: int):
+    now = datetime.utcnow()
+    task_items, activity_result = await asyncio.gather(
+        db.tasks.find(
+            {"user_id": user_id, "completed": False}, TASK_PROJECTION
+        ).sort("due_date", ASCENDING).limit(limit).to_list(limit),
+        db.activities.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$facet": {
+                "upcoming_items": [
+                    {"$match": {"start_datetime": {"$gt": now}, "recurrence": {"$not": {"$type": "object"}}}},
+                    {"$sort": {"start_datetime": 1}},
+                    {"$limit": limit}
+                ],
+                "recurring_items": [
+                    {"$match": {"recurrence": {"$type": "object"}}}
+                ]
+            }}
+        ]).to_list(1)
+    )
+    activity_facet = activity_result[0]
+    activity_items = next_occurrences(
+        activity_facet["upcoming_items"] + activity_facet["recurring_items"], now, limit
+    )
+    return task_items, activity_items
+
+# Page query builders
+# The tasks/activities pages translate their filter/sort parameters into
+# indexed queries so Mongo does the filtering, ordering and limiting.
+# Priority is stored as a numeric priority_rank alongside the enum value so
+# it can be ordered by an index.
+PAGE_LIST_LIMIT = 1000
+PRIORITY_RANK = {"low": 1, "medium": 2, "high": 3}
+
+TASK_PAGE_SORTS = {
+    "due_date": [("due_date", ASCENDING), ("id", ASCENDING)],
+    "priority": [("priority_rank", DESCENDING), ("due_date", ASCENDING)],
+    "title": [("title", ASCENDING)],
+}
+
+def priority_rank(priority: Any) -> int:
+    return PRIORITY_RANK.get(priority.value if isinstance(priority, Enum) else priority, 0)
+
+def task_page_query(user_id: str, filter: str, sort: str, now: datetime):
+    # Filters always constrain `completed` (an $in for "all") so every
+    # combination is served by a (user_id, completed, <sort key>) index
+    query = {"user_id": user_id, "completed": {"$in": [False, True]}}
+    if filter == "completed":
+        query["completed"] = True
+    elif filter == "pending":
+        query["completed"] = False
+    elif filter == "overdue":
+        query["completed"] = False
+        query["due_date"] = {"$lt": now}
+    
+    cursor = db.tasks.find(query, TASK_PROJECTION).sort(TASK_PAGE_SORTS.get(sort, TASK_PAGE_SORTS["due_date"]))
+    if sort == "title":
+        cursor = cursor.collation(TITLE_COLLATION)
+    return cursor.limit(PAGE_LIST_LIMIT)
+
+def activity_page_query(user_id: str, filter: str, now: datetime):
+    query = {"user_id": user_id}
+    if filter == "upcoming":
+        query["start_datetime"] = {"$gt": now}
+    elif filter == "past":
+        # Anything that has ended has also started; the start bound lets the
+        # (user_id, start_datetime) index serve the sort
+        query["start_datetime"] = {"$lt": now}
+        query["end_datetime"] = {"$lt": now}
+    elif filter != "all":
+        query["activity_type"] = filter
+    
+    return db.activities.find(query, ACTIVITY_PROJECTION).sort("start_datetime", ASCENDING).limit(PAGE_LIST_LIMIT)
 
 # Web Routes
 @app.get("/", response_class=HTMLResponse)
@@ -189,20 +1674,23 @@ async def login_post(
     email: str = Form(...),
     password: str = Form(...)
 ):
-    # Simple demo authentication - find user by email
-    users = await db.users.find({"email": email}).to_list(100)
-    if users:
-        user = users[0]
-        request.session["user_id"] = user["id"]
-        return RedirectResponse(url="/dashboard", status_code=302)
+    if not admit_login_attempt(request):
+        return login_overloaded_response(request, {"is_signup": False, "email": email})
     
-    # If user doesn't exist, show error
-    return templates.TemplateResponse("login.html", {
-        "request": request,
-        "is_signup": False,
-        "error": "User not found. Please sign up first.",
-        "email": email
-    })
+    try:
+        user_id, error = await check_login(email, password)
+    except LoginOverloaded:
+        return login_overloaded_response(request, {"is_signup": False, "email": email})
+    
+    if error:
+        return templates.TemplateResponse("login.html", {
+            "request": request,
+            "is_signup": False,
+            "error": error,
+            "email": email
+        })
+    request.session["user_id"] = user_id
+    return RedirectResponse(url="/dashboard", status_code=302)
 
 @app.post("/signup", response_class=HTMLResponse)
 async def signup_post(
@@ -212,33 +1700,63 @@ async def signup_post(
     password: str = Form(...),
     year_level: int = Form(...)
 ):
-    # Check if user already exists
-    existing_user = await db.users.find_one({"email": email})
-    if existing_user:
+    form_context = {"is_signup": True, "name": name, "email": email, "year_level": year_level}
+    if not admit_login_attempt(request, "signup"):
+        return login_overloaded_response(request, form_context)
+    
+    try:
+        user_id, error = await create_account(name, email, password, year_level)
+    except LoginOverloaded:
+        return login_overloaded_response(request, form_context)
+    
+    if error:
         return templates.TemplateResponse("login.html", {
             "request": request,
-            "is_signup": True,
-            "error": "User with this email already exists.",
-            "name": name,
-            "email": email,
-            "year_level": year_level
+            **form_context,
+            "error": error
         })
+    request.session["user_id"] = user_id
     
-    # Create new user
-    user_data = {
-        "id": str(uuid.uuid4()),
-        "name": name,
-        "email": email,
-        "year_level": year_level,
-        "subjects": ["Mathematics", "Physics", "Chemistry", "English", "History"],
-        "theme": "light",
-        "default_view": "month",
-        "created_at": datetime.utcnow()
-    }
+    return RedirectResponse(url="/dashboard", status_code=302)
+
+@app.get("/reset-password", response_class=HTMLResponse)
+async def reset_password_page(request: Request, token: str = ""):
+    if not token or not await find_password_reset(token):
+        return templates.TemplateResponse("login.html", {
+            "request": request,
+            "is_signup": False,
+            "error": "This set-password link is invalid or has expired."
+        }, status_code=400)
+    return templates.TemplateResponse("reset_password.html", {"request": request, "token": token})
+
+@app.post("/reset-password", response_class=HTMLResponse)
+async def reset_password_post(
+    request: Request,
+    token: str = Form(...),
+    password: str = Form(...)
+):
+    if not admit_login_attempt(request):
+        return login_overloaded_response(request, {"is_signup": False})
+    
+    try:
+        password_hash = await hash_password(password)
+    except LoginOverloaded:
+        return login_overloaded_response(request, {"is_signup": False})
     
-    await db.users.insert_one(user_data)
-    request.session["user_id"] = user_data["id"]
+    # Deleting the token on use makes it single-use even under concurrent posts
+    reset = await db.password_resets.find_one_and_delete(
+        {"_id": password_reset_id(token), "expires_at": {"$gt": datetime.utcnow()}}
+    )
+    if not reset:
+        return templates.TemplateResponse("login.html", {
+            "request": request,
+            "is_signup": False,
+            "error": "This set-password link is invalid or has expired."
+        }, status_code=400)
     
+    await db.users.update_one({"id": reset["user_id"]}, {"$set": {"password_hash": password_hash}})
+    session_user_cache.invalidate(reset["user_id"])
+    request.session["user_id"] = reset["user_id"]
     return RedirectResponse(url="/dashboard", status_code=302)
 
 @app.get("/logout")
@@ -246,44 +1764,81 @@ async def logout(request: Request):
     request.session.clear()
     return RedirectResponse(url="/login", status_code=302)
 
+# JSON authentication for the React app; same checks and session as the forms
+class LoginRequest(BaseModel):
+    email: str
+    password: str
+
+class SignupRequest(LoginRequest):
+    name: str
+    year_level: int = Field(ge=9, le=12)
+
+def login_overloaded_error() -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many sign-in attempts right now. Please try again in a minute.",
+        headers={"Retry-After": str(int(LOGIN_RATE_WINDOW))}
+    )
+
+@api_router.post("/auth/login", response_model=User)
+async def api_login(request: Request, credentials: LoginRequest):
+    if not admit_login_attempt(request):
+        raise login_overloaded_error()
+    try:
+        user_id, error = await check_login(credentials.email, credentials.password)
+    except LoginOverloaded:
+        raise login_overloaded_error()
+    if error:
+        raise HTTPException(status_code=401, detail=error)
+    request.session["user_id"] = user_id
+    return await get_user_from_session(request)
+
+@api_router.post("/auth/signup", response_model=User)
+async def api_signup(request: Request, signup: SignupRequest):
+    if not admit_login_attempt(request, "signup"):
+        raise login_overloaded_error()
+    try:
+        user_id, error = await create_account(signup.name, signup.email, signup.password, signup.year_level)
+    except LoginOverloaded:
+        raise login_overloaded_error()
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    request.session["user_id"] = user_id
+    return await get_user_from_session(request)
+
+@api_router.post("/auth/logout")
+async def api_logout(request: Request):
+    request.session.clear()
+    return {"message": "Logged out"}
+
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
     user = await get_user_from_session(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
     
-    # Get stats
-    total_tasks = await db.tasks.count_documents({"user_id": user.id})
-    completed_tasks = await db.tasks.count_documents({"user_id": user.id, "completed": True})
-    pending_tasks = total_tasks - completed_tasks
-    
-    now = datetime.utcnow()
-    overdue_tasks = await db.tasks.count_documents({
-        "user_id": user.id,
-        "completed": False,
-        "due_date": {"$lt": now}
-    })
-    
-    stats = {
-        "total_tasks": total_tasks,
-        "completed_tasks": completed_tasks,
-        "pending_tasks": pending_tasks,
-        "overdue_tasks": overdue_tasks
-    }
-    
-    # Get upcoming tasks
-    upcoming_tasks_data = await db.tasks.find({
-        "user_id": user.id,
-        "completed": False
-    }).sort("due_date", 1).limit(5).to_list(5)
-    upcoming_tasks = [Task(**task) for task in upcoming_tasks_data]
-    
-    # Get upcoming activities
-    upcoming_activities_data = await db.activities.find({
-        "user_id": user.id,
-        "start_datetime": {"$gt": now}
-    }).sort("start_datetime", 1).limit(5).to_list(5)
-    upcoming_activities = [Activity(**activity) for activity in upcoming_activities_data]
+    # Stats cards and upcoming lists are only recomputed when the user's data
+    # version or the stats time window changes
+    version = await get_data_version(user.id)
+    time_window = int(datetime.utcnow().timestamp() // STATS_ETAG_WINDOW)
+    fragment_key = (user.id, version, time_window)
+    fragments = fragment_cache.get(fragment_key)
+    if fragments is None:
+        # Materialized stats and upcoming items in one concurrent round trip
+        stats, (upcoming_task_items, upcoming_activity_items) = await asyncio.gather(
+            load_user_stats(user.id), load_upcoming_items(user.id, 5)
+        )
+        upcoming_tasks = [hydrate(task, TASK_READ_FIELDS) for task in upcoming_task_items]
+        upcoming_activities = [hydrate(activity, ACTIVITY_READ_FIELDS) for activity in upcoming_activity_items]
+        fragments = {
+            "stats_cards": templates.render_fragment("partials/stats_cards.html", stats=stats),
+            "upcoming_items": templates.render_fragment(
+                "partials/upcoming_items.html",
+                upcoming_tasks=upcoming_tasks,
+                upcoming_activities=upcoming_activities
+            )
+        }
+        fragment_cache.set(fragment_key, fragments)
     
     notification = request.query_params.get("notification")
     
@@ -291,9 +1846,7 @@ async def dashboard(request: Request):
         "request": request,
         "user": user,
         "current_view": "dashboard",
-        "stats": stats,
-        "upcoming_tasks": upcoming_tasks,
-        "upcoming_activities": upcoming_activities,
+        "fragments": fragments,
         "notification": notification
     })
 
@@ -340,6 +1893,7 @@ async def create_task_post(
             "subject": subject,
             "task_type": task_type,
             "priority": priority,
+            "priority_rank": priority_rank(priority),
             "due_date": due_datetime,
             "completed": False,
             "completed_at": None,
@@ -349,6 +1903,7 @@ async def create_task_post(
         }
         
         await db.tasks.insert_one(task_data)
+        await record_user_change(user.id, [change_event("task", "created", task_data["id"], task_data)])
         
         return RedirectResponse(
             url="/dashboard?notification=✅ Task created and added to calendar!", 
@@ -376,29 +1931,10 @@ async def tasks_page(request: Request, filter: str = "all", sort: str = "due_dat
     if not user:
         return RedirectResponse(url="/login", status_code=302)
     
-    # Get tasks based on filter
-    query = {"user_id": user.id}
+    # Get filtered, sorted tasks from the database
     now = datetime.utcnow()
-    
-    if filter == "completed":
-        query["completed"] = True
-    elif filter == "pending":
-        query["completed"] = False
-    elif filter == "overdue":
-        query["completed"] = False
-        query["due_date"] = {"$lt": now}
-    
-    tasks_data = await db.tasks.find(query).to_list(1000)
-    tasks = [Task(**task) for task in tasks_data]
-    
-    # Sort tasks
-    if sort == "due_date":
-        tasks.sort(key=lambda t: t.due_date)
-    elif sort == "priority":
-        priority_order = {"high": 3, "medium": 2, "low": 1}
-        tasks.sort(key=lambda t: priority_order.get(t.priority, 0), reverse=True)
-    elif sort == "title":
-        tasks.sort(key=lambda t: t.title.lower())
+    tasks_data = await task_page_query(user.id, filter, sort, now).to_list(PAGE_LIST_LIMIT)
+    tasks = [hydrate(task, TASK_READ_FIELDS) for task in tasks_data]
     
     return templates.TemplateResponse("tasks.html", {
         "request": request,
@@ -433,6 +1969,9 @@ async def toggle_task_completion(request: Request, task_id: str):
         {"id": task_id},
         {"$set": update_data}
     )
+    await record_user_change(
+        user.id, [change_event("task", "updated", task_id, {**task_data, **update_data}, previous=task_data)]
+    )
     
     notification = "✅ Task completed!" if new_completed else "📝 Task marked as incomplete"
     return RedirectResponse(
@@ -446,23 +1985,10 @@ async def activities_page(request: Request, filter: str = "all"):
     if not user:
         return RedirectResponse(url="/login", status_code=302)
     
-    # Get activities based on filter
-    query = {"user_id": user.id}
+    # Get filtered activities from the database, ordered by start_datetime
     now = datetime.utcnow()
-    
-    activities_data = await db.activities.find(query).to_list(1000)
-    activities = [Activity(**activity) for activity in activities_data]
-    
-    # Filter activities
-    if filter == "upcoming":
-        activities = [a for a in activities if a.start_datetime > now]
-    elif filter == "past":
-        activities = [a for a in activities if a.end_datetime < now]
-    elif filter != "all":
-        activities = [a for a in activities if a.activity_type == filter]
-    
-    # Sort by start_datetime
-    activities.sort(key=lambda a: a.start_datetime)
+    activities_data = await activity_page_query(user.id, filter, now).to_list(PAGE_LIST_LIMIT)
+    activities = [hydrate(activity, ACTIVITY_READ_FIELDS) for activity in activities_data]
     
     return templates.TemplateResponse("activities.html", {
         "request": request,
@@ -520,10 +2046,19 @@ async def create_activity_post(
             "updated_at": datetime.utcnow()
         }
         
+        conflicts = await find_activity_conflicts(activity_data)
         await db.activities.insert_one(activity_data)
+        await record_user_change(
+            user.id, [change_event("activity", "created", activity_data["id"], activity_data)]
+        )
         
+        if conflicts:
+            titles = ", ".join(sorted({conflict["title"] for conflict in conflicts}))
+            notification = f"⚠️ Activity created, but it overlaps with: {titles}"
+        else:
+            notification = "✅ Activity created and added to calendar!"
         return RedirectResponse(
-            url="/dashboard?notification=✅ Activity created and added to calendar!", 
+            url=f"/dashboard?notification={notification}", 
             status_code=302
         )
         
@@ -575,6 +2110,308 @@ class ActivityUpdate(BaseModel):
     recurrence: Optional[RecurrencePattern] = None
     color: Optional[str] = None
 
+# Recurrence expansion
+# Occurrences are computed arithmetically from the series start, so expanding
+# a window costs O(occurrences in the window) no matter how long the series
+# has been running. Expanded windows are memoised per (activity, version, window).
+RECURRENCE_CACHE_SIZE = 4096
+_occurrence_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+def _as_naive_utc(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.max)
+    raise TypeError(f"Unsupported datetime value: {value!r}")
+
+def encode_item_dates(document: Dict[str, Any]) -> Dict[str, Any]:
+    # BSON has no date or time types: a task's due_time is stored as its ISO
+    # string (Task parses it back) and a recurrence end date as the end of
+    # that day, which is how expansion reads it anyway
+    if isinstance(document.get("due_time"), time):
+        document["due_time"] = document["due_time"].isoformat()
+    recurrence = document.get("recurrence")
+    if recurrence and recurrence.get("end_date") is not None:
+        recurrence["end_date"] = _as_naive_utc(recurrence["end_date"])
+    return document
+
+def _add_months(value: datetime, months: int) -> datetime:
+    year, month = divmod(value.month - 1 + months, 12)
+    year += value.year
+    month += 1
+    return value.replace(year=year, month=month, day=min(value.day, monthrange(year, month)[1]))
+
+def iter_occurrence_starts(series_start: datetime, recurrence: Dict[str, Any],
+                           window_start: datetime, window_end: datetime):
+    # Lazily yield occurrence starts in [window_start, window_end], ascending
+    interval = max(1, int(recurrence.get("interval") or 1))
+    upper = window_end
+    series_end = _as_naive_utc(recurrence.get("end_date"))
+    if series_end is not None and series_end < upper:
+        upper = series_end
+    lower = max(window_start, series_start)
+    if lower > upper:
+        return
+
+    frequency = recurrence.get("frequency")
+    if frequency == "daily":
+        period = timedelta(days=interval)
+        occurrence = series_start + period * -((series_start - lower) // period)
+        while occurrence <= upper:
+            yield occurrence
+            occurrence += period
+    elif frequency == "weekly":
+        days = sorted({d for d in (recurrence.get("days_of_week") or [series_start.weekday()]) if 0 <= d <= 6})
+        period = timedelta(weeks=interval)
+        week = series_start - timedelta(days=series_start.weekday())
+        week += period * max(0, (lower - week) // period)
+        while week <= upper:
+            for day in days:
+                occurrence = week + timedelta(days=day)
+                if occurrence > upper:
+                    return
+                if occurrence >= lower:
+                    yield occurrence
+            week += period
+    elif frequency == "monthly":
+        elapsed = (lower.year - series_start.year) * 12 + lower.month - series_start.month
+        step = max(0, elapsed // interval)
+        while True:
+            occurrence = _add_months(series_start, step * interval)
+            if occurrence > upper:
+                return
+            if occurrence >= lower:
+                yield occurrence
+            step += 1
+    elif series_start >= lower:
+        yield series_start
+
+def expand_activity(activity: Dict[str, Any], window_start: datetime, window_end: datetime) -> tuple:
+    # (start, end) pairs for every occurrence of the activity starting in the window
+    window_start = _as_naive_utc(window_start)
+    window_end = _as_naive_utc(window_end)
+    start = _as_naive_utc(activity["start_datetime"])
+    duration = _as_naive_utc(activity["end_datetime"]) - start
+    recurrence = activity.get("recurrence")
+    if not recurrence:
+        return ((start, start + duration),) if window_start <= start <= window_end else ()
+
+    key = (activity["id"], activity.get("updated_at"), window_start, window_end)
+    occurrences = _occurrence_cache.get(key)
+    if occurrences is not None:
+        _occurrence_cache.move_to_end(key)
+        return occurrences
+
+    occurrences = tuple(
+        (occurrence, occurrence + duration)
+        for occurrence in iter_occurrence_starts(start, recurrence, window_start, window_end)
+    )
+    _occurrence_cache[key] = occurrences
+    if len(_occurrence_cache) > RECURRENCE_CACHE_SIZE:
+        _occurrence_cache.popitem(last=False)
+    return occurrences
+
+def next_occurrences(activities: List[Dict[str, Any]], after: datetime, limit: int) -> List[Dict[str, Any]]:
+    # The first `limit` occurrences strictly after `after` across all activities,
+    # as activity documents with their start/end moved to the occurrence
+    after = _as_naive_utc(after) + timedelta(microseconds=1)
+
+    def occurrences(activity):
+        start = _as_naive_utc(activity["start_datetime"])
+        duration = _as_naive_utc(activity["end_datetime"]) - start
+        recurrence = activity.get("recurrence") or {"frequency": None}
+        for occurrence in iter_occurrence_starts(start, recurrence, after, datetime.max):
+            yield occurrence, activity["id"], {
+                **activity,
+                "start_datetime": occurrence,
+                "end_datetime": occurrence + duration
+            }
+
+    merged = heapq.merge(*(occurrences(activity) for activity in activities), key=lambda item: item[:2])
+    return [doc for _, _, doc in islice(merged, limit)]
+
+# Activity conflict detection
+# Busy time for a window comes straight from the indexed range query (one-off
+# activities overlapping it plus recurring series started before its end),
+# expanded to occurrences and sorted by start. A single activity's occurrences
+# share one duration, so their starts and ends are both sorted and each busy
+# interval is matched against them with one bisect.
+CONFLICT_HORIZON = timedelta(days=180)
+MAX_CONFLICT_WINDOW = timedelta(days=366)
+
+class ActivityOccurrence(BaseModel):
+    id: str
+    title: str
+    activity_type: ActivityType
+    start_datetime: datetime
+    end_datetime: datetime
+
+class ActivityWithConflicts(Activity):
+    conflicts: List[ActivityOccurrence] = []
+
+def overlapping_pairs(intervals: list):
+    # intervals: (start, end, payload) sorted by start. Sweep keeping a heap
+    # of active ends: O(n log n + k)
+    active = []
+    for position, (start, end, payload) in enumerate(intervals):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other in active:
+            yield intervals[other], intervals[position]
+        heapq.heappush(active, (end, position))
+
+def _occurrence_payload(activity: Dict[str, Any], start: datetime, end: datetime) -> Dict[str, Any]:
+    return {
+        "id": activity["id"],
+        "title": activity["title"],
+        "activity_type": activity["activity_type"],
+        "start_datetime": start,
+        "end_datetime": end
+    }
+
+async def load_busy_intervals(user_id: str, window_start: datetime, window_end: datetime,
+                              exclude_id: Optional[str] = None) -> list:
+    query = {"user_id": user_id, "$or": [
+        {"end_datetime": {"$gt": window_start}, "start_datetime": {"$lt": window_end}},
+        {"recurrence": {"$type": "object"}, "start_datetime": {"$lt": window_end}}
+    ]}
+    if exclude_id:
+        query["id"] = {"$ne": exclude_id}
+    projection = {
+        "_id": 0, "id": 1, "title": 1, "activity_type": 1, "start_datetime": 1,
+        "end_datetime": 1, "recurrence": 1, "updated_at": 1
+    }
+
+    intervals = []
+    async for activity in db.activities.find(query, projection):
+        duration = activity["end_datetime"] - activity["start_datetime"]
+        for start, end in expand_activity(activity, window_start - duration, window_end):
+            if start < window_end and end > window_start:
+                intervals.append((start, end, _occurrence_payload(activity, start, end)))
+    intervals.sort(key=lambda interval: (interval[0], interval[1]))
+    return intervals
+
+async def find_activity_conflicts(activity: Dict[str, Any]) -> List[Dict[str, Any]]:
+    start = _as_naive_utc(activity["start_datetime"])
+    horizon_end = start + CONFLICT_HORIZON if activity.get("recurrence") else start
+    occurrences = expand_activity(activity, start, horizon_end)
+    if not occurrences:
+        return []
+
+    busy = await load_busy_intervals(
+        activity["user_id"], occurrences[0][0], occurrences[-1][1], exclude_id=activity["id"]
+    )
+    occurrence_ends = [occurrence_end for _, occurrence_end in occurrences]
+    conflicts = {}
+    for other_start, other_end, payload in busy:
+        # First occurrence ending after the busy interval starts; the ones
+        # from there that start before it ends overlap it
+        position = bisect_right(occurrence_ends, other_start)
+        if position < len(occurrences) and occurrences[position][0] < other_end:
+            conflicts[(payload["id"], other_start)] = payload
+    return sorted(conflicts.values(), key=lambda payload: payload["start_datetime"])
+
+# Read models
+# Documents read back from Mongo were validated when they were written, so the
+# list and calendar views skip Pydantic: each view projects only the model's
+# fields, fills model defaults for keys older documents lack, and hands plain
+# dicts to a fast JSON encoder (or straight to the templates).
+def _read_fields(model) -> tuple:
+    fields = []
+    for name, field in model.model_fields.items():
+        default = None if field.is_required() else field.get_default(call_default_factory=False)
+        if isinstance(default, Enum):
+            default = default.value
+        fields.append((name, default))
+    return tuple(fields)
+
+def read_projection(fields: tuple) -> Dict[str, int]:
+    return {"_id": 0, **{name: 1 for name, _ in fields}}
+
+def hydrate(doc: Dict[str, Any], fields: tuple) -> Dict[str, Any]:
+    return {name: doc.get(name, default) for name, default in fields}
+
+TASK_READ_FIELDS = _read_fields(Task)
+ACTIVITY_READ_FIELDS = _read_fields(Activity)
+USER_READ_FIELDS = _read_fields(User)
+TASK_PROJECTION = read_projection(TASK_READ_FIELDS)
+ACTIVITY_PROJECTION = read_projection(ACTIVITY_READ_FIELDS)
+USER_PROJECTION = read_projection(USER_READ_FIELDS)
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def fast_json_dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return fast_json_dumps(content)
+
+# Keyset pagination
+# Pages are ordered by (sort_field, id) and the cursor carries the last pair
+# seen, so fetching page N costs the same index seek as page 1.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+class TaskPage(BaseModel):
+    items: List[Task]
+    next_cursor: Optional[str] = None
+
+class ActivityPage(BaseModel):
+    items: List[Activity]
+    next_cursor: Optional[str] = None
+
+class UserPage(BaseModel):
+    items: List[User]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(sort_value: datetime, doc_id: str) -> str:
+    payload = json.dumps([sort_value.isoformat(), doc_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), str(doc_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(collection, query: Dict[str, Any], sort_field: str, limit: int, cursor: Optional[str],
+                     projection: Optional[Dict[str, int]] = None):
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        query = {**query, "$or": [
+            {sort_field: {"$gt": sort_value}},
+            {sort_field: sort_value, "id": {"$gt": last_id}}
+        ]}
+
+    # Read one extra document to learn whether another page exists
+    docs = await collection.find(query, projection).sort(
+        [(sort_field, ASCENDING), ("id", ASCENDING)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1][sort_field], docs[-1]["id"])
+    return docs, next_cursor
+
 # User routes
 @api_router.post("/users", response_model=User)
 async def create_user(user_data: UserCreate):
@@ -584,13 +2421,23 @@ async def create_user(user_data: UserCreate):
         user_dict['id'] = str(uuid.uuid4())
     
     user = User(**user_dict)
-    result = await db.users.insert_one(user.dict())
+    try:
+        result = await db.users.insert_one(user.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="User with this email or id already exists")
+    session_user_cache.invalidate(user.id)
     return user
 
-@api_router.get("/users", response_model=List[User])
-async def get_all_users():
-    users = await db.users.find({}).to_list(1000)
-    return [User(**user) for user in users]
+@api_router.get("/users", response_model=UserPage)
+async def get_all_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    users, next_cursor = await fetch_page(db.users, {}, "created_at", limit, cursor, USER_PROJECTION)
+    return FastJSONResponse({
+        "items": [hydrate(user, USER_READ_FIELDS) for user in users],
+        "next_cursor": next_cursor
+    })
 
 @api_router.get("/users/{user_id}", response_model=User)
 async def get_user(user_id: str):
@@ -604,10 +2451,16 @@ async def update_user(user_id: str, user_update: UserUpdate):
     update_data = {k: v for k, v in user_update.dict().items() if v is not None}
     
     if update_data:
-        result = await db.users.update_one(
-            {"id": user_id}, 
-            {"$set": update_data}
-        )
+        # The name and year level appear in the calendar feed and dashboard, so
+        # the data version moves on to retire their cached renders and ETags
+        try:
+            result = await db.users.update_one(
+                {"id": user_id}, 
+                {"$set": {**update_data, "data_changed_at": datetime.utcnow()}, "$inc": {"data_version": 1}}
+            )
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="User with this email already exists")
+        session_user_cache.invalidate(user_id)
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
     
@@ -623,17 +2476,34 @@ async def create_task(user_id: str, task_data: TaskCreate):
         raise HTTPException(status_code=404, detail="User not found")
     
     task = Task(user_id=user_id, **task_data.dict())
-    result = await db.tasks.insert_one(task.dict())
+    task_doc = encode_item_dates(task.dict())
+    task_doc["priority_rank"] = priority_rank(task.priority)
+    result = await db.tasks.insert_one(task_doc)
+    await record_user_change(user_id, [change_event("task", "created", task.id, task_doc)])
     return task
 
-@api_router.get("/users/{user_id}/tasks", response_model=List[Task])
-async def get_user_tasks(user_id: str, completed: Optional[bool] = None):
+@api_router.get("/users/{user_id}/tasks", response_model=TaskPage)
+async def get_user_tasks(
+    request: Request,
+    user_id: str,
+    completed: Optional[bool] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    version = await get_data_version(user_id)
+    etag = data_etag(user_id, version, "tasks") if version is not None else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    
     query = {"user_id": user_id}
     if completed is not None:
         query["completed"] = completed
     
-    tasks = await db.tasks.find(query).sort("due_date", 1).to_list(1000)
-    return [Task(**task) for task in tasks]
+    tasks, next_cursor = await fetch_page(db.tasks, query, "due_date", limit, cursor, TASK_PROJECTION)
+    return FastJSONResponse({
+        "items": [hydrate(task, TASK_READ_FIELDS) for task in tasks],
+        "next_cursor": next_cursor
+    }, headers=cache_headers(etag))
 
 @api_router.get("/tasks/{task_id}", response_model=Task)
 async def get_task(task_id: str):
@@ -644,7 +2514,9 @@ async def get_task(task_id: str):
 
 @api_router.put("/tasks/{task_id}", response_model=Task)
 async def update_task(task_id: str, task_update: TaskUpdate):
-    update_data = {k: v for k, v in task_update.dict().items() if v is not None}
+    update_data = encode_item_dates({k: v for k, v in task_update.dict().items() if v is not None})
+    if "priority" in update_data:
+        update_data["priority_rank"] = priority_rank(update_data["priority"])
     
     if "completed" in update_data and update_data["completed"]:
         update_data["completed_at"] = datetime.utcnow()
@@ -653,25 +2525,34 @@ async def update_task(task_id: str, task_update: TaskUpdate):
     
     update_data["updated_at"] = datetime.utcnow()
     
-    result = await db.tasks.update_one(
-        {"id": task_id}, 
-        {"$set": update_data}
+    previous_task = await db.tasks.find_one_and_update(
+        {"id": task_id},
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if not previous_task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    updated_task = await db.tasks.find_one({"id": task_id})
+    updated_task = {**previous_task, **update_data}
+    await record_user_change(
+        updated_task["user_id"], [change_event("task", "updated", task_id, updated_task, previous=previous_task)]
+    )
     return Task(**updated_task)
 
 @api_router.delete("/tasks/{task_id}")
 async def delete_task(task_id: str):
-    result = await db.tasks.delete_one({"id": task_id})
-    if result.deleted_count == 0:
+    deleted_task = await db.tasks.find_one_and_delete(
+        {"id": task_id}, projection={"_id": 0, "user_id": 1, "completed": 1, "due_date": 1}
+    )
+    if not deleted_task:
         raise HTTPException(status_code=404, detail="Task not found")
+    await record_user_change(
+        deleted_task["user_id"], [change_event("task", "deleted", task_id, previous=deleted_task)]
+    )
     return {"message": "Task deleted successfully"}
 
 # Activity routes
-@api_router.post("/users/{user_id}/activities", response_model=Activity)
+@api_router.post("/users/{user_id}/activities", response_model=ActivityWithConflicts)
 async def create_activity(user_id: str, activity_data: ActivityCreate):
     # Verify user exists
     user = await db.users.find_one({"id": user_id})
@@ -679,13 +2560,31 @@ async def create_activity(user_id: str, activity_data: ActivityCreate):
         raise HTTPException(status_code=404, detail="User not found")
     
     activity = Activity(user_id=user_id, **activity_data.dict())
-    result = await db.activities.insert_one(activity.dict())
-    return activity
+    activity_doc = encode_item_dates(activity.dict())
+    conflicts = await find_activity_conflicts(activity_doc)
+    result = await db.activities.insert_one(activity_doc)
+    await record_user_change(user_id, [change_event("activity", "created", activity.id, activity_doc)])
+    return ActivityWithConflicts(**activity.dict(), conflicts=conflicts)
 
-@api_router.get("/users/{user_id}/activities", response_model=List[Activity])
-async def get_user_activities(user_id: str):
-    activities = await db.activities.find({"user_id": user_id}).sort("start_datetime", 1).to_list(1000)
-    return [Activity(**activity) for activity in activities]
+@api_router.get("/users/{user_id}/activities", response_model=ActivityPage)
+async def get_user_activities(
+    request: Request,
+    user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    version = await get_data_version(user_id)
+    etag = data_etag(user_id, version, "activities") if version is not None else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    
+    activities, next_cursor = await fetch_page(
+        db.activities, {"user_id": user_id}, "start_datetime", limit, cursor, ACTIVITY_PROJECTION
+    )
+    return FastJSONResponse({
+        "items": [hydrate(activity, ACTIVITY_READ_FIELDS) for activity in activities],
+        "next_cursor": next_cursor
+    }, headers=cache_headers(etag))
 
 @api_router.get("/activities/{activity_id}", response_model=Activity)
 async def get_activity(activity_id: str):
@@ -694,9 +2593,9 @@ async def get_activity(activity_id: str):
         raise HTTPException(status_code=404, detail="Activity not found")
     return Activity(**activity)
 
-@api_router.put("/activities/{activity_id}", response_model=Activity)
+@api_router.put("/activities/{activity_id}", response_model=ActivityWithConflicts)
 async def update_activity(activity_id: str, activity_update: ActivityUpdate):
-    update_data = {k: v for k, v in activity_update.dict().items() if v is not None}
+    update_data = encode_item_dates({k: v for k, v in activity_update.dict().items() if v is not None})
     update_data["updated_at"] = datetime.utcnow()
     
     result = await db.activities.update_one(
@@ -707,18 +2606,211 @@ async def update_activity(activity_id: str, activity_update: ActivityUpdate):
         raise HTTPException(status_code=404, detail="Activity not found")
     
     updated_activity = await db.activities.find_one({"id": activity_id})
-    return Activity(**updated_activity)
+    await record_user_change(
+        updated_activity["user_id"], [change_event("activity", "updated", activity_id, updated_activity)]
+    )
+    conflicts = await find_activity_conflicts(updated_activity)
+    return ActivityWithConflicts(**updated_activity, conflicts=conflicts)
 
 @api_router.delete("/activities/{activity_id}")
 async def delete_activity(activity_id: str):
-    result = await db.activities.delete_one({"id": activity_id})
-    if result.deleted_count == 0:
+    deleted_activity = await db.activities.find_one_and_delete(
+        {"id": activity_id}, projection={"_id": 0, "user_id": 1}
+    )
+    if not deleted_activity:
         raise HTTPException(status_code=404, detail="Activity not found")
+    await record_user_change(deleted_activity["user_id"], [change_event("activity", "deleted", activity_id)])
     return {"message": "Activity deleted successfully"}
 
+# Batch routes
+# A batch is validated up front (one user lookup, one ownership lookup per
+# collection) and then executed as a single bulk_write per collection.
+MAX_BATCH_OPERATIONS = 5000
+
+class BatchAction(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    COMPLETE = "complete"
+
+class BatchTarget(str, Enum):
+    TASKS = "tasks"
+    ACTIVITIES = "activities"
+
+class BatchOperation(BaseModel):
+    action: BatchAction
+    target: BatchTarget
+    id: Optional[str] = None
+    data: Dict[str, Any] = {}
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., max_length=MAX_BATCH_OPERATIONS)
+    ordered: bool = True
+
+BATCH_MODELS = {
+    BatchTarget.TASKS: ("Task", Task, TaskCreate, TaskUpdate),
+    BatchTarget.ACTIVITIES: ("Activity", Activity, ActivityCreate, ActivityUpdate),
+}
+
+def check_encodable(document: Dict[str, Any]):
+    # Fail the one operation here instead of the whole bulk_write later
+    try:
+        bson_encode(document)
+    except (InvalidDocument, OverflowError) as e:
+        raise ValueError(f"Value cannot be stored: {e}")
+
+def _batch_write(user_id: str, operation: BatchOperation, existing_ids: set):
+    # Translate one operation into (write model, document id, created document)
+    # or raise ValueError/LookupError
+    label, model, create_model, update_model = BATCH_MODELS[operation.target]
+    now = datetime.utcnow()
+
+    if operation.action == BatchAction.CREATE:
+        document = encode_item_dates(model(user_id=user_id, **create_model(**operation.data).dict()).dict())
+        if operation.target == BatchTarget.TASKS:
+            document["priority_rank"] = priority_rank(document["priority"])
+        check_encodable(document)
+        return InsertOne(document), document["id"], document
+
+    if not operation.id:
+        raise ValueError("id is required")
+    if operation.id not in existing_ids:
+        raise LookupError(f"{label} not found")
+    selector = {"id": operation.id, "user_id": user_id}
+
+    if operation.action == BatchAction.DELETE:
+        return DeleteOne(selector), operation.id, None
+
+    if operation.action == BatchAction.COMPLETE:
+        if operation.target != BatchTarget.TASKS:
+            raise ValueError("Only tasks can be completed")
+        # Parsed like TaskUpdate.completed, so "false" is False rather than a truthy string
+        update_data = {"completed": TaskUpdate(completed=operation.data.get("completed", True)).completed}
+    else:
+        update_data = {k: v for k, v in update_model(**operation.data).dict().items() if v is not None}
+        if "priority" in update_data:
+            update_data["priority_rank"] = priority_rank(update_data["priority"])
+        encode_item_dates(update_data)
+
+    if "completed" in update_data:
+        update_data["completed_at"] = now if update_data["completed"] else None
+    update_data["updated_at"] = now
+    check_encodable(update_data)
+    return UpdateOne(selector, {"$set": update_data}), operation.id, None
+
+async def apply_batch_writes(target: BatchTarget, writes: list, batch: BatchRequest,
+                             results: list, previous: Dict[str, Any], changes: list):
+    # One bulk_write for a collection; fills in per-operation results and
+    # appends change events for the operations that were applied
+    try:
+        await db[target.value].bulk_write([write for _, write, _ in writes], ordered=batch.ordered)
+    except BulkWriteError as e:
+        failed = {error["index"]: error["errmsg"] for error in e.details["writeErrors"]}
+        for position, (index, _, _) in enumerate(writes):
+            if position in failed:
+                results[index] = {"index": index, "status": "error", "error": failed[position]}
+            elif batch.ordered and position > min(failed):
+                results[index] = {"index": index, "status": "skipped"}
+    
+    kind = "task" if target == BatchTarget.TASKS else "activity"
+    applied = [
+        (batch.operations[index], document) for index, _, document in writes
+        if results[index]["status"] == "ok"
+    ]
+    updated_ids = [op.id for op, _ in applied if op.action in (BatchAction.UPDATE, BatchAction.COMPLETE)]
+    updated_docs = {}
+    if updated_ids:
+        docs = await db[target.value].find({"id": {"$in": updated_ids}}, {"_id": 0}).to_list(None)
+        updated_docs = {doc["id"]: doc for doc in docs}
+    # previous is the state before the batch (or at creation within it),
+    # so repeated updates to one document collapse into a single event
+    updated_seen = set()
+    for op, document in applied:
+        if op.action == BatchAction.CREATE:
+            changes.append(change_event(kind, "created", document["id"], document))
+        elif op.action == BatchAction.DELETE:
+            changes.append(change_event(kind, "deleted", op.id, previous=previous[op.id]))
+        elif op.id in updated_docs and op.id not in updated_seen:
+            updated_seen.add(op.id)
+            changes.append(change_event(kind, "updated", op.id, updated_docs[op.id], previous=previous[op.id]))
+
+@api_router.post("/users/{user_id}/batch")
+async def batch_mutate(user_id: str, batch: BatchRequest):
+    # Verify user exists
+    user = await db.users.find_one({"id": user_id}, {"_id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Resolve which referenced ids exist and belong to this user, keeping the
+    # fields the stats deltas need from their current state
+    existing_docs = {}
+    for target in BatchTarget:
+        ids = [op.id for op in batch.operations if op.target == target and op.id and op.action != BatchAction.CREATE]
+        existing_docs[target] = {}
+        if ids:
+            docs = await db[target.value].find(
+                {"id": {"$in": ids}, "user_id": user_id}, {"_id": 0, "id": 1, "completed": 1, "due_date": 1}
+            ).to_list(None)
+            existing_docs[target] = {doc["id"]: doc for doc in docs}
+    
+    results = [None] * len(batch.operations)
+    pending = {target: [] for target in BatchTarget}  # (operation index, write model)
+    for index, operation in enumerate(batch.operations):
+        try:
+            write, doc_id, document = _batch_write(user_id, operation, existing_docs[operation.target].keys())
+        except (ValueError, LookupError) as e:
+            # ValidationError is a ValueError; report its messages compactly
+            detail = "; ".join(err["msg"] for err in e.errors()) if isinstance(e, ValidationError) else str(e)
+            results[index] = {"index": index, "status": "error", "error": detail}
+            if batch.ordered:
+                break
+            continue
+        results[index] = {"index": index, "status": "ok", "id": doc_id}
+        pending[operation.target].append((index, write, document))
+        if operation.action == BatchAction.CREATE:
+            # Later operations in the same batch may refer to the new document
+            existing_docs[operation.target][doc_id] = document
+    
+    changes = []
+    try:
+        for target, writes in pending.items():
+            if not writes:
+                continue
+            await apply_batch_writes(target, writes, batch, results, existing_docs[target], changes)
+    finally:
+        # Writes that already went through are published even if a later
+        # collection's bulk_write failed outright
+        if changes:
+            await record_user_change(user_id, changes)
+    
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = {"index": index, "status": "skipped"}
+    
+    return {
+        "results": results,
+        "succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "failed": sum(1 for result in results if result["status"] == "error"),
+        "skipped": sum(1 for result in results if result["status"] == "skipped")
+    }
+
 # Calendar data endpoint
+# Each list is read in date order and capped at CALENDAR_LIMIT; `truncated`
+# tells the client to ask for a narrower start_date/end_date window.
+CALENDAR_LIMIT = 2000
+
 @api_router.get("/users/{user_id}/calendar")
-async def get_calendar_data(user_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
+async def get_calendar_data(
+    request: Request,
+    user_id: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    version = await get_data_version(user_id)
+    etag = data_etag(user_id, version, "calendar") if version is not None else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    
     query = {"user_id": user_id}
     
     # Add date filtering if provided
@@ -728,57 +2820,1163 @@ async def get_calendar_data(user_id: str, start_date: Optional[str] = None, end_
         
         # Get tasks in date range
         task_query = {**query, "due_date": {"$gte": start_dt, "$lte": end_dt}}
-        # Get activities in date range
-        activity_query = {**query, "start_datetime": {"$gte": start_dt, "$lte": end_dt}}
+        # Get activities in date range, plus recurring series that started before it
+        activity_query = {**query, "$or": [
+            {"start_datetime": {"$gte": start_dt, "$lte": end_dt}},
+            {"recurrence": {"$type": "object"}, "start_datetime": {"$lte": end_dt}}
+        ]}
     else:
         task_query = query
         activity_query = query
     
-    tasks = await db.tasks.find(task_query).to_list(1000)
-    activities = await db.activities.find(activity_query).to_list(1000)
+    tasks = await db.tasks.find(task_query, TASK_PROJECTION).sort(
+        [("due_date", ASCENDING), ("id", ASCENDING)]
+    ).limit(CALENDAR_LIMIT + 1).to_list(CALENDAR_LIMIT + 1)
+    activities_data = await db.activities.find(activity_query, ACTIVITY_PROJECTION).sort(
+        [("start_datetime", ASCENDING), ("id", ASCENDING)]
+    ).limit(CALENDAR_LIMIT + 1).to_list(CALENDAR_LIMIT + 1)
+    truncated = len(tasks) > CALENDAR_LIMIT or len(activities_data) > CALENDAR_LIMIT
+    tasks, activities_data = tasks[:CALENDAR_LIMIT], activities_data[:CALENDAR_LIMIT]
     
-    return {
-        "tasks": [Task(**task) for task in tasks],
-        "activities": [Activity(**activity) for activity in activities]
-    }
+    activities = []
+    for activity in activities_data:
+        activity = hydrate(activity, ACTIVITY_READ_FIELDS)
+        if start_date and end_date and activity["recurrence"]:
+            for occurrence_start, occurrence_end in expand_activity(activity, start_dt, end_dt):
+                activities.append({
+                    **activity,
+                    "start_datetime": occurrence_start,
+                    "end_datetime": occurrence_end
+                })
+        else:
+            activities.append(activity)
+    
+    return FastJSONResponse({
+        "tasks": [hydrate(task, TASK_READ_FIELDS) for task in tasks],
+        "activities": activities,
+        "truncated": truncated
+    }, headers=cache_headers(etag))
 
-# Dashboard stats endpoint
-@api_router.get("/users/{user_id}/stats")
-async def get_user_stats(user_id: str):
-    # Get task statistics
-    total_tasks = await db.tasks.count_documents({"user_id": user_id})
-    completed_tasks = await db.tasks.count_documents({"user_id": user_id, "completed": True})
-    pending_tasks = total_tasks - completed_tasks
+# Delta sync endpoint
+# Returns what changed after `since` (the next_since of a previous call).
+# Timestamps come from several app servers, so each query reaches back
+# SYNC_OVERLAP before `since`; clients upsert by id, so repeats are harmless.
+# A client that is too far behind is told to do a full reload instead.
+SYNC_OVERLAP = timedelta(seconds=5)
+SYNC_LIMIT = 2000
+
+@api_router.get("/users/{user_id}/changes")
+async def get_user_changes(user_id: str, since: str):
+    try:
+        since_dt = _as_naive_utc(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be an ISO datetime")
     
-    # Get overdue tasks
     now = datetime.utcnow()
-    overdue_tasks = await db.tasks.count_documents({
-        "user_id": user_id,
-        "completed": False,
-        "due_date": {"$lt": now}
+    if since_dt < now - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+        return {"full_resync": True, "next_since": now}
+    
+    lower = since_dt - SYNC_OVERLAP
+    tasks, activities, tombstones = await asyncio.gather(
+        db.tasks.find(
+            {"user_id": user_id, "updated_at": {"$gt": lower}}, TASK_PROJECTION
+        ).sort("updated_at", ASCENDING).limit(SYNC_LIMIT + 1).to_list(SYNC_LIMIT + 1),
+        db.activities.find(
+            {"user_id": user_id, "updated_at": {"$gt": lower}}, ACTIVITY_PROJECTION
+        ).sort("updated_at", ASCENDING).limit(SYNC_LIMIT + 1).to_list(SYNC_LIMIT + 1),
+        db.tombstones.find(
+            {"user_id": user_id, "deleted_at": {"$gt": lower}}, {"_id": 0, "user_id": 0}
+        ).sort("deleted_at", ASCENDING).limit(SYNC_LIMIT + 1).to_list(SYNC_LIMIT + 1)
+    )
+    if max(len(tasks), len(activities), len(tombstones)) > SYNC_LIMIT:
+        return {"full_resync": True, "next_since": now}
+    
+    return FastJSONResponse({
+        "full_resync": False,
+        "next_since": now,
+        "tasks": [hydrate(task, TASK_READ_FIELDS) for task in tasks],
+        "activities": [hydrate(activity, ACTIVITY_READ_FIELDS) for activity in activities],
+        "deleted": tombstones
     })
+
+# Conflicts endpoint
+@api_router.get("/users/{user_id}/conflicts")
+async def get_activity_conflicts(user_id: str, start: str, end: str):
+    try:
+        start_dt = _as_naive_utc(start)
+        end_dt = _as_naive_utc(end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO datetimes")
+    if end_dt <= start_dt or end_dt - start_dt > MAX_CONFLICT_WINDOW:
+        raise HTTPException(status_code=400, detail="end must be after start and within 366 days of it")
     
-    # Get upcoming tasks (next 7 days)
-    from datetime import timedelta
-    week_from_now = now + timedelta(days=7)
-    upcoming_tasks = await db.tasks.count_documents({
-        "user_id": user_id,
-        "completed": False,
-        "due_date": {"$gte": now, "$lte": week_from_now}
+    busy = await load_busy_intervals(user_id, start_dt, end_dt)
+    conflicts = [
+        {
+            "first": first[2],
+            "second": second[2],
+            "overlap_start": max(first[0], second[0]),
+            "overlap_end": min(first[1], second[1])
+        }
+        for first, second in overlapping_pairs(busy)
+    ]
+    return {"conflicts": conflicts}
+
+# Dashboard stats endpoint
+@api_router.get("/users/{user_id}/stats")
+async def get_user_stats(request: Request, user_id: str):
+    version = await get_data_version(user_id)
+    etag = None
+    if version is not None:
+        time_window = int(datetime.utcnow().timestamp() // STATS_ETAG_WINDOW)
+        etag = data_etag(user_id, version, "stats", time_window)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    stats = await load_user_stats(user_id)
+    return FastJSONResponse(stats, headers=cache_headers(etag))
+
+# Analytics endpoint
+# Tasks are read through an aggregation projection, batch by batch, into one
+# numpy array per field; every metric is then a vectorized binning (np.bincount) over those
+# columns. Cohort mode runs the same computation over every user in a
+# year level and is cached in-process, since it scans many users' tasks.
+ANALYTICS_BATCH_SIZE = 5000
+ANALYTICS_DEFAULT_MINUTES = 60  # workload of a task without estimated_duration
+MAX_ANALYTICS_WEEKS = 52
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+HOUR = np.timedelta64(1, "h")
+
+cohort_analytics_cache = TTLCache(
+    maxsize=64,
+    ttl=float(os.environ.get("COHORT_ANALYTICS_TTL", "600"))
+)
+
+ANALYTICS_COLUMNS = {
+    # column: (dtype, projection that fills the default in Mongo)
+    "subject": (object, {"$ifNull": ["$subject", ""]}),
+    "due": ("datetime64[ms]", "$due_date"),
+    "completed": (bool, {"$ifNull": ["$completed", False]}),
+    # missing completed_at becomes NaT
+    "completed_at": ("datetime64[ms]", {"$ifNull": ["$completed_at", None]}),
+    "minutes": (np.float64, {
+        "$cond": [{"$gt": ["$estimated_duration", 0]}, "$estimated_duration", ANALYTICS_DEFAULT_MINUTES]
     })
+}
+
+async def load_task_columns(query: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    # Only one batch of documents is held at a time; each becomes a slice of
+    # every column and the slices are joined once at the end
+    cursor = db.tasks.aggregate([
+        {"$match": query},
+        {"$project": {"_id": 0, **{name: spec for name, (_, spec) in ANALYTICS_COLUMNS.items()}}}
+    ], batchSize=ANALYTICS_BATCH_SIZE)
+    chunks = {name: [np.array([], dtype=dtype)] for name, (dtype, _) in ANALYTICS_COLUMNS.items()}
+    while True:
+        docs = await cursor.to_list(ANALYTICS_BATCH_SIZE)
+        if not docs:
+            break
+        for name, (dtype, _) in ANALYTICS_COLUMNS.items():
+            chunks[name].append(np.array([doc[name] for doc in docs], dtype=dtype))
+    return {name: np.concatenate(parts) for name, parts in chunks.items()}
+
+def _rates(numerators: np.ndarray, denominators: np.ndarray) -> List[Optional[float]]:
+    rates = np.divide(numerators, denominators, out=np.zeros(len(numerators)), where=denominators > 0)
+    return [round(rate, 4) if total else None for rate, total in zip(rates.tolist(), denominators.tolist())]
+
+def compute_task_analytics(columns: Dict[str, np.ndarray], start: datetime, weeks: int, tz_offset: int):
+    # start is the local Monday 00:00 the window begins on, expressed in UTC
+    offset = np.timedelta64(tz_offset, "m")
+    local_due = columns["due"] + offset
+    local_start = np.datetime64(start, "ms") + offset
+
+    # Weekday x hour workload; 1970-01-01 was a Thursday, hence the +3
+    days = local_due.astype("datetime64[D]").astype(np.int64)
+    weekday = (days + 3) % 7
+    hour = (local_due - local_due.astype("datetime64[D]")) // HOUR
+    slot = weekday * 24 + hour
+    workload = np.bincount(slot, weights=columns["minutes"], minlength=7 * 24).reshape(7, 24)
+    task_counts = np.bincount(slot, minlength=7 * 24).reshape(7, 24)
+
+    # Completion rate per subject per week of due date
+    subjects, subject_index = np.unique(columns["subject"], return_inverse=True)
+    week = ((local_due - local_start) // np.timedelta64(7, "D")).astype(np.int64)
+    week = np.clip(week, 0, weeks - 1)
+    cell = subject_index * weeks + week
+    totals = np.bincount(cell, minlength=len(subjects) * weeks).reshape(len(subjects), weeks)
+    completed = np.bincount(
+        cell, weights=columns["completed"], minlength=len(subjects) * weeks
+    ).reshape(len(subjects), weeks)
+
+    # Lateness of completed tasks, in hours; negative means early
+    done = columns["completed"] & ~np.isnat(columns["completed_at"])
+    lateness = (columns["completed_at"][done] - columns["due"][done]) / HOUR
+    done_subjects = subject_index[done]
+    late_sum = np.bincount(done_subjects, weights=lateness, minlength=len(subjects))
+    done_count = np.bincount(done_subjects, minlength=len(subjects))
+    late_by_subject = _rates(late_sum, done_count)
+
+    week_starts = local_start + np.arange(weeks) * np.timedelta64(7, "D")
+    return {
+        "task_count": int(len(columns["due"])),
+        "heatmap": {
+            "weekdays": list(WEEKDAYS),
+            "hours": list(range(24)),
+            "workload_minutes": workload.round(1).tolist(),
+            "task_counts": task_counts.tolist()
+        },
+        "completion": {
+            "weeks": [str(week_start.astype("datetime64[D]")) for week_start in week_starts],
+            "subjects": {
+                subject: {
+                    "rates": _rates(completed[i], totals[i]),
+                    "completed": completed[i].astype(np.int64).tolist(),
+                    "total": totals[i].tolist()
+                }
+                for i, subject in enumerate(subjects.tolist())
+            }
+        },
+        "lateness": {
+            "completed_tasks": int(done.sum()),
+            "average_hours": round(float(lateness.mean()), 2) if len(lateness) else None,
+            "median_hours": round(float(np.median(lateness)), 2) if len(lateness) else None,
+            "late_share": round(float((lateness > 0).mean()), 4) if len(lateness) else None,
+            "by_subject_average_hours": {
+                subject: late_by_subject[i] for i, subject in enumerate(subjects.tolist()) if done_count[i]
+            }
+        }
+    }
+
+def analytics_window(weeks: int, tz_offset: int):
+    # From the local Monday `weeks - 1` weeks before this one, up to now
+    now = datetime.utcnow()
+    local_today = (now + timedelta(minutes=tz_offset)).date()
+    monday = local_today - timedelta(days=local_today.weekday() + 7 * (weeks - 1))
+    start = datetime.combine(monday, time.min) - timedelta(minutes=tz_offset)
+    return start, now
+
+@api_router.get("/users/{user_id}/analytics")
+async def get_user_analytics(
+    request: Request,
+    user_id: str,
+    weeks: int = Query(12, ge=1, le=MAX_ANALYTICS_WEEKS),
+    tz_offset: int = Query(0, ge=-14 * 60, le=14 * 60),  # minutes east of UTC
+    cohort: bool = False
+):
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "year_level": 1, "data_version": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    start, end = analytics_window(weeks, tz_offset)
     
-    # Get activities count
-    total_activities = await db.activities.count_documents({"user_id": user_id})
+    if cohort:
+        cache_key = (user["year_level"], weeks, tz_offset, start)
+        result = cohort_analytics_cache.get(cache_key)
+        if result is None:
+            user_ids = await db.users.distinct("id", {"year_level": user["year_level"]})
+            columns = await load_task_columns(
+                {"user_id": {"$in": user_ids}, "due_date": {"$gte": start, "$lt": end}}
+            )
+            result = {
+                "scope": "cohort",
+                "year_level": user["year_level"],
+                "users": len(user_ids),
+                **compute_task_analytics(columns, start, weeks, tz_offset)
+            }
+            cohort_analytics_cache.set(cache_key, result)
+        return FastJSONResponse(result)
     
+    # Same data version and hour: same answer
+    etag = data_etag(
+        user_id, user.get("data_version", 0), "analytics", weeks, tz_offset, int(end.timestamp() // 3600)
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    columns = await load_task_columns({"user_id": user_id, "due_date": {"$gte": start, "$lt": end}})
+    return FastJSONResponse({
+        "scope": "user",
+        "year_level": user["year_level"],
+        **compute_task_analytics(columns, start, weeks, tz_offset)
+    }, headers=cache_headers(etag))
+
+# Schedule endpoint
+# Proposes study blocks for pending tasks. Busy time (activity occurrences,
+# recurrences expanded, plus the hours outside the study day) is merged with
+# a sweep over intervals sorted by start; the gaps left are the free slots.
+# Tasks are then packed earliest-deadline-first (higher priority first on
+# equal deadlines) into the earliest free time, splitting across slots.
+# Because deadlines only increase, the free-slot cursor only moves forward,
+# so planning is O(tasks + slots) after sorting.
+SCHEDULE_DEFAULT_MINUTES = 60  # work assumed for tasks without estimated_duration
+SCHEDULE_TASK_LIMIT = 5000
+MAX_SCHEDULE_WINDOW = timedelta(days=92)
+
+def merge_intervals(intervals: List[tuple]) -> List[List[datetime]]:
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+def off_hours(window_start: datetime, window_end: datetime, day_start: int, day_end: int,
+              tz_offset: int) -> List[tuple]:
+    # Each local night from day_end to the next day_start, in UTC
+    if day_start == 0 and day_end == 24:
+        return []
+    offset = timedelta(minutes=tz_offset)
+    day = (window_start + offset).date() - timedelta(days=1)
+    last_day = (window_end + offset).date()
+    blocks = []
+    while day <= last_day:
+        midnight = datetime.combine(day, time.min) - offset
+        blocks.append((midnight + timedelta(hours=day_end), midnight + timedelta(days=1, hours=day_start)))
+        day += timedelta(days=1)
+    return blocks
+
+def free_slots(busy: List[tuple], window_start: datetime, window_end: datetime,
+               min_block: timedelta) -> List[List[datetime]]:
+    slots = []
+    cursor = window_start
+    for start, end in merge_intervals(busy):
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start - cursor >= min_block:
+            slots.append([cursor, start])
+        cursor = max(cursor, end)
+    if window_end - cursor >= min_block:
+        slots.append([cursor, window_end])
+    return slots
+
+def plan_schedule(tasks: List[Dict[str, Any]], slots: List[List[datetime]], window_start: datetime,
+                  window_end: datetime, min_block: timedelta) -> Dict[str, Any]:
+    # tasks: pending task docs; slots: free [start, end] pairs, consumed in place
+    order = sorted(tasks, key=lambda task: (task["due_date"], -task.get("priority_rank", 2)))
+    blocks, planned = [], []
+    slot_index = 0
+    for task in order:
+        required = timedelta(minutes=task.get("estimated_duration") or SCHEDULE_DEFAULT_MINUTES)
+        remaining = required
+        # Overdue tasks sort first and are still worth doing as soon as possible
+        overdue = task["due_date"] <= window_start
+        deadline = window_end if overdue else min(task["due_date"], window_end)
+        finishes_at = None
+        index = slot_index
+        while remaining and index < len(slots) and slots[index][0] < deadline:
+            slot = slots[index]
+            end = min(slot[1], deadline, slot[0] + remaining)
+            if end - slot[0] < min(min_block, remaining):
+                # Only a sliver is left before the deadline
+                break
+            blocks.append({
+                "task_id": task["id"],
+                "title": task["title"],
+                "subject": task["subject"],
+                "start": slot[0],
+                "end": end,
+                "minutes": int((end - slot[0]).total_seconds() // 60)
+            })
+            remaining -= end - slot[0]
+            finishes_at = end
+            slot[0] = end
+            if slot[1] - slot[0] < min_block:
+                index += 1
+        # Everything before the first slot with room left is used up for good
+        while slot_index < len(slots) and slots[slot_index][1] - slots[slot_index][0] < min_block:
+            slot_index += 1
+        planned.append({
+            "task_id": task["id"],
+            "due_date": task["due_date"],
+            "required_minutes": int(required.total_seconds() // 60),
+            "scheduled_minutes": int((required - remaining).total_seconds() // 60),
+            "status": "scheduled" if not remaining else "partial" if remaining < required else "unscheduled",
+            "overdue": overdue,
+            "finishes_at": finishes_at
+        })
+    blocks.sort(key=lambda block: block["start"])
+    return {"blocks": blocks, "tasks": planned}
+
+async def build_schedule(user_id: str, window_start: datetime, window_end: datetime, day_start: int = 8,
+                         day_end: int = 22, tz_offset: int = 0, min_block: int = 15) -> Dict[str, Any]:
+    min_block_delta = timedelta(minutes=min_block)
+    intervals, tasks = await asyncio.gather(
+        load_busy_intervals(user_id, window_start, window_end),
+        db.tasks.find(
+            {"user_id": user_id, "completed": False},
+            {"_id": 0, "id": 1, "title": 1, "subject": 1, "due_date": 1, "estimated_duration": 1, "priority_rank": 1}
+        ).sort("due_date", ASCENDING).limit(SCHEDULE_TASK_LIMIT).to_list(SCHEDULE_TASK_LIMIT)
+    )
+    busy = [(start, end) for start, end, _ in intervals]
+    busy.extend(off_hours(window_start, window_end, day_start, day_end, tz_offset))
+    slots = free_slots(busy, window_start, window_end, min_block_delta)
+    free_minutes = sum((end - start).total_seconds() for start, end in slots) // 60
+    plan = plan_schedule(tasks, slots, window_start, window_end, min_block_delta)
     return {
-        "total_tasks": total_tasks,
-        "completed_tasks": completed_tasks,
-        "pending_tasks": pending_tasks,
-        "overdue_tasks": overdue_tasks,
-        "upcoming_tasks": upcoming_tasks,
-        "total_activities": total_activities
+        "start": window_start,
+        "end": window_end,
+        "busy_intervals": len(intervals),
+        "free_minutes": int(free_minutes),
+        "free_minutes_remaining": int(sum((end - start).total_seconds() for start, end in slots) // 60),
+        **plan
     }
 
+@api_router.get("/users/{user_id}/schedule")
+async def get_user_schedule(
+    user_id: str,
+    start: str,
+    end: str,
+    day_start: int = Query(8, ge=0, le=23),  # local study day, hours
+    day_end: int = Query(22, ge=1, le=24),
+    tz_offset: int = Query(0, ge=-14 * 60, le=14 * 60),  # minutes east of UTC
+    min_block: int = Query(15, ge=5, le=240)  # minutes
+):
+    try:
+        start_dt = _as_naive_utc(start)
+        end_dt = _as_naive_utc(end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO datetimes")
+    if day_end <= day_start:
+        raise HTTPException(status_code=400, detail="day_end must be after day_start")
+    # Never propose time that has already passed
+    start_dt = max(start_dt, datetime.utcnow().replace(second=0, microsecond=0))
+    if end_dt <= start_dt or end_dt - start_dt > MAX_SCHEDULE_WINDOW:
+        raise HTTPException(status_code=400, detail="end must be in the future and within 92 days of start")
+    
+    schedule = await build_schedule(user_id, start_dt, end_dt, day_start, day_end, tz_offset, min_block)
+    return FastJSONResponse(schedule)
+
+# Import
+# ICS (VEVENT -> activity, VTODO -> task) and CSV files are parsed as a
+# stream of lines. Rows are validated in batches of IMPORT_BATCH_SIZE on a
+# worker thread, deduplicated against the user's existing items by content
+# hash, and written with unordered insert_many, so memory is bounded by the
+# batch size rather than the file size.
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 100  # error details kept in the summary; all are counted
+IMPORT_MAX_BYTES = int(os.environ.get("IMPORT_MAX_BYTES", str(1024 * 1024 * 1024)))
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024  # request bodies beyond this spool to disk
+IMPORT_DEFAULT_SUBJECT = "General"
+ICS_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+ICS_FREQUENCIES = {"DAILY": "daily", "WEEKLY": "weekly", "MONTHLY": "monthly"}
+ICS_MULTI_PROPERTIES = {"EXDATE", "RDATE"}  # may appear more than once
+ICS_MAX_COUNT = 10000  # RRULE COUNT is expanded to find the series end
+ICS_RRULE_PARTS = {"FREQ", "INTERVAL", "BYDAY", "BYMONTHDAY", "BYSETPOS", "UNTIL", "COUNT", "WKST"}
+ICS_DURATION = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+TASK_HASH_FIELDS = ("title", "subject", "task_type", "due_date", "description")
+ACTIVITY_HASH_FIELDS = ("title", "activity_type", "start_datetime", "end_datetime", "location", "recurrence")
+
+def iter_unfolded_lines(lines):
+    # Content lines may be folded onto continuation lines starting with a space or tab
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if current is not None and line[:1] in (" ", "\t"):
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+def parse_ics_line(line: str) -> tuple:
+    # NAME;PARAM=VALUE;PARAM="quoted:value":content
+    quoted = False
+    for position, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ":" and not quoted:
+            head, value = line[:position], line[position + 1:]
+            break
+    else:
+        raise ValueError(f"Malformed content line: {line[:80]}")
+    name, *params = head.split(";")
+    return name.upper(), {
+        key.upper(): param_value.strip('"') for key, _, param_value in (param.partition("=") for param in params)
+    }, value
+
+def ics_text(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return re.sub(r"\\([\\,;nN])", lambda match: "\n" if match.group(1) in "nN" else match.group(1), value)
+
+def parse_ics_datetime(value: str, params: Dict[str, str]) -> datetime:
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d")
+    if value.endswith("Z"):
+        return datetime.strptime(value, "%Y%m%dT%H%M%SZ")
+    local = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    if "TZID" not in params:
+        return local  # floating time, taken as UTC
+    try:
+        zone = ZoneInfo(params["TZID"])
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone {params['TZID']!r}")
+    return local.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+def parse_ics_duration(value: str) -> timedelta:
+    match = ICS_DURATION.match(value)
+    if not match:
+        raise ValueError(f"Malformed duration {value!r}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+        minutes=int(minutes or 0), seconds=int(seconds or 0)
+    )
+    return -duration if sign == "-" else duration
+
+def parse_rrule(value: str, series_start: datetime, local_start: Optional[datetime] = None,
+                start_params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    # Maps the RRULE subset RecurrencePattern can express; anything else is
+    # rejected rather than expanded wrongly. series_start is DTSTART in UTC,
+    # where occurrences are expanded; local_start is DTSTART in its TZID.
+    local_start = local_start or series_start
+    parts = dict(part.partition("=")[::2] for part in value.upper().split(";") if part)
+    unsupported = set(parts) - ICS_RRULE_PARTS
+    if unsupported:
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(unsupported))}")
+    frequency = ICS_FREQUENCIES.get(parts.get("FREQ"))
+    if frequency is None:
+        raise ValueError(f"Unsupported RRULE frequency {parts.get('FREQ')!r}")
+    pattern = {"frequency": frequency, "interval": int(parts.get("INTERVAL") or 1)}
+    if "BYDAY" in parts:
+        try:
+            days = {ICS_WEEKDAYS[day] for day in parts["BYDAY"].split(",")}
+        except KeyError:
+            raise ValueError(f"Unsupported RRULE BYDAY {parts['BYDAY']!r}")
+        if frequency == "monthly" or (frequency == "daily" and pattern["interval"] != 1):
+            raise ValueError("RRULE BYDAY is only supported for weekly and every-day rules")
+        # BYDAY names local weekdays; expansion runs in UTC, where the start
+        # may fall on the previous or next day
+        shift = (series_start.date() - local_start.date()).days
+        # Every day on some weekdays is the weekly rule on those days
+        pattern.update(frequency="weekly", days_of_week=sorted((day + shift) % 7 for day in days))
+    if "BYMONTHDAY" in parts or "BYSETPOS" in parts:
+        # Only the start day, or the last of 28..start day as the calendar
+        # feed writes it, matches how monthly series clamp to short months
+        month_days = parts.get("BYMONTHDAY", str(local_start.day)).split(",")
+        clamped = month_days == [str(day) for day in range(28, local_start.day + 1)] and parts.get("BYSETPOS") == "-1"
+        if frequency != "monthly" or not (month_days == [str(local_start.day)] or clamped):
+            raise ValueError("RRULE BYMONTHDAY must be the day of DTSTART")
+    if "UNTIL" in parts:
+        until = parts["UNTIL"]
+        if len(until) == 8:
+            pattern["end_date"] = parse_ics_datetime(until, {}).date()  # the whole day is included
+        else:
+            # A floating UNTIL is in DTSTART's time zone
+            pattern["end_date"] = parse_ics_datetime(until, {} if until.endswith("Z") else start_params or {})
+    elif "COUNT" in parts:
+        count = int(parts["COUNT"])
+        if not 1 <= count <= ICS_MAX_COUNT:
+            raise ValueError(f"RRULE COUNT must be between 1 and {ICS_MAX_COUNT}")
+        last = None
+        for last in islice(iter_occurrence_starts(series_start, pattern, series_start, datetime.max), count):
+            pass
+        pattern["end_date"] = last or series_start
+    return pattern
+
+def check_recurrence_exceptions(props: Dict[str, Any], start: datetime, recurrence: Optional[Dict[str, Any]]):
+    # RecurrencePattern has no exception dates. An EXDATE is accepted only
+    # when it removes nothing, like the DTSTART the calendar feed excludes
+    # for weekly series that don't run on their start weekday.
+    if "RDATE" in props:
+        raise ValueError("RDATE is not supported")
+    for params, value in props.get("EXDATE", ()):
+        for item in value.split(","):
+            excluded = parse_ics_datetime(item, params)
+            if recurrence is None:
+                removes = excluded == start
+            else:
+                removes = any(True for _ in iter_occurrence_starts(start, recurrence, excluded, excluded))
+            if removes:
+                raise ValueError("EXDATE exceptions to a recurring series are not supported")
+
+def iter_ics_records(lines):
+    # Yields (kind, fields, line number) per VEVENT/VTODO; nested components
+    # such as VALARM are skipped. Unparseable items yield their ValueError.
+    component = None
+    nested = 0
+    for line_number, line in enumerate(iter_unfolded_lines(lines), 1):
+        try:
+            name, params, value = parse_ics_line(line)
+        except ValueError:
+            if component is not None:
+                component["error"] = f"Malformed content line: {line[:80]}"
+            continue
+        if component is None:
+            if name == "BEGIN" and value.upper() in ("VEVENT", "VTODO"):
+                component = {"type": value.upper(), "line": line_number, "props": {}}
+            continue
+        if name == "BEGIN":
+            nested += 1
+        elif name == "END" and nested:
+            nested -= 1
+        elif name == "END":
+            kind = "activity" if component["type"] == "VEVENT" else "task"
+            try:
+                if "error" in component:
+                    raise ValueError(component["error"])
+                fields = ics_fields(kind, component["props"])
+            except ValueError as e:
+                fields = e  # reported by build_import_document with the item's position
+            yield kind, fields, component["line"]
+            component = None
+        elif not nested and name in ICS_MULTI_PROPERTIES:
+            component["props"].setdefault(name, []).append((params, value))
+        elif not nested:
+            component["props"].setdefault(name, (params, value))
+
+def ics_fields(kind: str, props: Dict[str, tuple]) -> Dict[str, Any]:
+    def text(name):
+        return ics_text(props[name][1]) if name in props else None
+
+    categories = [c.strip().lower() for c in (text("CATEGORIES") or "").split(",") if c.strip()]
+    if kind == "activity":
+        if "DTSTART" not in props:
+            raise ValueError("VEVENT has no DTSTART")
+        start_params, start_value = props["DTSTART"]
+        start = parse_ics_datetime(start_value, start_params)
+        all_day = start_params.get("VALUE") == "DATE" or len(start_value) == 8
+        if "DTEND" in props:
+            end = parse_ics_datetime(props["DTEND"][1], props["DTEND"][0])
+        elif "DURATION" in props:
+            end = start + parse_ics_duration(props["DURATION"][1])
+        else:
+            end = start + timedelta(days=1) if all_day else start
+        recurrence = None
+        if "RRULE" in props:
+            local_start = parse_ics_datetime(start_value, {k: v for k, v in start_params.items() if k != "TZID"})
+            recurrence = parse_rrule(props["RRULE"][1], start, local_start, start_params)
+        check_recurrence_exceptions(props, start, recurrence)
+        activity_types = {member.value for member in ActivityType}
+        return {
+            "title": text("SUMMARY") or "Untitled event",
+            "description": text("DESCRIPTION"),
+            "location": text("LOCATION"),
+            "activity_type": next((c for c in categories if c in activity_types), ActivityType.EVENT.value),
+            "start_datetime": start,
+            "end_datetime": end,
+            "recurrence": recurrence
+        }
+
+    due_prop = props.get("DUE") or props.get("DTSTART")
+    if due_prop is None:
+        raise ValueError("VTODO has no DUE or DTSTART")
+    due = parse_ics_datetime(due_prop[1], due_prop[0])
+    if due_prop[0].get("VALUE") == "DATE" or len(due_prop[1]) == 8:
+        due = due.replace(hour=23, minute=59)  # same default as the task form
+    priority = int(props["PRIORITY"][1]) if "PRIORITY" in props else 0
+    task_types = {member.value for member in TaskType}
+    fields = {
+        "title": text("SUMMARY") or "Untitled task",
+        "description": text("DESCRIPTION"),
+        "subject": next((c.title() for c in categories if c not in task_types), IMPORT_DEFAULT_SUBJECT),
+        "task_type": next((c for c in categories if c in task_types), TaskType.ASSIGNMENT.value),
+        # RFC 5545: 1-4 high, 5 medium, 6-9 low, 0 undefined
+        "priority": "high" if 1 <= priority <= 4 else "low" if priority >= 6 else "medium",
+        "due_date": due,
+        "estimated_duration": (
+            int(parse_ics_duration(props["DURATION"][1]).total_seconds() // 60) if "DURATION" in props else None
+        ),
+        "completed": (text("STATUS") or "").upper() == "COMPLETED"
+    }
+    if fields["completed"] and "COMPLETED" in props:
+        fields["completed_at"] = parse_ics_datetime(props["COMPLETED"][1], props["COMPLETED"][0])
+    return fields
+
+def iter_csv_records(lines, kind: Optional[str] = None):
+    # One item per row. Columns are model field names; a "type" column
+    # (task/activity) overrides `kind`. Recurring activities use frequency,
+    # interval, days_of_week (e.g. "0;2" or "MO;WE") and end_date columns.
+    reader = csv.DictReader(lines)
+    for row in reader:
+        fields = {key.strip().lower(): value.strip() for key, value in row.items() if key and value and value.strip()}
+        row_kind = (fields.pop("type", None) or kind or "").lower().rstrip("s").replace("activitie", "activity")
+        if "frequency" in fields:
+            days = fields.pop("days_of_week", None)
+            fields["recurrence"] = {
+                "frequency": fields.pop("frequency").lower(),
+                "interval": fields.pop("interval", 1),
+                "days_of_week": [
+                    ICS_WEEKDAYS[day.upper()] if day.upper() in ICS_WEEKDAYS else int(day)
+                    for day in re.split(r"[;\s]+", days) if day
+                ] if days else None,
+                "end_date": fields.pop("end_date", None)
+            }
+        if "completed" in fields:
+            fields["completed"] = fields["completed"].lower() in ("1", "true", "yes", "y", "x")
+        yield row_kind, fields, reader.line_num
+
+def _hash_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # MongoDB keeps milliseconds
+        return value.replace(microsecond=value.microsecond // 1000 * 1000).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        end_date = value.get("end_date")
+        return {
+            **{key: _hash_value(item) for key, item in value.items()},
+            # A date end is stored as the end of that day
+            "end_date": _hash_value(_as_naive_utc(end_date)) if end_date is not None else None
+        }
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def content_hash(kind: str, doc: Dict[str, Any]) -> str:
+    fields = TASK_HASH_FIELDS if kind == "task" else ACTIVITY_HASH_FIELDS
+    payload = [kind, *(_hash_value(doc.get(field)) for field in fields)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def build_import_document(user_id: str, kind: str, fields: Any) -> Dict[str, Any]:
+    if isinstance(fields, Exception):
+        raise fields
+    if kind == "task":
+        fields = dict(fields)
+        completed = fields.pop("completed", False)
+        completed_at = fields.pop("completed_at", None)
+        doc = Task(user_id=user_id, **TaskCreate(**fields).dict()).dict()
+        doc["due_date"] = _as_naive_utc(doc["due_date"])
+        doc["priority_rank"] = priority_rank(doc["priority"])
+        if completed:
+            doc["completed"] = True
+            doc["completed_at"] = _as_naive_utc(completed_at) or doc["created_at"]
+    elif kind == "activity":
+        doc = Activity(user_id=user_id, **ActivityCreate(**fields).dict()).dict()
+        doc["start_datetime"] = _as_naive_utc(doc["start_datetime"])
+        doc["end_datetime"] = _as_naive_utc(doc["end_datetime"])
+        if doc["end_datetime"] < doc["start_datetime"]:
+            raise ValueError("end_datetime is before start_datetime")
+    else:
+        raise ValueError(f"Unknown item type {kind!r}; expected task or activity")
+    return encode_item_dates(doc)
+
+def parse_import_batch(user_id: str, records, batch_size: int) -> Optional[tuple]:
+    # Runs on a worker thread: pulls the next batch off the parser and
+    # validates it; returns None once the input is exhausted
+    batch = list(islice(records, batch_size))
+    if not batch:
+        return None
+    docs = {"task": [], "activity": []}
+    errors = []
+    for kind, fields, position in batch:
+        try:
+            doc = build_import_document(user_id, kind, fields)
+        except (ValueError, TypeError) as e:
+            # ValidationError is a ValueError; report its messages compactly
+            detail = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+            ) if isinstance(e, ValidationError) else str(e)
+            errors.append({"position": position, "error": detail})
+            continue
+        docs[kind].append(doc)
+    return len(batch), docs, errors
+
+async def drop_existing_duplicates(user_id: str, kind: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Candidates share the indexed date field; their hashes are computed the
+    # same way, so items created by hand are matched too
+    collection, date_field = (db.tasks, "due_date") if kind == "task" else (db.activities, "start_datetime")
+    fields = TASK_HASH_FIELDS if kind == "task" else ACTIVITY_HASH_FIELDS
+    existing = await collection.find(
+        {"user_id": user_id, date_field: {"$in": list({doc[date_field] for doc in docs})}},
+        {"_id": 0, **{field: 1 for field in fields}}
+    ).to_list(None)
+    seen = {content_hash(kind, doc) for doc in existing}
+    fresh = []
+    for doc in docs:
+        digest = content_hash(kind, doc)
+        if digest not in seen:
+            seen.add(digest)
+            fresh.append(doc)
+    return fresh
+
+async def import_records(user_id: str, records, progress=None, batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, Any]:
+    summary = {
+        "read": 0, "inserted": 0, "tasks": 0, "activities": 0, "duplicates": 0, "invalid": 0,
+        "errors": [], "seconds": 0.0, "rows_per_second": 0.0
+    }
+    started = clock.monotonic()
+    loop = asyncio.get_running_loop()
+    while True:
+        parsed = await loop.run_in_executor(None, parse_import_batch, user_id, records, batch_size)
+        if parsed is None:
+            break
+        count, docs, errors = parsed
+        summary["read"] += count
+        summary["invalid"] += len(errors)
+        summary["errors"].extend(errors[:IMPORT_MAX_ERRORS - len(summary["errors"])])
+
+        for kind, collection, counter in (("task", db.tasks, "tasks"), ("activity", db.activities, "activities")):
+            if not docs[kind]:
+                continue
+            fresh = await drop_existing_duplicates(user_id, kind, docs[kind])
+            summary["duplicates"] += len(docs[kind]) - len(fresh)
+            if not fresh:
+                continue
+            try:
+                result = await collection.insert_many(fresh, ordered=False)
+                inserted = len(result.inserted_ids)
+            except BulkWriteError as e:
+                inserted = e.details["nInserted"]
+                summary["invalid"] += len(e.details["writeErrors"])
+                summary["errors"].extend(
+                    {"position": None, "error": error["errmsg"]}
+                    for error in e.details["writeErrors"][:IMPORT_MAX_ERRORS - len(summary["errors"])]
+                )
+            summary["inserted"] += inserted
+            summary[counter] += inserted
+
+        summary["seconds"] = round(clock.monotonic() - started, 3)
+        summary["rows_per_second"] = round(summary["read"] / summary["seconds"], 1) if summary["seconds"] else 0.0
+        if progress is not None:
+            progress(summary)
+
+    if summary["inserted"]:
+        # Too many items for per-item change events: bump the data version,
+        # recount stats and tell connected clients to reload
+        version = await record_user_change(user_id)
+        await rebuild_user_stats(user_id)
+        await change_hub.publish(user_id, {"action": "resync", "version": version})
+    return summary
+
+def import_text_stream(binary, file_format: str, kind: Optional[str] = None):
+    lines = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    if file_format == "ics":
+        return iter_ics_records(lines)
+    return iter_csv_records(lines, kind)
+
+@api_router.post("/users/{user_id}/import")
+async def import_user_items(
+    request: Request,
+    user_id: str,
+    file_format: str = Query(..., alias="format", pattern="^(ics|csv)$"),
+    kind: Optional[str] = Query(None, pattern="^(task|activity)$")  # CSV rows without a type column
+):
+    # The raw file is the request body; it is spooled (to disk past
+    # IMPORT_SPOOL_BYTES) and then parsed as a stream
+    user = await db.users.find_one({"id": user_id}, {"_id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="Import file is too large")
+            spool.write(chunk)
+        spool.seek(0)
+        
+        def log_progress(summary):
+            logger.info(
+                "Import for %s: %d read, %d inserted, %d duplicates, %d invalid (%.0f rows/s)",
+                user_id, summary["read"], summary["inserted"], summary["duplicates"],
+                summary["invalid"], summary["rows_per_second"]
+            )
+        
+        summary = await import_records(user_id, import_text_stream(spool, file_format, kind), log_progress)
+    return summary
+
+# Calendar feed
+# Subscribed calendar apps poll the feed every few minutes. A poll costs one
+# indexed users lookup: an unchanged data version is answered with a 304, and
+# a changed one is rendered once per (user, version) and served from
+# ics_feed_cache until the next write bumps the version.
+ICS_PRODID = "-//Calendar App//Student Calendar//EN"
+ICS_LINE_OCTETS = 75
+ICS_TASK_PRIORITIES = {"high": 1, "medium": 5, "low": 9}
+ICS_WEEKDAY_NAMES = {number: name for name, number in ICS_WEEKDAYS.items()}
+
+ics_feed_cache = TTLCache(
+    maxsize=int(os.environ.get("ICS_FEED_CACHE_SIZE", "2000")),
+    ttl=float(os.environ.get("ICS_FEED_CACHE_TTL", "3600"))
+)
+
+def ics_escape(value: Any) -> str:
+    return (
+        str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+def fold_ics_line(line: str) -> str:
+    # Content lines are limited to 75 octets; continuations start with a
+    # space, and multi-byte characters are never split
+    if len(line.encode()) <= ICS_LINE_OCTETS:
+        return line
+    parts = []
+    current, size, limit = [], 0, ICS_LINE_OCTETS
+    for char in line:
+        octets = len(char.encode())
+        if size + octets > limit:
+            parts.append("".join(current))
+            current, size, limit = [], 0, ICS_LINE_OCTETS - 1
+        current.append(char)
+        size += octets
+    parts.append("".join(current))
+    return "\r\n ".join(parts)
+
+def ics_utc(value: Any) -> str:
+    return _as_naive_utc(value).strftime("%Y%m%dT%H%M%SZ")
+
+def recurrence_rrule(recurrence: Dict[str, Any], series_start: datetime) -> tuple:
+    # RRULE value (and an EXDATE, if needed) matching iter_occurrence_starts
+    frequency = recurrence.get("frequency")
+    if frequency not in ("daily", "weekly", "monthly"):
+        return None, None
+    parts = [f"FREQ={frequency.upper()}"]
+    interval = max(1, int(recurrence.get("interval") or 1))
+    if interval > 1:
+        parts.append(f"INTERVAL={interval}")
+    exdate = None
+    if frequency == "weekly" and recurrence.get("days_of_week"):
+        days = sorted({day for day in recurrence["days_of_week"] if 0 <= day <= 6})
+        parts.append("BYDAY=" + ",".join(ICS_WEEKDAY_NAMES[day] for day in days))
+        if series_start.weekday() not in days:
+            # DTSTART always counts as an instance in iCalendar
+            exdate = ics_utc(series_start)
+    elif frequency == "monthly" and series_start.day > 28:
+        # Months too short for the start day fall back to their last day
+        parts.append("BYMONTHDAY=" + ",".join(map(str, range(28, series_start.day + 1))) + ";BYSETPOS=-1")
+    if recurrence.get("end_date"):
+        parts.append(f"UNTIL={ics_utc(recurrence['end_date'])}")
+    return ";".join(parts), exdate
+
+def activity_vevent(activity: Dict[str, Any]) -> List[str]:
+    start = _as_naive_utc(activity["start_datetime"])
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{activity['id']}",
+        f"DTSTAMP:{ics_utc(activity.get('updated_at') or start)}",
+        f"DTSTART:{ics_utc(start)}",
+        f"DTEND:{ics_utc(activity['end_datetime'])}",
+        f"SUMMARY:{ics_escape(activity['title'])}",
+        f"CATEGORIES:{ics_escape(activity['activity_type'])}"
+    ]
+    if activity.get("description"):
+        lines.append(f"DESCRIPTION:{ics_escape(activity['description'])}")
+    if activity.get("location"):
+        lines.append(f"LOCATION:{ics_escape(activity['location'])}")
+    if activity.get("recurrence"):
+        rrule, exdate = recurrence_rrule(activity["recurrence"], start)
+        if rrule:
+            lines.append(f"RRULE:{rrule}")
+        if exdate:
+            lines.append(f"EXDATE:{exdate}")
+    lines.append("END:VEVENT")
+    return lines
+
+def task_component(task: Dict[str, Any], as_event: bool) -> List[str]:
+    # Most phone calendars ignore VTODO in subscriptions, so tasks default to
+    # zero-length events at their due time
+    due = ics_utc(task["due_date"])
+    summary = task["title"]
+    if as_event and task.get("completed"):
+        summary = f"✓ {summary}"
+    lines = [
+        "BEGIN:VEVENT" if as_event else "BEGIN:VTODO",
+        f"UID:{task['id']}",
+        f"DTSTAMP:{ics_utc(task.get('updated_at') or task['due_date'])}",
+        f"DTSTART:{due}" if as_event else f"DUE:{due}",
+        f"SUMMARY:{ics_escape(summary)}",
+        f"CATEGORIES:{ics_escape(task['subject'])},{ics_escape(task['task_type'])}"
+    ]
+    if task.get("description"):
+        lines.append(f"DESCRIPTION:{ics_escape(task['description'])}")
+    if not as_event:
+        lines.append(f"PRIORITY:{ICS_TASK_PRIORITIES.get(task.get('priority'), 0)}")
+        if task.get("completed"):
+            lines.append("STATUS:COMPLETED")
+            if task.get("completed_at"):
+                lines.append(f"COMPLETED:{ics_utc(task['completed_at'])}")
+        else:
+            lines.append("STATUS:NEEDS-ACTION")
+    lines.append("END:VEVENT" if as_event else "END:VTODO")
+    return lines
+
+async def render_calendar_feed(user: Dict[str, Any], task_mode: str) -> bytes:
+    tasks, activities = await asyncio.gather(
+        db.tasks.find({"user_id": user["id"]}, {"_id": 0}).to_list(None),
+        db.activities.find({"user_id": user["id"]}, {"_id": 0}).to_list(None)
+    )
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{ICS_PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{ics_escape(user.get('name') or 'Calendar')}"
+    ]
+    for activity in activities:
+        lines.extend(activity_vevent(activity))
+    for task in tasks:
+        lines.extend(task_component(task, task_mode == "event"))
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(fold_ics_line(line) for line in lines) + "\r\n").encode()
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_as_naive_utc(value).replace(tzinfo=timezone.utc), usegmt=True)
+
+def not_modified_since(request: Request, last_modified: datetime) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have whole-second precision
+    return _as_naive_utc(last_modified).replace(microsecond=0) <= _as_naive_utc(since)
+
+@api_router.get("/users/{user_id}/calendar.ics")
+async def get_calendar_feed(
+    request: Request,
+    user_id: str,
+    tasks: str = Query("event", pattern="^(event|todo)$")  # how tasks are emitted
+):
+    user = await db.users.find_one(
+        {"id": user_id}, {"_id": 0, "id": 1, "name": 1, "data_version": 1, "data_changed_at": 1, "created_at": 1}
+    )
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    version = user.get("data_version", 0)
+    etag = data_etag(user_id, version, "ics", tasks)
+    last_modified = user.get("data_changed_at") or user.get("created_at")
+    headers = cache_headers(etag)
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    
+    # If-None-Match takes precedence over If-Modified-Since
+    if etag_matches(request, etag) or (
+        "if-none-match" not in request.headers and last_modified and not_modified_since(request, last_modified)
+    ):
+        return Response(status_code=304, headers=headers)
+    
+    cache_key = (user_id, version, tasks)
+    body = ics_feed_cache.get(cache_key)
+    if body is None:
+        body = await render_calendar_feed(user, tasks)
+        ics_feed_cache.set(cache_key, body)
+    return Response(content=body, media_type="text/calendar; charset=utf-8", headers=headers)
+
+# Export endpoint
+# Streams one JSON object per line straight off the Motor cursors so memory
+# stays bounded by EXPORT_BATCH_SIZE regardless of how much history a user has.
+EXPORT_BATCH_SIZE = 500
+
+async def export_user_records(user_id: str):
+    sources = (
+        ("task", db.tasks, "due_date"),
+        ("activity", db.activities, "start_datetime"),
+    )
+    for record_type, collection, sort_field in sources:
+        cursor = collection.find({"user_id": user_id}, {"_id": 0}).sort(
+            sort_field, ASCENDING
+        ).batch_size(EXPORT_BATCH_SIZE)
+        lines = []
+        async for doc in cursor:
+            lines.append(fast_json_dumps({"type": record_type, "data": doc}))
+            if len(lines) >= EXPORT_BATCH_SIZE:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+
+@api_router.get("/users/{user_id}/export")
+async def export_user_data(user_id: str):
+    user = await db.users.find_one({"id": user_id}, {"_id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return StreamingResponse(
+        export_user_records(user_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="export-{user_id}.ndjson"'}
+    )
+
+# Change feed endpoint
+SSE_KEEPALIVE_SECONDS = 15
+
+async def change_event_stream(request: Request, user_id: str):
+    queue = change_hub.subscribe(user_id)
+    try:
+        yield b"retry: 3000\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield b"event: change\ndata: " + fast_json_dumps(event) + b"\n\n"
+    finally:
+        change_hub.unsubscribe(user_id, queue)
+
+@api_router.get("/users/{user_id}/events")
+async def stream_user_events(request: Request, user_id: str):
+    return StreamingResponse(
+        change_event_stream(request, user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Cache statistics endpoint
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    return {
+        "session_users": session_user_cache.stats(),
+        "dashboard_fragments": fragment_cache.stats(),
+        "calendar_feeds": ics_feed_cache.stats()
+    }
+
+# Template render statistics endpoint
+@api_router.get("/render/stats")
+async def get_render_stats():
+    return {
+        name: {**entry, "avg_ms": entry["total_ms"] / entry["count"]}
+        for name, entry in template_render_stats.items()
+    }
+
+# Prometheus metrics endpoint
+@app.get("/metrics")
+async def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Health endpoint
+# Ready once startup (warm-up, indexes, migrations) has finished and MongoDB
+# still answers a ping; entrypoint.sh polls it before starting nginx. Each
+# worker process starts up on its own and the probe reaches whichever one
+# accepts it, so workers also drop a file in STARTUP_READY_DIR when ready and
+# the probe waits until WEB_CONCURRENCY of them have.
+HEALTH_PING_TIMEOUT = 2  # seconds
+STARTUP_READY_DIR = os.environ.get("STARTUP_READY_DIR")
+
+def ready_marker() -> Optional[Path]:
+    return Path(STARTUP_READY_DIR) / str(os.getpid()) if STARTUP_READY_DIR else None
+
+def workers_ready() -> int:
+    if not STARTUP_READY_DIR:
+        return WEB_CONCURRENCY if app.state.ready else 0
+    return sum(1 for _ in Path(STARTUP_READY_DIR).iterdir())
+
+@api_router.get("/health/ready")
+async def health_ready():
+    ready_count = workers_ready()
+    if not app.state.ready or ready_count < WEB_CONCURRENCY:
+        return FastJSONResponse(
+            {"status": "starting", "workers_ready": ready_count, "workers": WEB_CONCURRENCY}, status_code=503
+        )
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout=HEALTH_PING_TIMEOUT)
+    except Exception as e:
+        return FastJSONResponse({"status": "unavailable", "mongo": str(e) or type(e).__name__}, status_code=503)
+    return FastJSONResponse({"status": "ready", "startup_seconds": app.state.startup_seconds})
+
 # Root endpoint
 @api_router.get("/")
 async def root():
@@ -794,6 +3992,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Configure logging
 logging.basicConfig(
@@ -802,6 +4001,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def warm_up_mongo():
+    # Concurrent pings each check out a connection, opening the minimum pool
+    # (and failing fast after serverSelectionTimeoutMS if MongoDB is down)
+    start = clock.perf_counter()
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE))))
+    logger.info(
+        "MongoDB connection pool warmed: %d connections in %.0f ms",
+        max(1, MONGO_MIN_POOL_SIZE), (clock.perf_counter() - start) * 1000
+    )
+
+@app.on_event("startup")
+async def init_indexes():
+    slow_query_log.loop = asyncio.get_running_loop()
+    await warm_up_mongo()
+    # Migrations first: unique indexes can only be built on deduplicated data
+    await run_migrations()
+    await ensure_indexes()
+    if os.environ.get("VERIFY_QUERY_PLANS", "1") == "1":
+        await verify_query_plans()
+        logger.info("Verified %d query shapes against their indexes", len(QUERY_SHAPES))
+    await change_hub.start()
+    if STATS_RECONCILE_INTERVAL:
+        app.state.stats_reconciler = asyncio.create_task(stats_reconcile_loop())
+    app.state.startup_seconds = round(clock.monotonic() - app.state.started_at, 3)
+    app.state.ready = True
+    if ready_marker():
+        ready_marker().touch()
+    logger.info("Ready after %.2f s", app.state.startup_seconds)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.ready = False
+    if ready_marker():
+        ready_marker().unlink(missing_ok=True)
+    if getattr(app.state, "stats_reconciler", None):
+        app.state.stats_reconciler.cancel()
+    await change_hub.stop()
+    password_executor.shutdown(wait=False)
     client.close()
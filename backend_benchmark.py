@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""Micro/macro benchmarks for the backend hot paths.
+
+Runs server.py functions directly against a scratch database on MONGO_URL
+(from backend/.env) and prints timings. Usage:
+
+    python backend_benchmark.py <name> [<name> ...]
+
+Run without arguments to list the available benchmarks.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+import json
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from bson import ObjectId
+from pymongo import monitoring
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+
+BENCH_DB = f"bench_{uuid.uuid4().hex[:8]}"
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+counter = CommandCounter()
+
+# Helper functions
+def make_task(user_id, now):
+    completed = random.random() < 0.4
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "title": f"Task {random.randint(1, 10000)}",
+        "description": "Benchmark task",
+        "subject": random.choice(["Mathematics", "Physics", "Chemistry", "English", "History"]),
+        "task_type": random.choice(["assignment", "test", "project", "homework", "study"]),
+        "priority": random.choice(["low", "medium", "high"]),
+        "due_date": now + timedelta(hours=random.randint(-24 * 60, 24 * 60)),
+        "due_time": None,
+        "estimated_duration": random.choice([None, 30, 60, 90]),
+        "completed": completed,
+        "completed_at": now if completed else None,
+        "color": "#6366f1",
+        "created_at": now,
+        "updated_at": now
+    }
+
+def make_activity(user_id, now):
+    start = now + timedelta(hours=random.randint(-24 * 60, 24 * 60))
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "title": f"Activity {random.randint(1, 10000)}",
+        "description": None,
+        "activity_type": random.choice(["sports", "club", "meeting", "practice", "competition", "event"]),
+        "start_datetime": start,
+        "end_datetime": start + timedelta(hours=2),
+        "location": "School Gym",
+        "recurrence": None,
+        "color": "#10b981",
+        "created_at": now,
+        "updated_at": now
+    }
+
+async def seed_user(n_tasks, n_activities):
+    now = datetime.utcnow()
+    user_id = str(uuid.uuid4())
+    await server.db.users.insert_one({
+        "id": user_id,
+        "name": "Bench Student",
+        "email": f"{user_id}@bench.local",
+        "year_level": 11,
+        "theme": "light",
+        "default_view": "month",
+        "subjects": ["Mathematics", "Physics", "Chemistry", "English", "History"],
+        "created_at": now
+    })
+    if n_tasks:
+        await server.db.tasks.insert_many([make_task(user_id, now) for _ in range(n_tasks)])
+    if n_activities:
+        await server.db.activities.insert_many([make_activity(user_id, now) for _ in range(n_activities)])
+    return user_id
+
+async def measure(label, func, iterations):
+    counter.count = 0
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1000)
+    commands = counter.count / iterations
+    print(f"   {label:<28} median {statistics.median(timings):8.2f} ms   "
+          f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:8.2f} ms   "
+          f"{commands:5.1f} commands/call")
+    return statistics.median(timings)
+
+# Benchmarks
+async def bench_stats():
+    """Sequential count_documents vs. the $facet recount vs. the materialized user_stats read."""
+    user_id = await seed_user(5000, 500)
+    db = server.db
+
+    async def sequential():
+        now = datetime.utcnow()
+        await db.tasks.count_documents({"user_id": user_id})
+        await db.tasks.count_documents({"user_id": user_id, "completed": True})
+        await db.tasks.count_documents({"user_id": user_id, "completed": False, "due_date": {"$lt": now}})
+        await db.tasks.count_documents({
+            "user_id": user_id,
+            "completed": False,
+            "due_date": {"$gte": now, "$lte": now + timedelta(days=7)}
+        })
+        await db.activities.count_documents({"user_id": user_id})
+
+    async def facet():
+        await server.compute_user_stats(user_id)
+
+    async def materialized():
+        await server.load_user_stats(user_id)
+
+    before = await measure("sequential counts", sequential, 50)
+    recount = await measure("compute_user_stats", facet, 50)
+    await server.rebuild_user_stats(user_id)
+    after = await measure("load_user_stats", materialized, 50)
+    print(f"   speedup: {before / recount:.2f}x ($facet)   {before / after:.2f}x (materialized)")
+
+    # Drive every write path and check the $inc-maintained counters against a recount
+    now = datetime.utcnow()
+    tasks = [make_task(user_id, now) for _ in range(200)]
+    await db.tasks.insert_many([dict(task) for task in tasks])
+    await server.record_user_change(user_id, [server.change_event("task", "created", t["id"], t) for t in tasks])
+    for task in tasks[:50]:
+        await server.update_task(task["id"], server.TaskUpdate(completed=not task["completed"]))
+    for task in tasks[50:100]:
+        await server.delete_task(task["id"])
+    stored = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+    recounted = await server.compute_user_stats(user_id)
+    drift = {k: stored[k] - recounted[k] for k in server.STATS_COUNTERS if stored[k] != recounted[k]}
+    print(f"   drift after 300 writes: {drift or 'none'}")
+
+async def bench_recurrence():
+    """Expanding a school year of twice-weekly practices, cold and cached."""
+    series_start = datetime(2024, 9, 2, 15, 30)
+    window = (datetime(2025, 3, 1), datetime(2025, 3, 31))
+    year = (datetime(2024, 9, 1), datetime(2025, 6, 30))
+
+    def activity():
+        return {
+            "id": str(uuid.uuid4()),
+            "start_datetime": series_start,
+            "end_datetime": series_start + timedelta(hours=2),
+            "recurrence": {"frequency": "weekly", "days_of_week": [0, 2]},
+            "updated_at": series_start
+        }
+
+    for label, (start, end) in (("one month", window), ("full school year", year)):
+        timings = []
+        for _ in range(1000):
+            doc = activity()
+            t0 = time.perf_counter()
+            occurrences = server.expand_activity(doc, start, end)
+            timings.append((time.perf_counter() - t0) * 1e6)
+        t0 = time.perf_counter()
+        server.expand_activity(doc, start, end)
+        cached = (time.perf_counter() - t0) * 1e6
+        print(f"   {label:<18} {len(occurrences):4d} occurrences   "
+              f"cold median {statistics.median(timings):7.1f} us   cached {cached:5.1f} us")
+
+async def bench_hydration():
+    """Pydantic models vs. read-model dicts + fast encoder on 1000-item responses."""
+    now = datetime.utcnow()
+    task_docs = [{"_id": ObjectId(), **make_task("bench", now)} for _ in range(1000)]
+    activity_docs = [{"_id": ObjectId(), **make_activity("bench", now)} for _ in range(1000)]
+
+    def models_path(docs, model, page):
+        items = [model(**doc) for doc in docs]
+        return json.dumps(page(items=items, next_cursor=None).model_dump(mode="json")).encode()
+
+    def read_model_path(docs, fields):
+        return server.fast_json_dumps({"items": [server.hydrate(doc, fields) for doc in docs], "next_cursor": None})
+
+    cases = (
+        ("tasks", task_docs, server.Task, server.TaskPage, server.TASK_READ_FIELDS),
+        ("activities", activity_docs, server.Activity, server.ActivityPage, server.ACTIVITY_READ_FIELDS),
+    )
+    encoder = "orjson" if server.orjson is not None else "json"
+    for label, docs, model, page, fields in cases:
+        before, after = [], []
+        for _ in range(50):
+            t0 = time.perf_counter()
+            models_path(docs, model, page)
+            before.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            read_model_path(docs, fields)
+            after.append((time.perf_counter() - t0) * 1000)
+        print(f"   {label:<11} pydantic {statistics.median(before):7.2f} ms   "
+              f"read model ({encoder}) {statistics.median(after):7.2f} ms   "
+              f"speedup {statistics.median(before) / statistics.median(after):5.2f}x")
+
+async def bench_login_storm():
+    """Event loop responsiveness while 64 bcrypt logins verify: inline on the loop vs. the password pool."""
+    password = "correct horse battery staple"
+    password_hash = server.pwd_context.hash(password)
+    print(f"   bcrypt rounds {server.BCRYPT_ROUNDS}, {server.PASSWORD_HASH_WORKERS} hash workers, "
+          f"admission limit {server.LOGIN_MAX_PENDING}")
+
+    async def inline_login():
+        return server.pwd_context.verify(password, password_hash)
+
+    async def pooled_login():
+        try:
+            valid, _ = await server.verify_password(password, password_hash)
+            return valid
+        except server.LoginOverloaded:
+            return None
+
+    async def storm(login, logins=64, tick=0.01):
+        # A ticker that should wake every 10 ms records how late it runs
+        lags = []
+        done = asyncio.Event()
+
+        async def ticker():
+            while not done.is_set():
+                expected = time.perf_counter() + tick
+                await asyncio.sleep(tick)
+                lags.append((time.perf_counter() - expected) * 1000)
+
+        ticker_task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await ticker_task
+        lags.sort()
+        verified = sum(1 for result in results if result)
+        shed = sum(1 for result in results if result is None)
+        print(f"   {login.__name__:<13} loop lag p50 {statistics.median(lags):7.2f} ms   "
+              f"p99 {lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[-1]:7.2f} ms   "
+              f"max {lags[-1]:7.2f} ms   {verified} verified, {shed} shed in {elapsed:5.2f} s")
+
+    await storm(inline_login)
+    await storm(pooled_login)
+
+async def bench_schedule():
+    """Planning a month for a heavy user: 1k pending tasks around 5k activity occurrences."""
+    window_start = datetime.utcnow().replace(second=0, microsecond=0)
+    window_end = window_start + timedelta(days=30)
+    min_block = timedelta(minutes=15)
+
+    def occurrence():
+        start = window_start + timedelta(minutes=random.randrange(0, 30 * 24 * 60, 5))
+        return start, start + timedelta(minutes=random.choice([10, 15, 20, 30]))
+
+    def pending_task(user_id):
+        task = make_task(user_id, window_start)
+        task.update(completed=False, completed_at=None, priority_rank=server.priority_rank(task["priority"]))
+        task["due_date"] = window_start + timedelta(hours=random.randint(-48, 40 * 24))
+        return task
+
+    tasks = [pending_task("bench") for _ in range(1000)]
+    occurrences = [occurrence() for _ in range(5000)]
+    timings = []
+    for _ in range(20):
+        t0 = time.perf_counter()
+        busy = occurrences + server.off_hours(window_start, window_end, 8, 22, 0)
+        slots = server.free_slots(busy, window_start, window_end, min_block)
+        plan = server.plan_schedule(tasks, slots, window_start, window_end, min_block)
+        timings.append((time.perf_counter() - t0) * 1000)
+    statuses = {}
+    for entry in plan["tasks"]:
+        statuses[entry["status"]] = statuses.get(entry["status"], 0) + 1
+    print(f"   plan only            median {statistics.median(timings):8.2f} ms   "
+          f"{len(plan['blocks'])} blocks, {statuses}")
+
+    # End to end: activity load + recurrence expansion + task query + planning
+    user_id = await seed_user(0, 0)
+    await server.db.tasks.insert_many([pending_task(user_id) for _ in range(1000)])
+    activities = []
+    for _ in range(5000):
+        activity = make_activity(user_id, window_start)
+        activity["start_datetime"], activity["end_datetime"] = occurrence()
+        activities.append(activity)
+    await server.db.activities.insert_many(activities)
+
+    async def build():
+        await server.build_schedule(user_id, window_start, window_end)
+
+    await measure("build_schedule", build, 20)
+
+BENCHMARKS = {
+    "stats": bench_stats,
+    "recurrence": bench_recurrence,
+    "hydration": bench_hydration,
+    "login_storm": bench_login_storm,
+    "schedule": bench_schedule,
+}
+
+async def main(names):
+    bench_client = AsyncIOMotorClient(os.environ["MONGO_URL"], event_listeners=[counter])
+    server.db = bench_client[BENCH_DB]
+    try:
+        await server.ensure_indexes()
+        for name in names:
+            print(f"\n--- {name}: {BENCHMARKS[name].__doc__} ---")
+            await BENCHMARKS[name]()
+    finally:
+        await bench_client.drop_database(BENCH_DB)
+        bench_client.close()
+
+if __name__ == "__main__":
+    names = sys.argv[1:]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if not names or unknown:
+        print("Available benchmarks: " + ", ".join(BENCHMARKS))
+        sys.exit(1 if unknown else 0)
+    asyncio.run(main(names))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Bulk import of tasks and activities from an ICS or CSV file.
+
+Uses the same streaming parser, batch validation and duplicate detection as
+POST /api/users/{user_id}/import, writing straight to MONGO_URL/DB_NAME
+(from backend/.env). Usage:
+
+    python backend_import.py --user <user_id> calendar.ics
+    python backend_import.py --user <user_id> --kind task homework.csv
+
+Progress and throughput are printed to stderr, the final summary to stdout
+as JSON. Re-running the same file inserts nothing new.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import server
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import an ICS or CSV file into a user's calendar.")
+    parser.add_argument("path", help="ICS or CSV file")
+    parser.add_argument("--user", required=True, help="id of the user that receives the items")
+    parser.add_argument("--format", dest="file_format", choices=("ics", "csv"),
+                        help="file format (default: from the file extension)")
+    parser.add_argument("--kind", choices=("task", "activity"),
+                        help="item type for CSV rows without a type column")
+    parser.add_argument("--batch-size", type=int, default=server.IMPORT_BATCH_SIZE,
+                        help=f"rows validated and inserted per batch (default: {server.IMPORT_BATCH_SIZE})")
+    args = parser.parse_args()
+    if args.file_format is None:
+        extension = os.path.splitext(args.path)[1].lower()
+        if extension not in (".ics", ".csv"):
+            parser.error("cannot tell the format from the file name; pass --format")
+        args.file_format = extension[1:]
+    if args.batch_size < 1:
+        parser.error("--batch-size must be positive")
+    return args
+
+async def main(args):
+    if not await server.db.users.find_one({"id": args.user}, {"_id": 1}):
+        print(f"User {args.user} not found in {server.db.name}", file=sys.stderr)
+        return 1
+
+    total = os.path.getsize(args.path)
+    with open(args.path, "rb") as binary:
+        def report(summary):
+            # tell() on the raw file is at most one read-ahead buffer past the parser
+            done = binary.raw.tell() / total * 100 if total else 100.0
+            print(
+                f"\r{done:5.1f}%  {summary['read']} read, {summary['inserted']} inserted, "
+                f"{summary['duplicates']} duplicates, {summary['invalid']} invalid  "
+                f"({summary['rows_per_second']:.0f} rows/s)",
+                end="", file=sys.stderr, flush=True
+            )
+
+        records = server.import_text_stream(binary, args.file_format, args.kind)
+        try:
+            summary = await server.import_records(args.user, records, report, args.batch_size)
+        finally:
+            server.client.close()
+    print(file=sys.stderr)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
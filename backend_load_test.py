@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""Load test harness for the backend.
+
+Starts the FastAPI app with uvicorn against a scratch database on the local
+mongod (MONGO_URL from backend/.env), signs up a set of virtual users and
+drives them concurrently through a weighted mix of realistic requests:
+login, dashboard, calendar month fetch, create task and toggle. Reports
+throughput and p50/p95/p99 latency per route, writes the results as JSON and
+compares them against a stored baseline. Usage:
+
+    python backend_load_test.py --users 50 --duration 60 --output results.json
+    python backend_load_test.py --baseline load_baseline.json
+    python backend_load_test.py --save-baseline load_baseline.json
+
+Pass --url to target an already running server instead of starting one
+(its database is then left untouched apart from the virtual users' data).
+Exits with status 1 when a route regresses beyond --tolerance.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import requests
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+load_dotenv(os.path.join(BACKEND_DIR, ".env"))
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+PASSWORD = "load-test-password"
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "English", "History"]
+
+# Relative weight of each action in a virtual user's loop
+DEFAULT_MIX = {
+    "login": 1,
+    "dashboard": 4,
+    "calendar_month": 4,
+    "create_task": 2,
+    "toggle_task": 2,
+}
+
+# Helper functions
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown action {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def start_server(port, db_name, workers):
+    # Every virtual user signs up and logs in from 127.0.0.1, so the per-client
+    # auth rate limits are lifted unless the environment sets them explicitly
+    env = {
+        "SESSION_SECRET": uuid.uuid4().hex,
+        "LOGIN_RATE_LIMIT": "1000000",
+        "SIGNUP_RATE_LIMIT": "1000000",
+        **os.environ,
+        "DB_NAME": db_name,
+        "WEB_CONCURRENCY": str(workers),
+        # readiness waits for every worker, not just the first one up
+        "STARTUP_READY_DIR": tempfile.mkdtemp(prefix="ready-")
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/api/health/ready", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become ready within 60s")
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.throttled = defaultdict(int)  # 429s, kept apart from errors
+        self.recording = False
+
+    def record(self, route, elapsed_ms, ok, throttled=False):
+        if not self.recording:
+            return
+        with self.lock:
+            self.latencies[route].append(elapsed_ms)
+            if throttled:
+                self.throttled[route] += 1
+            elif not ok:
+                self.errors[route] += 1
+
+    def summary(self, duration):
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            routes[route] = {
+                "requests": len(values),
+                "errors": self.errors[route],
+                "throttled": self.throttled[route],
+                "throughput_rps": round(len(values) / duration, 2),
+                "mean_ms": round(statistics.fmean(values), 2),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(values[-1], 2)
+            }
+        everything = sorted(value for values in self.latencies.values() for value in values)
+        total = {
+            "requests": len(everything),
+            "errors": sum(self.errors.values()),
+            "throttled": sum(self.throttled.values()),
+            "throughput_rps": round(len(everything) / duration, 2),
+            "p50_ms": round(percentile(everything, 50), 2),
+            "p95_ms": round(percentile(everything, 95), 2),
+            "p99_ms": round(percentile(everything, 99), 2)
+        }
+        return routes, total
+
+class VirtualUser:
+    def __init__(self, base_url, recorder, mix, think_time):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.actions = list(mix)
+        self.weights = [mix[name] for name in self.actions]
+        self.think_time = think_time
+        self.session = requests.Session()
+        self.email = f"load-{uuid.uuid4().hex[:12]}@load.local"
+        self.user_id = None
+        self.task_ids = []
+        self.etags = {}  # what a browser cache would send back
+
+    def request(self, route, method, path, expected=(200,), **kwargs):
+        url = self.base_url + path
+        headers = kwargs.pop("headers", {})
+        if method == "GET" and url in self.etags:
+            headers["If-None-Match"] = self.etags[url]
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, headers=headers, allow_redirects=False, timeout=30, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(route, (time.perf_counter() - start) * 1000, False)
+            return None
+        self.recorder.record(
+            route, (time.perf_counter() - start) * 1000, response.status_code in expected,
+            throttled=response.status_code == 429
+        )
+        if "ETag" in response.headers:
+            self.etags[url] = response.headers["ETag"]
+        return response
+
+    def setup(self, db, seed_tasks):
+        form = {"name": "Load Student", "email": self.email, "password": PASSWORD, "year_level": random.randint(9, 12)}
+        for attempt in range(5):
+            response = self.session.post(f"{self.base_url}/signup", data=form, allow_redirects=False, timeout=30)
+            if response.status_code != 429:
+                break
+            # A --url server keeps its own signup limit; wait out the window
+            time.sleep(float(response.headers.get("Retry-After", "1")))
+        response.raise_for_status()
+        self.user_id = db.users.find_one({"email": self.email}, {"id": 1})["id"]
+        if seed_tasks:
+            now = datetime.utcnow()
+            operations = [{
+                "action": "create",
+                "target": "tasks",
+                "data": {
+                    "title": f"Seed task {n}",
+                    "subject": random.choice(SUBJECTS),
+                    "task_type": random.choice(["assignment", "test", "project", "homework", "study"]),
+                    "priority": random.choice(["low", "medium", "high"]),
+                    "due_date": (now + timedelta(hours=random.randint(-24 * 30, 24 * 60))).isoformat()
+                }
+            } for n in range(seed_tasks)]
+            result = self.session.post(
+                f"{self.base_url}/api/users/{self.user_id}/batch",
+                json={"operations": operations, "ordered": False},
+                timeout=60
+            ).json()
+            self.task_ids = [item["id"] for item in result["results"] if item["status"] == "ok"]
+
+    # Actions
+    def login(self):
+        self.request("POST /login", "POST", "/login", expected=(302,),
+                     data={"email": self.email, "password": PASSWORD})
+
+    def dashboard(self):
+        self.request("GET /dashboard", "GET", "/dashboard")
+
+    def calendar_month(self):
+        month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        month += timedelta(days=31 * random.randint(-1, 2))
+        month = month.replace(day=1)
+        end = (month + timedelta(days=32)).replace(day=1)
+        self.request(
+            "GET /api/users/{id}/calendar", "GET",
+            f"/api/users/{self.user_id}/calendar?start_date={month.isoformat()}&end_date={end.isoformat()}",
+            expected=(200, 304)
+        )
+
+    def create_task(self):
+        due = datetime.utcnow() + timedelta(days=random.randint(0, 30))
+        self.request("POST /tasks/create", "POST", "/tasks/create", expected=(302,), data={
+            "title": f"Load task {random.randint(1, 10000)}",
+            "subject": random.choice(SUBJECTS),
+            "task_type": random.choice(["assignment", "test", "project", "homework", "study"]),
+            "priority": random.choice(["low", "medium", "high"]),
+            "due_date": due.date().isoformat(),
+            "due_time": "17:00"
+        })
+
+    def toggle_task(self):
+        if not self.task_ids:
+            return self.create_task()
+        task_id = random.choice(self.task_ids)
+        self.request("POST /tasks/{id}/toggle", "POST", f"/tasks/{task_id}/toggle", expected=(302,))
+
+    def run(self, stop):
+        while not stop.is_set():
+            action = random.choices(self.actions, self.weights)[0]
+            getattr(self, action)()
+            if self.think_time:
+                time.sleep(random.uniform(0, 2 * self.think_time))
+
+def compare(results, baseline, tolerance):
+    # Flag routes whose p95 grew or throughput dropped by more than tolerance
+    regressions = []
+    print(f"\n{'route':<32} {'p95 base':>10} {'p95 now':>10} {'change':>8}   {'rps base':>9} {'rps now':>9}")
+    for route, now in results["routes"].items():
+        base = baseline["routes"].get(route)
+        if base is None:
+            print(f"{route:<32} {'-':>10} {now['p95_ms']:>10.2f} {'new':>8}")
+            continue
+        change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        print(f"{route:<32} {base['p95_ms']:>10.2f} {now['p95_ms']:>10.2f} {change:>+7.1%}   "
+              f"{base['throughput_rps']:>9.2f} {now['throughput_rps']:>9.2f}")
+        if change > tolerance:
+            regressions.append(f"{route}: p95 {base['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms")
+        if now["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{route}: throughput {base['throughput_rps']:.2f} -> {now['throughput_rps']:.2f} rps")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before recording")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between actions (s)")
+    parser.add_argument("--seed-tasks", type=int, default=200, help="tasks created per user before the run")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="action weights, e.g. dashboard=4,calendar_month=4,toggle_task=1")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when starting the server")
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--output", default="load_results.json")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    db_name = f"load_{uuid.uuid4().hex[:8]}"
+    mongo = MongoClient(MONGO_URL)
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        db = mongo[os.environ["DB_NAME"]]
+    else:
+        server, base_url = start_server(free_port(), db_name, args.workers)
+        db = mongo[db_name]
+
+    try:
+        recorder = Recorder()
+        vusers = [VirtualUser(base_url, recorder, args.mix, args.think_time) for _ in range(args.users)]
+        print(f"Signing up {args.users} virtual users with {args.seed_tasks} tasks each against {base_url}")
+        for vuser in vusers:
+            vuser.setup(db, args.seed_tasks)
+
+        stop = threading.Event()
+        threads = [threading.Thread(target=vuser.run, args=(stop,), daemon=True) for vuser in vusers]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.warmup)
+        recorder.recording = True
+        started = time.monotonic()
+        time.sleep(args.duration)
+        recorder.recording = False
+        elapsed = time.monotonic() - started
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        routes, total = recorder.summary(elapsed)
+        results = {
+            "started_at": datetime.utcnow().isoformat(),
+            "config": {
+                "users": args.users,
+                "duration": args.duration,
+                "think_time": args.think_time,
+                "seed_tasks": args.seed_tasks,
+                "workers": args.workers,
+                "mix": args.mix,
+                "url": args.url
+            },
+            "routes": routes,
+            "total": total
+        }
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+            mongo.drop_database(db_name)
+        mongo.close()
+
+    print(f"\n{'route':<32} {'reqs':>7} {'err':>5} {'429':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, stats in routes.items():
+        print(f"{route:<32} {stats['requests']:>7} {stats['errors']:>5} {stats['throttled']:>5} "
+              f"{stats['throughput_rps']:>8.2f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    print(f"{'total':<32} {total['requests']:>7} {total['errors']:>5} {total['throttled']:>5} "
+          f"{total['throughput_rps']:>8.2f} {total['p50_ms']:>8.2f} {total['p95_ms']:>8.2f} {total['p99_ms']:>8.2f}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions beyond tolerance:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions beyond tolerance")
+
+if __name__ == "__main__":
+    main()
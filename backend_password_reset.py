@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Issue a one-time set-password link for a user.
+
+Accounts created before passwords were stored, or through POST /api/users,
+have no password hash and cannot sign in until their owner sets one through
+this link. Hand the link to the account owner out of band. Usage:
+
+    python backend_password_reset.py --email student@school.edu
+    python backend_password_reset.py --email student@school.edu --base-url https://studytime.example
+
+Writes to MONGO_URL/DB_NAME (from backend/.env). The link expires after
+PASSWORD_RESET_HOURS (default 24) and works once.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import server
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Issue a one-time set-password link.")
+    parser.add_argument("--email", required=True, help="email of the account")
+    parser.add_argument("--base-url", default=os.environ.get("APP_BASE_URL", "http://localhost:8001"),
+                        help="public URL of the app (default: $APP_BASE_URL or http://localhost:8001)")
+    return parser.parse_args()
+
+async def main(args):
+    try:
+        user = await server.db.users.find_one({"email": args.email}, {"_id": 0, "id": 1})
+        if not user:
+            print(f"No user with email {args.email} in {server.db.name}", file=sys.stderr)
+            return 1
+        token = await server.create_password_reset(user["id"])
+    finally:
+        server.client.close()
+    print(f"{args.base_url.rstrip('/')}/reset-password?{urlencode({'token': token})}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -7,6 +7,7 @@ import sys
 import time
 from dotenv import load_dotenv
 import random
+import uuid
 
 # Load environment variables from frontend/.env
 load_dotenv("/app/frontend/.env")
@@ -24,7 +25,8 @@ print(f"Testing API at: {API_URL}")
 # Test data
 test_user = {
     "name": "Test Student",
-    "email": "test.student@school.edu",
+    # Emails are unique, so every run signs up a fresh user
+    "email": f"test.student.{int(time.time())}@school.edu",
     "year_level": 10,
     "subjects": ["Math", "Science", "English", "History", "Physical Education"]
 }
@@ -95,9 +97,10 @@ def test_create_user():
 def test_create_user_with_custom_id():
     try:
         custom_user = test_user.copy()
+        custom_user_suffix = uuid.uuid4().hex[:8]
         custom_user["name"] = "Custom ID User"
-        custom_user["email"] = "custom.id@school.edu"
-        custom_user["id"] = f"custom-{random.randint(1000, 9999)}"
+        custom_user["email"] = f"custom.id.{custom_user_suffix}@school.edu"
+        custom_user["id"] = f"custom-{custom_user_suffix}"
         response = requests.post(f"{API_URL}/users", json=custom_user)
         success = response.status_code == 200 and response.json()["id"] == custom_user["id"]
         return success, response, None
@@ -107,7 +110,9 @@ def test_create_user_with_custom_id():
 def test_get_all_users():
     try:
         response = requests.get(f"{API_URL}/users")
-        success = response.status_code == 200 and isinstance(response.json(), list)
+        success = (response.status_code == 200 and 
+                  isinstance(response.json()["items"], list) and
+                  "next_cursor" in response.json())
         return success, response, None
     except Exception as e:
         return False, None, str(e)
@@ -156,7 +161,9 @@ def test_create_task(user_id):
 def test_get_tasks(user_id):
     try:
         response = requests.get(f"{API_URL}/users/{user_id}/tasks")
-        success = response.status_code == 200 and isinstance(response.json(), list)
+        success = (response.status_code == 200 and 
+                  isinstance(response.json()["items"], list) and
+                  "next_cursor" in response.json())
         return success, response, None
     except Exception as e:
         return False, None, str(e)
@@ -210,7 +217,9 @@ def test_create_activity(user_id):
 def test_get_activities(user_id):
     try:
         response = requests.get(f"{API_URL}/users/{user_id}/activities")
-        success = response.status_code == 200 and isinstance(response.json(), list)
+        success = (response.status_code == 200 and 
+                  isinstance(response.json()["items"], list) and
+                  "next_cursor" in response.json())
         return success, response, None
     except Exception as e:
         return False, None, str(e)
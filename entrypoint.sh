@@ -4,18 +4,61 @@ set -e
 # Start the FastAPI backend
 cd /backend || { echo "Backend directory not found"; exit 1; }
 
-echo "Starting FastAPI backend"
+# A single worker process unless WEB_CONCURRENCY asks for more. To use every
+# core, set WEB_CONCURRENCY (e.g. to the output of nproc) together with a
+# shared SESSION_SECRET; the workers then split MONGO_POOL_BUDGET connections
+# between them and relay change events through MongoDB.
+WEB_CONCURRENCY="${WEB_CONCURRENCY:-1}"
+export WEB_CONCURRENCY
+
+# Workers (and replicas) must share the session secret; set SESSION_SECRET in
+# the deployment so sessions also survive restarts
+if [ -z "$SESSION_SECRET" ]; then
+    echo "SESSION_SECRET not set; generating one for this container (sessions reset on restart)"
+    SESSION_SECRET=$(python3 -c 'import secrets; print(secrets.token_urlsafe(32))')
+    export SESSION_SECRET
+fi
+
+# nginx proxies from loopback; its X-Forwarded-For gives the login rate limit
+# the real client address. Add the load balancer's addresses here if there is
+# one in front. The limit is counted in each worker, so a client can make up
+# to WEB_CONCURRENCY times LOGIN_RATE_LIMIT attempts per window.
+TRUSTED_PROXIES="${TRUSTED_PROXIES:-127.0.0.1,::1}"
+export TRUSTED_PROXIES
+
+# Opt in to the faster event loop / HTTP parser with UVICORN_LOOP=uvloop and
+# UVICORN_HTTP=httptools
+UVICORN_LOOP="${UVICORN_LOOP:-asyncio}"
+UVICORN_HTTP="${UVICORN_HTTP:-h11}"
+
+# Each worker marks itself ready here; the readiness probe waits for all of them
+STARTUP_READY_DIR=$(mktemp -d)
+export STARTUP_READY_DIR
+
+echo "Starting FastAPI backend with $WEB_CONCURRENCY workers (loop=$UVICORN_LOOP, http=$UVICORN_HTTP)"
 # Start Uvicorn with proper host binding
-uvicorn server:app --host 0.0.0.0 --port 8001 &
+uvicorn server:app --host 0.0.0.0 --port 8001 \
+    --workers "$WEB_CONCURRENCY" --loop "$UVICORN_LOOP" --http "$UVICORN_HTTP" &
 BACKEND_PID=$!
 
-echo "Waiting for backend to start..."
-sleep 30
-
-if ! kill -0 $BACKEND_PID 2>/dev/null; then
-    echo "Backend failed to start at initialization, exiting"
-    exit 1
-fi
+# Poll readiness instead of sleeping a fixed time
+STARTUP_TIMEOUT="${STARTUP_TIMEOUT:-60}"
+echo "Waiting up to ${STARTUP_TIMEOUT}s for backend readiness..."
+polls=0
+until wget -q -O /dev/null http://127.0.0.1:8001/api/health/ready 2>/dev/null; do
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend failed to start at initialization, exiting"
+        exit 1
+    fi
+    if [ "$polls" -ge $((STARTUP_TIMEOUT * 2)) ]; then
+        echo "Backend not ready after ${STARTUP_TIMEOUT}s, exiting"
+        kill $BACKEND_PID 2>/dev/null
+        exit 1
+    fi
+    sleep 0.5
+    polls=$((polls + 1))
+done
+echo "Backend ready"
 
 # Start Nginx
 nginx -g 'daemon off;' &
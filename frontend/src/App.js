@@ -5,6 +5,30 @@ import axios from "axios";
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Follow next_cursor until a paginated list endpoint is exhausted
+const fetchAllPages = async (url) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const response = await axios.get(url, { params: { limit: 500, cursor } });
+    items.push(...response.data.items);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return items;
+};
+
+// Insert or replace a document keeping the server's list order: by the
+// sort field (due_date for tasks, start_datetime for activities), then id
+const SORT_FIELDS = { task: "due_date", activity: "start_datetime" };
+
+const upsertSorted = (items, doc, field) => {
+  const compare = (a, b) =>
+    (new Date(a[field]) - new Date(b[field])) || (a.id < b.id ? -1 : a.id > b.id ? 1 : 0);
+  const others = items.filter(item => item.id !== doc.id);
+  const index = others.findIndex(item => compare(doc, item) < 0);
+  return index === -1 ? [...others, doc] : [...others.slice(0, index), doc, ...others.slice(index)];
+};
+
 // Authentication Context
 const AuthContext = createContext();
 
@@ -29,36 +53,39 @@ const AuthProvider = ({ children }) => {
     setLoading(false);
   }, []);
 
-  const login = async (email, password) => {
-    // For demo purposes, we'll create a simple login system
+  // The server checks the password and sets the session cookie
+  const authenticate = async (path, payload, fallbackError) => {
     try {
-      // Create new user for demo (simplified authentication)
-      const userData = {
-        name: email.split('@')[0],
-        email: email,
-        year_level: 11,
-        subjects: ["Mathematics", "Physics", "Chemistry", "English", "History"]
-      };
-      const response = await axios.post(`${API}/users`, userData);
-      const foundUser = response.data;
-      
-      setUser(foundUser);
-      localStorage.setItem('currentUser', JSON.stringify(foundUser));
+      const response = await axios.post(`${API}/auth/${path}`, payload, { withCredentials: true });
+      setUser(response.data);
+      localStorage.setItem('currentUser', JSON.stringify(response.data));
       return { success: true };
     } catch (error) {
-      console.error('Login error:', error);
-      return { success: false, error: 'Login failed' };
+      console.error('Authentication error:', error);
+      const detail = error.response && error.response.data && error.response.data.detail;
+      return { success: false, error: typeof detail === 'string' ? detail : fallbackError };
     }
   };
 
-  const logout = () => {
+  const login = (email, password) => authenticate('login', { email, password }, 'Login failed');
+
+  const signup = (name, email, password, yearLevel) =>
+    authenticate('signup', { name, email, password, year_level: yearLevel }, 'Sign up failed');
+
+  const logout = async () => {
     setUser(null);
     localStorage.removeItem('currentUser');
+    try {
+      await axios.post(`${API}/auth/logout`, null, { withCredentials: true });
+    } catch (error) {
+      console.error('Logout error:', error);
+    }
   };
 
   const value = {
     user,
     login,
+    signup,
     logout,
     loading
   };
@@ -91,19 +118,59 @@ const MainApp = () => {
     }
   }, [user]);
 
+  // Patch local state from the server's change feed instead of refetching
+  useEffect(() => {
+    if (!user) return;
+    const source = new EventSource(`${API}/users/${user.id}/events`);
+    // Changes published while the stream was down are lost, so refetch
+    // everything once the browser has reconnected
+    let disconnected = false;
+    source.addEventListener("error", () => {
+      disconnected = true;
+    });
+    source.addEventListener("open", () => {
+      if (disconnected) {
+        disconnected = false;
+        loadUserData();
+      }
+    });
+    source.addEventListener("change", (message) => {
+      const change = JSON.parse(message.data);
+      if (change.action === "resync") {
+        loadUserData();
+        return;
+      }
+      const setItems = change.type === "task" ? setTasks : setActivities;
+      setItems(items => change.action === "deleted"
+        ? items.filter(item => item.id !== change.id)
+        : upsertSorted(items, change.document, SORT_FIELDS[change.type]));
+      refreshStats();
+    });
+    return () => source.close();
+  }, [user]);
+
+  const refreshStats = async () => {
+    try {
+      const statsRes = await axios.get(`${API}/users/${user.id}/stats`);
+      setStats(statsRes.data);
+    } catch (error) {
+      console.error("Error loading stats:", error);
+    }
+  };
+
   const loadUserData = async () => {
     if (!user) return;
     
     try {
       setAppLoading(true);
-      const [tasksRes, activitiesRes, statsRes] = await Promise.all([
-        axios.get(`${API}/users/${user.id}/tasks`),
-        axios.get(`${API}/users/${user.id}/activities`),
+      const [tasksData, activitiesData, statsRes] = await Promise.all([
+        fetchAllPages(`${API}/users/${user.id}/tasks`),
+        fetchAllPages(`${API}/users/${user.id}/activities`),
         axios.get(`${API}/users/${user.id}/stats`)
       ]);
       
-      setTasks(tasksRes.data);
-      setActivities(activitiesRes.data);
+      setTasks(tasksData);
+      setActivities(activitiesData);
       setStats(statsRes.data);
     } catch (error) {
       console.error("Error loading user data:", error);
@@ -120,9 +187,8 @@ const MainApp = () => {
   const createTask = async (taskData) => {
     try {
       const response = await axios.post(`${API}/users/${user.id}/tasks`, taskData);
-      setTasks([...tasks, response.data]);
+      setTasks(items => upsertSorted(items, response.data, SORT_FIELDS.task));
       setShowTaskForm(false);
-      await loadUserData();
       showNotification("✅ Task created and added to calendar!");
     } catch (error) {
       console.error("Error creating task:", error);
@@ -133,10 +199,15 @@ const MainApp = () => {
   const createActivity = async (activityData) => {
     try {
       const response = await axios.post(`${API}/users/${user.id}/activities`, activityData);
-      setActivities([...activities, response.data]);
+      setActivities(items => upsertSorted(items, response.data, SORT_FIELDS.activity));
       setShowActivityForm(false);
-      await loadUserData();
-      showNotification("✅ Activity created and added to calendar!");
+      const conflicts = response.data.conflicts || [];
+      if (conflicts.length > 0) {
+        const titles = [...new Set(conflicts.map(conflict => conflict.title))].join(", ");
+        showNotification(`⚠️ Activity created, but it overlaps with: ${titles}`);
+      } else {
+        showNotification("✅ Activity created and added to calendar!");
+      }
     } catch (error) {
       console.error("Error creating activity:", error);
       showNotification("❌ Failed to create activity. Please try again.");
@@ -146,10 +217,9 @@ const MainApp = () => {
   const toggleTaskCompletion = async (taskId, completed) => {
     try {
       const response = await axios.put(`${API}/tasks/${taskId}`, { completed });
-      setTasks(tasks.map(task => 
-        task.id === taskId ? { ...task, completed } : task
+      setTasks(items => items.map(task => 
+        task.id === taskId ? response.data : task
       ));
-      await loadUserData();
       showNotification(completed ? "✅ Task completed!" : "📝 Task marked as incomplete");
     } catch (error) {
       console.error("Error updating task:", error);
@@ -251,7 +321,7 @@ const MainApp = () => {
 };
 
 const LoginPage = () => {
-  const { login } = useAuth();
+  const { login, signup } = useAuth();
   const [isLogin, setIsLogin] = useState(true);
   const [formData, setFormData] = useState({
     email: "",
@@ -267,7 +337,9 @@ const LoginPage = () => {
     setLoading(true);
     setError("");
 
-    const result = await login(formData.email, formData.password);
+    const result = isLogin
+      ? await login(formData.email, formData.password)
+      : await signup(formData.name, formData.email, formData.password, formData.yearLevel);
     
     if (!result.success) {
       setError(result.error || "Login failed");
@@ -398,7 +470,7 @@ const LoginPage = () => {
         </div>
 
         <div className="text-center text-sm text-gray-500">
-          <p>Demo: Use any email to create/login to your account</p>
+          <p>New here? Choose Sign Up to create an account with a password</p>
         </div>
       </div>
     </div>
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+import uuid
+
+import httpx
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+# Minimum bcrypt cost keeps password tests fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import server
+
+def mongo_client():
+    return AsyncIOMotorClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=2000)
+
+def mongo_available() -> bool:
+    client = MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        return False
+    finally:
+        client.close()
+    return True
+
+@pytest.fixture(scope="session")
+def mongo_server():
+    if not mongo_available():
+        pytest.skip(f"MongoDB is not reachable at {os.environ['MONGO_URL']}")
+
+@pytest.fixture
+def run_with_db(mongo_server, monkeypatch):
+    # Runs `scenario(db)` on a fresh event loop against a scratch database
+    # that server.py's handlers also use; the database is dropped afterwards
+    def run(scenario, indexes: bool = True):
+        async def main():
+            client = mongo_client()
+            name = f"test_{uuid.uuid4().hex[:8]}"
+            monkeypatch.setattr(server, "db", client[name])
+            monkeypatch.setattr(server, "change_hub", server.InMemoryChangeHub())
+            try:
+                if indexes:
+                    await server.ensure_indexes()
+                return await scenario(server.db)
+            finally:
+                await client.drop_database(name)
+                client.close()
+        return asyncio.run(main())
+    return run
+
+def api_client() -> httpx.AsyncClient:
+    # In-process client on the caller's event loop, so handlers share the
+    # scratch database's Motor client; startup hooks are not run
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://testserver")
+
+@pytest.fixture(autouse=True)
+def reset_login_attempts():
+    server.login_attempts.clear()
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import numpy as np
+
+import server
+
+def test_task_columns_fill_defaults_across_batches(run_with_db, monkeypatch):
+    monkeypatch.setattr(server, "ANALYTICS_BATCH_SIZE", 2)
+    tasks = [
+        {"id": "t1", "user_id": "u1", "subject": "Maths", "due_date": datetime(2026, 10, 5, 9),
+         "completed": True, "completed_at": datetime(2026, 10, 5, 8), "estimated_duration": 30},
+        {"id": "t2", "user_id": "u1", "subject": None, "due_date": datetime(2026, 10, 6, 9),
+         "completed": False, "estimated_duration": 0},
+        {"id": "t3", "user_id": "u1", "due_date": datetime(2026, 10, 7, 9)},
+        {"id": "t4", "user_id": "u2", "subject": "Art", "due_date": datetime(2026, 10, 7, 9)},
+    ]
+
+    async def scenario(db):
+        await db.tasks.insert_many(tasks)
+        return await server.load_task_columns({"user_id": "u1"})
+
+    columns = run_with_db(scenario)
+    order = np.argsort(columns["due"])
+    assert columns["subject"][order].tolist() == ["Maths", "", ""]
+    assert columns["completed"][order].tolist() == [True, False, False]
+    assert columns["minutes"][order].tolist() == [30, 60, 60]
+    assert np.isnat(columns["completed_at"][order]).tolist() == [False, True, True]
+    assert columns["due"].dtype == np.dtype("datetime64[ms]")
+
+def test_task_columns_for_no_tasks(run_with_db):
+    async def scenario(db):
+        return await server.load_task_columns({"user_id": "nobody"})
+
+    columns = run_with_db(scenario)
+    assert all(len(column) == 0 for column in columns.values())
+    analytics = server.compute_task_analytics(columns, datetime(2026, 10, 5), 4, 0)
+    assert analytics["task_count"] == 0
@@ -0,0 +1,120 @@
+import ipaddress
+from datetime import datetime
+
+import pytest
+from starlette.requests import Request
+
+import server
+from tests.conftest import api_client
+
+async def insert_user(db, **fields):
+    user = {"id": "u1", "name": "Sam", "email": "sam@school.edu", "year_level": 10, "subjects": [],
+            "theme": "light", "default_view": "month", "created_at": datetime(2024, 1, 1), **fields}
+    await db.users.insert_one(user)
+    return user
+
+def test_account_without_password_cannot_be_claimed_by_logging_in(run_with_db):
+    async def scenario(db):
+        await insert_user(db)
+        async with api_client() as client:
+            response = await client.post("/login", data={"email": "sam@school.edu", "password": "guess"})
+        user = await db.users.find_one({"id": "u1"})
+        return response, user
+
+    response, user = run_with_db(scenario)
+    assert response.status_code == 200
+    assert "have a password yet" in response.text
+    assert "password_hash" not in user
+
+def test_set_password_link_is_single_use_and_enables_login(run_with_db):
+    async def scenario(db):
+        await insert_user(db)
+        token = await server.create_password_reset("u1")
+        async with api_client() as client:
+            page = await client.get("/reset-password", params={"token": token})
+            first = await client.post("/reset-password", data={"token": token, "password": "s3cret"})
+            second = await client.post("/reset-password", data={"token": token, "password": "other"})
+        async with api_client() as client:
+            wrong = await client.post("/login", data={"email": "sam@school.edu", "password": "other"})
+            right = await client.post("/login", data={"email": "sam@school.edu", "password": "s3cret"})
+        return page, first, second, wrong, right
+
+    page, first, second, wrong, right = run_with_db(scenario)
+    assert page.status_code == 200
+    assert first.status_code == 302 and first.headers["location"] == "/dashboard"
+    assert second.status_code == 400
+    assert "Incorrect email or password." in wrong.text
+    assert right.status_code == 302 and right.headers["location"] == "/dashboard"
+
+def test_unknown_reset_token_is_rejected(run_with_db):
+    async def scenario(db):
+        async with api_client() as client:
+            return await client.get("/reset-password", params={"token": "not-a-token"})
+
+    assert run_with_db(scenario).status_code == 400
+
+def test_api_login_checks_the_password_and_starts_a_session(run_with_db):
+    async def scenario(db):
+        async with api_client() as client:
+            signup = await client.post("/api/auth/signup", json={
+                "name": "Sam", "email": "sam@school.edu", "password": "s3cret", "year_level": 10
+            })
+            again = await client.post("/api/auth/signup", json={
+                "name": "Other", "email": "sam@school.edu", "password": "x", "year_level": 10
+            })
+        async with api_client() as client:
+            wrong = await client.post("/api/auth/login", json={"email": "sam@school.edu", "password": "guess"})
+            unknown = await client.post("/api/auth/login", json={"email": "alex@school.edu", "password": "guess"})
+            right = await client.post("/api/auth/login", json={"email": "sam@school.edu", "password": "s3cret"})
+        return signup, again, wrong, unknown, right
+
+    signup, again, wrong, unknown, right = run_with_db(scenario)
+    assert signup.status_code == 200 and "password_hash" not in signup.json()
+    assert again.status_code == 400
+    assert wrong.status_code == 401 and unknown.status_code == 401
+    assert wrong.json()["detail"] == unknown.json()["detail"] == "Incorrect email or password."
+    assert right.status_code == 200 and right.json()["id"] == signup.json()["id"]
+    assert "session" in right.cookies and "session" not in wrong.cookies
+
+def test_api_login_refuses_accounts_without_a_password(run_with_db):
+    async def scenario(db):
+        await insert_user(db)
+        async with api_client() as client:
+            return await client.post("/api/auth/login", json={"email": "sam@school.edu", "password": "guess"})
+
+    response = run_with_db(scenario)
+    assert response.status_code == 401
+    assert "have a password yet" in response.json()["detail"]
+
+def make_request(host="203.0.113.7", headers=()):
+    return Request({"type": "http", "method": "POST", "path": "/login", "headers": list(headers), "client": (host, 1234)})
+
+def test_signups_and_logins_are_limited_separately(monkeypatch):
+    monkeypatch.setattr(server, "LOGIN_RATE_LIMIT", 3)
+    monkeypatch.setattr(server, "SIGNUP_RATE_LIMIT", 2)
+    request = make_request()
+    assert [server.admit_login_attempt(request, "signup") for _ in range(3)] == [True, True, False]
+    assert [server.admit_login_attempt(request) for _ in range(4)] == [True, True, True, False]
+    assert server.admit_login_attempt(make_request("198.51.100.1"))
+
+@pytest.mark.parametrize("peer, forwarded, expected", [
+    ("203.0.113.9", "198.51.100.1", "203.0.113.9"),  # untrusted peer: header ignored
+    ("127.0.0.1", "198.51.100.1", "198.51.100.1"),
+    ("127.0.0.1", "198.51.100.1, 10.0.0.5", "10.0.0.5"),  # spoofed first hop is skipped
+    ("127.0.0.1", "198.51.100.1, 10.1.2.3", "198.51.100.1"),  # 10.1.0.0/16 is a trusted proxy
+    ("127.0.0.1", None, "127.0.0.1"),
+])
+def test_client_address_trusts_only_configured_proxies(monkeypatch, peer, forwarded, expected):
+    monkeypatch.setattr(server, "TRUSTED_PROXIES", (
+        ipaddress.ip_network("127.0.0.1"), ipaddress.ip_network("10.1.0.0/16")
+    ))
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    assert server.client_address(make_request(peer, headers)) == expected
+
+def test_forwarded_clients_get_their_own_login_limit(monkeypatch):
+    monkeypatch.setattr(server, "TRUSTED_PROXIES", (ipaddress.ip_network("127.0.0.1"),))
+    monkeypatch.setattr(server, "LOGIN_RATE_LIMIT", 1)
+    first = make_request("127.0.0.1", [(b"x-forwarded-for", b"198.51.100.1")])
+    second = make_request("127.0.0.1", [(b"x-forwarded-for", b"198.51.100.2")])
+    assert server.admit_login_attempt(first) and server.admit_login_attempt(second)
+    assert not server.admit_login_attempt(first)
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from tests.conftest import api_client
+
+USER = {"id": "u1", "name": "Sam", "email": "sam@school.edu", "year_level": 10, "subjects": [],
+        "created_at": datetime(2024, 1, 1)}
+
+TASK = {"title": "Essay", "subject": "English", "task_type": "assignment", "due_date": "2026-10-20T17:00:00"}
+
+def run_batch(run_with_db, operations, ordered=True, setup=None):
+    async def scenario(db):
+        await db.users.insert_one(dict(USER))
+        if setup:
+            await setup(db)
+        async with api_client() as client:
+            response = await client.post("/api/users/u1/batch", json={"operations": operations, "ordered": ordered})
+        tasks = {doc["id"]: doc async for doc in db.tasks.find({}, {"_id": 0})}
+        activities = {doc["id"]: doc async for doc in db.activities.find({}, {"_id": 0})}
+        user = await db.users.find_one({"id": "u1"})
+        return response, tasks, activities, user.get("data_version", 0)
+    return run_with_db(scenario)
+
+def test_dates_and_times_are_stored_in_bson_encodable_form(run_with_db):
+    response, tasks, activities, version = run_batch(run_with_db, [
+        {"action": "create", "target": "tasks", "data": {**TASK, "due_time": "17:00"}},
+        {"action": "create", "target": "activities", "data": {
+            "title": "Practice", "activity_type": "sports",
+            "start_datetime": "2026-10-05T16:00:00", "end_datetime": "2026-10-05T17:00:00",
+            "recurrence": {"frequency": "weekly", "end_date": "2026-12-01"}
+        }},
+    ])
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 2
+    [task] = tasks.values()
+    [activity] = activities.values()
+    assert task["due_time"] == "17:00:00"
+    assert activity["recurrence"]["end_date"].replace(microsecond=0) == datetime(2026, 12, 1, 23, 59, 59)
+    assert version == 1
+
+def test_complete_parses_completed_as_a_bool(run_with_db):
+    async def setup(db):
+        await db.tasks.insert_one({"id": "t1", "user_id": "u1", **TASK, "completed": True,
+                                   "due_date": datetime(2026, 10, 20)})
+
+    response, tasks, _, _ = run_batch(run_with_db, [
+        {"action": "complete", "target": "tasks", "id": "t1", "data": {"completed": "false"}},
+        {"action": "complete", "target": "tasks", "id": "t1", "data": {"completed": "sometimes"}},
+    ], ordered=False, setup=setup)
+    statuses = [result["status"] for result in response.json()["results"]]
+    assert statuses == ["ok", "error"]
+    assert tasks["t1"]["completed"] is False
+    assert tasks["t1"]["completed_at"] is None
+
+def test_ordered_batch_stops_at_the_first_invalid_operation(run_with_db):
+    response, tasks, _, version = run_batch(run_with_db, [
+        {"action": "create", "target": "tasks", "data": TASK},
+        {"action": "create", "target": "tasks", "data": {**TASK, "task_type": "nope"}},
+        {"action": "create", "target": "tasks", "data": TASK},
+    ])
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["ok", "error", "skipped"]
+    assert len(tasks) == 1
+    assert version == 1
+
+def test_operations_on_other_users_items_are_rejected(run_with_db):
+    async def setup(db):
+        await db.tasks.insert_one({"id": "theirs", "user_id": "someone-else", **TASK})
+
+    response, tasks, _, version = run_batch(run_with_db, [
+        {"action": "delete", "target": "tasks", "id": "theirs"},
+    ], setup=setup)
+    assert response.json()["results"][0] == {"index": 0, "status": "error", "error": "Task not found"}
+    assert "theirs" in tasks
+    assert version == 0
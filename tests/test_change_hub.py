@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+import server
+
+class FakeTailableCursor:
+    # Serves one batch per `async for`; once out of batches it either dies or,
+    # like an awaitable cursor with nothing new, waits
+    def __init__(self, *batches, dies=True):
+        self.batches = list(batches)
+        self.dies = dies
+        self.docs = None
+
+    @property
+    def alive(self):
+        return bool(self.batches) or not self.dies
+
+    def __aiter__(self):
+        self.docs = iter(self.batches.pop(0)) if self.batches else None
+        return self
+
+    async def __anext__(self):
+        if self.docs is None:
+            await asyncio.Event().wait()
+        for doc in self.docs:
+            return doc
+        raise StopAsyncIteration
+
+class FakeChangeLog:
+    def __init__(self, newest, cursors):
+        self.newest = newest
+        self.cursors = list(cursors)
+
+    async def find_one(self, *args, **kwargs):
+        return {"_id": self.newest}
+
+    def find(self, *args, **kwargs):
+        return self.cursors.pop(0)
+
+def entry(entry_id):
+    return {"_id": entry_id, "user_id": "u1", "event": {"id": entry_id}}
+
+def test_change_hub_requires_the_whole_interface():
+    with pytest.raises(TypeError):
+        server.ChangeHub()
+
+def test_tail_resumes_in_natural_order_and_resyncs_after_an_overrun(monkeypatch):
+    # Ids are deliberately not increasing: entries from different workers
+    # land in the capped collection in any ObjectId order
+    a, b, c, e, f, g, h = (entry(entry_id) for entry_id in ("5", "3", "9", "1", "7", "2", "8"))
+    change_log = FakeChangeLog("3", [
+        FakeTailableCursor([a, b, c], [e]),
+        # Reopened after dying: starts at the oldest entry again
+        FakeTailableCursor([a, b, c, e, f]),
+        # f has been overwritten in the meantime
+        FakeTailableCursor([g, h], dies=False),
+    ])
+    monkeypatch.setattr(server, "db", {"change_log": change_log})
+    monkeypatch.setattr(server, "CHANGE_LOG_RETRY_SECONDS", 0)
+
+    async def main():
+        hub = server.MongoChangeHub()
+        queue = hub.subscribe("u1")
+        received = []
+
+        async def consume():
+            while True:
+                received.append(await queue.get())
+
+        consumer = asyncio.create_task(consume())
+        tail = asyncio.create_task(hub._tail())
+        for _ in range(20):
+            await asyncio.sleep(0)
+        tail.cancel()
+        consumer.cancel()
+        return received
+
+    received = asyncio.run(main())
+    assert received == [{"id": "9"}, {"id": "1"}, {"id": "7"}, {"action": "resync", "version": None}]
+    assert change_log.cursors == []
@@ -0,0 +1,64 @@
+import random
+from datetime import datetime, timedelta
+
+import server
+
+def interval(start_hour, end_hour, name):
+    base = datetime(2026, 10, 5)
+    return base + timedelta(hours=start_hour), base + timedelta(hours=end_hour), name
+
+def test_overlapping_pairs_skips_touching_intervals():
+    intervals = [interval(9, 11, "a"), interval(10, 12, "b"), interval(11, 13, "c"), interval(14, 15, "d")]
+    pairs = [(first[2], second[2]) for first, second in server.overlapping_pairs(intervals)]
+    assert pairs == [("a", "b"), ("b", "c")]
+
+def activity(activity_id, start, minutes, recurrence=None):
+    return {
+        "id": activity_id, "user_id": "u1", "title": activity_id, "activity_type": "other",
+        "start_datetime": start, "end_datetime": start + timedelta(minutes=minutes),
+        "recurrence": recurrence, "updated_at": datetime(2026, 1, 1)
+    }
+
+def test_conflicts_cover_one_off_and_recurring_activities(run_with_db):
+    async def scenario(db):
+        await db.activities.insert_many([
+            activity("gym", datetime(2026, 10, 6, 17), 60, {"frequency": "weekly", "days_of_week": [1]}),
+            activity("dentist", datetime(2026, 10, 20, 17, 15), 30),
+            activity("before", datetime(2026, 10, 6, 16), 60),
+        ])
+        tutoring = activity("tutoring", datetime(2026, 10, 13, 16, 30), 60,
+                            {"frequency": "weekly", "end_date": datetime(2026, 10, 27, 23, 59)})
+        return await server.find_activity_conflicts(tutoring)
+
+    conflicts = run_with_db(scenario)
+    assert [(conflict["id"], conflict["start_datetime"].day) for conflict in conflicts] == [
+        ("gym", 13), ("gym", 20), ("dentist", 20), ("gym", 27)
+    ]
+
+def test_conflicts_match_a_brute_force_scan(run_with_db):
+    generator = random.Random(6)
+    window_start = datetime(2026, 10, 1)
+    activities = [
+        activity(f"a{number}", window_start + timedelta(minutes=15 * generator.randrange(4 * 24 * 30)),
+                 generator.choice([30, 60, 90, 600]),
+                 generator.choice([None, {"frequency": "daily", "interval": 3}, {"frequency": "weekly"}]))
+        for number in range(200)
+    ]
+    candidate = activity("new", datetime(2026, 10, 10, 15), 120, {"frequency": "weekly", "interval": 2})
+
+    async def scenario(db):
+        await db.activities.insert_many([dict(item) for item in activities])
+        return await server.find_activity_conflicts(candidate)
+
+    conflicts = run_with_db(scenario)
+    horizon = candidate["start_datetime"] + server.CONFLICT_HORIZON
+    occurrences = server.expand_activity(candidate, candidate["start_datetime"], horizon)
+    expected = set()
+    for other in activities:
+        duration = other["end_datetime"] - other["start_datetime"]
+        for start, end in server.expand_activity(other, occurrences[0][0] - duration, occurrences[-1][1]):
+            if any(start < occurrence_end and end > occurrence_start
+                   for occurrence_start, occurrence_end in occurrences):
+                expected.add((other["id"], start))
+    assert {(conflict["id"], conflict["start_datetime"]) for conflict in conflicts} == expected
+    assert expected
@@ -0,0 +1,17 @@
+import asyncio
+import json
+
+import server
+
+def test_readiness_waits_for_every_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "STARTUP_READY_DIR", str(tmp_path))
+    monkeypatch.setattr(server, "WEB_CONCURRENCY", 2)
+    monkeypatch.setattr(server.app.state, "ready", True)
+    server.ready_marker().touch()
+
+    response = asyncio.run(server.health_ready())
+    assert response.status_code == 503
+    assert json.loads(response.body) == {"status": "starting", "workers_ready": 1, "workers": 2}
+
+    (tmp_path / "another-worker").touch()
+    assert server.workers_ready() == 2
@@ -0,0 +1,212 @@
+import io
+from datetime import date, datetime
+
+import pytest
+
+import server
+from tests.conftest import api_client
+
+def parse_ics(text: str) -> list:
+    calendar = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n" + text.strip().replace("\n", "\r\n") + "\r\nEND:VCALENDAR\r\n"
+    return list(server.iter_ics_records(io.StringIO(calendar)))
+
+def parse_event(text: str) -> dict:
+    [(kind, fields, _)] = parse_ics(f"BEGIN:VEVENT\n{text.strip()}\nEND:VEVENT")
+    assert kind == "activity"
+    if isinstance(fields, Exception):
+        raise fields
+    return fields
+
+def weekdays(fields: dict, count: int = 6) -> list:
+    starts = server.iter_occurrence_starts(
+        fields["start_datetime"], fields["recurrence"], fields["start_datetime"], datetime(2030, 1, 1)
+    )
+    return [(start.weekday(), start.time()) for start, _ in zip(starts, range(count))]
+
+def test_folded_lines_escapes_and_nested_components_are_handled():
+    fields = parse_event("""
+SUMMARY:Soccer practice\\, team A
+DESCRIPTION:bring boots and
+  water
+DTSTART:20261005T160000Z
+DTEND:20261005T173000Z
+CATEGORIES:Sports
+BEGIN:VALARM
+SUMMARY:not the event title
+END:VALARM
+""")
+    assert fields["title"] == "Soccer practice, team A"
+    assert fields["description"] == "bring boots and water"
+    assert fields["activity_type"] == "sports"
+    assert fields["end_datetime"] == datetime(2026, 10, 5, 17, 30)
+
+@pytest.mark.parametrize("zone, local_time, expected_days", [
+    # Mon/Wed 08:00 in Sydney is Sun/Tue 21:00 UTC
+    ("Australia/Sydney", "080000", [1, 6]),
+    # Mon/Wed 18:00 in Los Angeles is Tue/Thu 01:00 UTC
+    ("America/Los_Angeles", "180000", [1, 3]),
+    ("Europe/London", "120000", [0, 2]),
+])
+def test_byday_follows_the_utc_date_of_a_tzid_start(zone, local_time, expected_days):
+    fields = parse_event(f"""
+SUMMARY:Club
+DTSTART;TZID={zone}:20261005T{local_time}
+DTEND;TZID={zone}:20261005T{local_time[:2]}3000
+RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=4
+""")
+    assert fields["recurrence"]["days_of_week"] == expected_days
+    assert {day for day, _ in weekdays(fields)} == set(expected_days)
+    assert len(list(server.iter_occurrence_starts(
+        fields["start_datetime"], fields["recurrence"], fields["start_datetime"], datetime(2030, 1, 1)
+    ))) == 4
+
+def test_until_keeps_its_time_of_day():
+    fields = parse_event("""
+SUMMARY:Daily
+DTSTART:20261005T160000Z
+RRULE:FREQ=DAILY;UNTIL=20261008T120000Z
+""")
+    assert fields["recurrence"]["end_date"] == datetime(2026, 10, 8, 12, 0)
+    occurrences = list(server.iter_occurrence_starts(
+        fields["start_datetime"], fields["recurrence"], datetime(2026, 1, 1), datetime(2027, 1, 1)
+    ))
+    assert occurrences[-1] == datetime(2026, 10, 7, 16, 0)
+
+def test_date_until_includes_the_whole_day():
+    fields = parse_event("""
+SUMMARY:Daily
+DTSTART:20261005T160000Z
+RRULE:FREQ=DAILY;UNTIL=20261008
+""")
+    assert fields["recurrence"]["end_date"] == date(2026, 10, 8)
+
+def test_count_is_capped():
+    with pytest.raises(ValueError, match="COUNT"):
+        parse_event("""
+SUMMARY:Forever
+DTSTART:20261005T160000Z
+RRULE:FREQ=DAILY;COUNT=1000000000
+""")
+
+def test_exdate_removing_an_occurrence_is_rejected():
+    with pytest.raises(ValueError, match="EXDATE"):
+        parse_event("""
+SUMMARY:Weekly
+DTSTART:20261005T160000Z
+RRULE:FREQ=WEEKLY;BYDAY=MO
+EXDATE:20261012T160000Z
+""")
+
+def test_rdate_is_rejected():
+    with pytest.raises(ValueError, match="RDATE"):
+        parse_event("""
+SUMMARY:Weekly
+DTSTART:20261005T160000Z
+RRULE:FREQ=WEEKLY
+RDATE:20261007T160000Z
+""")
+
+def test_unsupported_rules_are_reported_per_item():
+    records = parse_ics("""
+BEGIN:VEVENT
+SUMMARY:Yearly
+DTSTART:20261005T160000Z
+RRULE:FREQ=YEARLY
+END:VEVENT
+BEGIN:VTODO
+SUMMARY:Essay
+DUE;VALUE=DATE:20261020
+END:VTODO
+""")
+    count, docs, errors = server.parse_import_batch("u1", iter(records), 10)
+    assert count == 2
+    assert [doc["title"] for doc in docs["task"]] == ["Essay"]
+    assert errors == [{"position": 3, "error": "Unsupported RRULE frequency 'YEARLY'"}]
+
+def test_vtodo_maps_to_a_task():
+    [(kind, fields, _)] = parse_ics("""
+BEGIN:VTODO
+SUMMARY:Essay
+DUE;VALUE=DATE:20261020
+PRIORITY:2
+CATEGORIES:English,homework
+DURATION:PT1H30M
+STATUS:COMPLETED
+COMPLETED:20261018T100000Z
+END:VTODO
+""")
+    doc = server.build_import_document("u1", kind, fields)
+    assert doc["due_date"] == datetime(2026, 10, 20, 23, 59)
+    assert (doc["subject"], doc["task_type"], doc["priority"]) == ("English", "homework", "high")
+    assert doc["estimated_duration"] == 90
+    assert doc["completed"] and doc["completed_at"] == datetime(2026, 10, 18, 10, 0)
+
+def test_csv_rows_are_validated():
+    data = (
+        "type,title,subject,task_type,due_date,priority,completed\n"
+        "task,Quiz,Math,test,2026-10-21T09:00,high,yes\n"
+        "task,Bad,Math,nope,2026-10-21,low,\n"
+        "activity,Run,,,,,\n"
+    )
+    # Spreadsheet exports often start with a UTF-8 byte order mark
+    records = server.import_text_stream(io.BytesIO(b"\xef\xbb\xbf" + data.encode()), "csv")
+    count, docs, errors = server.parse_import_batch("u1", records, 10)
+    assert count == 3
+    assert [doc["title"] for doc in docs["task"]] == ["Quiz"]
+    assert docs["task"][0]["completed"] is True
+    assert [error["position"] for error in errors] == [3, 4]
+
+def test_csv_recurrence_columns():
+    data = (
+        "title,activity_type,start_datetime,end_datetime,frequency,days_of_week,end_date\n"
+        "Run,sports,2026-10-05T07:00,2026-10-05T08:00,weekly,MO;3,2026-12-01\n"
+    )
+    records = server.iter_csv_records(io.StringIO(data, newline=""), "activity")
+    _, docs, errors = server.parse_import_batch("u1", records, 10)
+    assert errors == []
+    recurrence = docs["activity"][0]["recurrence"]
+    assert recurrence["days_of_week"] == [0, 3]
+    assert recurrence["end_date"] == datetime(2026, 12, 1, 23, 59, 59, 999999)
+
+def test_content_hash_ignores_storage_round_trip_differences():
+    doc = server.build_import_document("u1", "activity", {
+        "title": "Run", "activity_type": "sports",
+        "start_datetime": datetime(2026, 10, 5, 7, 0, 0, 123456), "end_datetime": datetime(2026, 10, 5, 8),
+        "recurrence": {"frequency": "weekly", "end_date": date(2026, 12, 1)}
+    })
+    stored = {
+        **doc, "activity_type": "sports", "start_datetime": datetime(2026, 10, 5, 7, 0, 0, 123000),
+        "recurrence": {**doc["recurrence"], "end_date": datetime(2026, 12, 1, 23, 59, 59, 999000)}
+    }
+    assert server.content_hash("activity", doc) == server.content_hash("activity", stored)
+
+def test_calendar_feed_events_import_back_unchanged():
+    # Starts on a Tuesday but runs Mon/Wed, so the feed adds an EXDATE for DTSTART
+    activity = {
+        "id": "a1", "title": "Practice; bring kit", "activity_type": "sports", "location": "Field 2",
+        "start_datetime": datetime(2026, 10, 6, 16), "end_datetime": datetime(2026, 10, 6, 17, 30),
+        "recurrence": {"frequency": "weekly", "interval": 2, "days_of_week": [0, 2],
+                       "end_date": datetime(2026, 12, 31, 23, 59, 59, 999000)}
+    }
+    lines = server.activity_vevent(activity)
+    assert any(line.startswith("EXDATE:") for line in lines)
+    fields = parse_event("\n".join(lines[1:-1]))
+    window = (datetime(2026, 1, 1), datetime(2027, 6, 1))
+    assert fields["title"] == activity["title"]
+    assert list(server.iter_occurrence_starts(fields["start_datetime"], fields["recurrence"], *window)) == \
+        list(server.iter_occurrence_starts(activity["start_datetime"], activity["recurrence"], *window))
+
+def test_feed_is_rerendered_after_a_rename(run_with_db):
+    async def scenario(db):
+        await db.users.insert_one({"id": "u1", "name": "Sam", "email": "sam@school.edu", "year_level": 10,
+                                   "created_at": datetime(2024, 1, 1)})
+        async with api_client() as client:
+            first = await client.get("/api/users/u1/calendar.ics")
+            await client.put("/api/users/u1", json={"name": "Sam Lee"})
+            second = await client.get("/api/users/u1/calendar.ics", headers={"If-None-Match": first.headers["etag"]})
+        return first, second
+
+    first, second = run_with_db(scenario)
+    assert "X-WR-CALNAME:Sam\r\n" in first.text
+    assert second.status_code == 200
+    assert "X-WR-CALNAME:Sam Lee\r\n" in second.text
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+
+import server
+
+async def insert_duplicates(db):
+    await db.users.insert_many([
+        {"id": "old", "email": "sam@school.edu", "created_at": datetime(2024, 1, 1)},
+        {"id": "newer", "email": "sam@school.edu", "created_at": datetime(2024, 2, 1)},
+        {"id": "with-password", "email": "sam@school.edu", "created_at": datetime(2024, 3, 1),
+         "password_hash": "hash"},
+        {"id": "other", "email": "alex@school.edu", "created_at": datetime(2024, 1, 1)},
+    ])
+    await db.tasks.insert_many([
+        {"id": "t1", "user_id": "old"},
+        {"id": "t2", "user_id": "newer"},
+        {"id": "t3", "user_id": "other"},
+    ])
+    await db.activities.insert_one({"id": "a1", "user_id": "newer"})
+
+def test_duplicate_emails_are_only_reported_by_default(run_with_db, caplog):
+    async def scenario(db):
+        await insert_duplicates(db)
+        with pytest.raises(RuntimeError, match="MERGE_DUPLICATE_EMAILS=1"):
+            await server.run_migrations()
+        return (
+            await db.users.count_documents({}),
+            await db.tasks.count_documents({"user_id": "with-password"}),
+            await db.migrations.find_one({"_id": "users_merge_duplicate_emails"})
+        )
+
+    users, moved_tasks, recorded = run_with_db(scenario, indexes=False)
+    assert (users, moved_tasks, recorded) == (4, 0, None)
+    assert "Would merge duplicate users for sam@school.edu into with-password: old, newer (2 tasks, 1 activities)" \
+        in caplog.text
+
+def test_duplicate_emails_are_merged_before_the_unique_index(run_with_db, monkeypatch):
+    monkeypatch.setattr(server, "MERGE_DUPLICATE_EMAILS", True)
+
+    async def scenario(db):
+        await insert_duplicates(db)
+        await server.run_migrations()
+        await server.ensure_indexes()
+
+        users = {user["id"] async for user in db.users.find({}, {"id": 1})}
+        owners = {doc["id"]: doc["user_id"] async for doc in db.tasks.find({}, {"id": 1, "user_id": 1})}
+        activity = await db.activities.find_one({"id": "a1"})
+        backups = {user["id"]: user["merged_into"] async for user in db.users_merged.find()}
+        return users, owners, activity["user_id"], backups
+
+    users, owners, activity_owner, backups = run_with_db(scenario, indexes=False)
+    assert users == {"with-password", "other"}
+    assert owners == {"t1": "with-password", "t2": "with-password", "t3": "other"}
+    assert activity_owner == "with-password"
+    assert backups == {"old": "with-password", "newer": "with-password"}
+
+def test_without_passwords_the_oldest_user_is_kept(run_with_db, monkeypatch):
+    monkeypatch.setattr(server, "MERGE_DUPLICATE_EMAILS", True)
+
+    async def scenario(db):
+        await db.users.insert_many([
+            {"id": "second", "email": "sam@school.edu", "created_at": datetime(2024, 2, 1)},
+            {"id": "first", "email": "sam@school.edu", "created_at": datetime(2024, 1, 1)},
+        ])
+        await server.run_migrations()
+        return [user["id"] async for user in db.users.find()]
+
+    assert run_with_db(scenario, indexes=False) == ["first"]
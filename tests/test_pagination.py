@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from tests.conftest import api_client
+
+def test_cursor_round_trip():
+    cursor = server.encode_cursor(datetime(2026, 10, 5, 9, 30, 15, 250000), "task-7")
+    assert "=" not in cursor
+    assert server.decode_cursor(cursor) == (datetime(2026, 10, 5, 9, 30, 15, 250000), "task-7")
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm90IGpzb24", server.encode_cursor(datetime(2026, 1, 1), "x")[:-4]])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        server.decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+def test_task_pages_cover_ties_on_the_sort_key(run_with_db):
+    due = datetime(2026, 10, 5)
+    tasks = [
+        {"id": f"t{number:02d}", "user_id": "u1", "title": f"Task {number}", "subject": "Maths",
+         "task_type": "homework", "priority": "medium", "completed": number % 4 == 0,
+         "due_date": due + timedelta(days=number // 3), "created_at": due, "updated_at": due}
+        for number in range(10)
+    ]
+
+    async def scenario(db):
+        await db.users.insert_one({"id": "u1", "name": "Sam", "email": "sam@school.edu", "year_level": 10,
+                                   "created_at": datetime(2024, 1, 1)})
+        await db.tasks.insert_many([dict(task) for task in reversed(tasks)])
+        pages, cursor = [], None
+        async with api_client() as client:
+            while True:
+                params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+                page = (await client.get("/api/users/u1/tasks", params=params)).json()
+                pages.append([item["id"] for item in page["items"]])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+            pending = (await client.get("/api/users/u1/tasks", params={"completed": "false", "limit": 100})).json()
+            invalid = await client.get("/api/users/u1/tasks", params={"cursor": "garbage"})
+        return pages, pending, invalid
+
+    pages, pending, invalid = run_with_db(scenario)
+    assert pages == [["t00", "t01", "t02"], ["t03", "t04", "t05"], ["t06", "t07", "t08"], ["t09"]]
+    assert [item["id"] for item in pending["items"]] == ["t01", "t02", "t03", "t05", "t06", "t07", "t09"]
+    assert pending["next_cursor"] is None
+    assert invalid.status_code == 400
+
+def test_calendar_flags_truncated_ranges(run_with_db, monkeypatch):
+    monkeypatch.setattr(server, "CALENDAR_LIMIT", 3)
+    due = datetime(2026, 10, 5)
+    tasks = [
+        {"id": f"t{number}", "user_id": "u1", "title": f"Task {number}", "subject": "Maths",
+         "task_type": "homework", "priority": "medium", "completed": False,
+         "due_date": due + timedelta(days=number), "created_at": due, "updated_at": due}
+        for number in range(5)
+    ]
+
+    async def scenario(db):
+        await db.users.insert_one({"id": "u1", "name": "Sam", "email": "sam@school.edu", "year_level": 10,
+                                   "created_at": datetime(2024, 1, 1)})
+        await db.tasks.insert_many([dict(task) for task in reversed(tasks)])
+        async with api_client() as client:
+            full = (await client.get("/api/users/u1/calendar")).json()
+            window = (await client.get("/api/users/u1/calendar", params={
+                "start_date": "2026-10-06T00:00:00", "end_date": "2026-10-08T00:00:00"
+            })).json()
+        return full, window
+
+    full, window = run_with_db(scenario)
+    assert [task["id"] for task in full["tasks"]] == ["t0", "t1", "t2"]
+    assert full["truncated"] is True
+    assert [task["id"] for task in window["tasks"]] == ["t1", "t2", "t3"]
+    assert window["truncated"] is False
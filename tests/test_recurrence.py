@@ -0,0 +1,78 @@
+from datetime import date, datetime, timedelta
+
+import server
+from tests.conftest import api_client
+
+def starts(series_start, recurrence, window_start, window_end):
+    return list(server.iter_occurrence_starts(series_start, recurrence, window_start, window_end))
+
+def test_daily_interval_is_aligned_to_the_series_start():
+    occurrences = starts(datetime(2026, 10, 1, 9), {"frequency": "daily", "interval": 3},
+                         datetime(2026, 10, 5), datetime(2026, 10, 14))
+    assert occurrences == [datetime(2026, 10, 7, 9), datetime(2026, 10, 10, 9), datetime(2026, 10, 13, 9)]
+
+def test_weekly_days_skip_weekdays_before_the_start():
+    # Wednesday start, Mon/Wed/Fri series
+    occurrences = starts(datetime(2026, 10, 7, 16), {"frequency": "weekly", "days_of_week": [0, 2, 4]},
+                         datetime(2026, 10, 1), datetime(2026, 10, 13))
+    assert [occurrence.day for occurrence in occurrences] == [7, 9, 12]
+
+def test_weekly_without_days_repeats_the_start_weekday():
+    occurrences = starts(datetime(2026, 10, 7, 16), {"frequency": "weekly", "interval": 2},
+                         datetime(2026, 10, 1), datetime(2026, 11, 5))
+    assert [occurrence.day for occurrence in occurrences] == [7, 21, 4]
+
+def test_monthly_clamps_to_short_months():
+    occurrences = starts(datetime(2027, 1, 31, 8), {"frequency": "monthly"},
+                         datetime(2027, 1, 1), datetime(2027, 5, 1))
+    assert [occurrence.date() for occurrence in occurrences] == [
+        date(2027, 1, 31), date(2027, 2, 28), date(2027, 3, 31), date(2027, 4, 30)
+    ]
+
+def test_date_end_includes_the_whole_day_and_datetime_end_is_exact():
+    series_start = datetime(2026, 10, 1, 18)
+    window = (datetime(2026, 9, 1), datetime(2026, 12, 1))
+    assert starts(series_start, {"frequency": "daily", "end_date": date(2026, 10, 3)}, *window)[-1] == \
+        datetime(2026, 10, 3, 18)
+    assert starts(series_start, {"frequency": "daily", "end_date": datetime(2026, 10, 3, 12)}, *window)[-1] == \
+        datetime(2026, 10, 2, 18)
+
+def test_expand_activity_keeps_the_duration():
+    activity = {
+        "id": "a1", "start_datetime": datetime(2026, 10, 5, 16), "end_datetime": datetime(2026, 10, 5, 17, 30),
+        "recurrence": {"frequency": "weekly", "days_of_week": [0]}, "updated_at": datetime(2026, 1, 1)
+    }
+    occurrences = server.expand_activity(activity, datetime(2026, 10, 10), datetime(2026, 10, 27))
+    assert occurrences == (
+        (datetime(2026, 10, 12, 16), datetime(2026, 10, 12, 17, 30)),
+        (datetime(2026, 10, 19, 16), datetime(2026, 10, 19, 17, 30)),
+        (datetime(2026, 10, 26, 16), datetime(2026, 10, 26, 17, 30)),
+    )
+
+def test_recurrence_end_date_can_be_set_through_the_api(run_with_db):
+    async def scenario(db):
+        await db.users.insert_one({"id": "u1", "name": "Sam", "email": "sam@school.edu", "year_level": 10,
+                                   "created_at": datetime(2024, 1, 1)})
+        async with api_client() as client:
+            created = await client.post("/api/users/u1/activities", json={
+                "title": "Practice", "activity_type": "sports",
+                "start_datetime": "2026-10-05T16:00:00", "end_datetime": "2026-10-05T17:00:00",
+                "recurrence": {"frequency": "weekly", "end_date": "2026-11-30"}
+            })
+            activity_id = created.json()["id"]
+            updated = await client.put(f"/api/activities/{activity_id}", json={
+                "recurrence": {"frequency": "weekly", "end_date": "2026-12-31"}
+            })
+            task = await client.post("/api/users/u1/tasks", json={
+                "title": "Essay", "subject": "English", "task_type": "assignment",
+                "due_date": "2026-10-20T00:00:00", "due_time": "17:30"
+            })
+        stored = await db.activities.find_one({"id": activity_id})
+        stored_task = await db.tasks.find_one({})
+        return created, updated, task, stored, stored_task
+
+    created, updated, task, stored, stored_task = run_with_db(scenario)
+    assert created.status_code == 200 and updated.status_code == 200 and task.status_code == 200
+    assert stored["recurrence"]["end_date"] - datetime(2026, 12, 31, 23, 59, 59) < timedelta(seconds=1)
+    assert task.json()["due_time"] == "17:30:00"
+    assert stored_task["due_time"] == "17:30:00"
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import server
+
+def at(day, hour, minute=0):
+    return datetime(2026, 10, day, hour, minute)
+
+def task(task_id, due, minutes, rank=2):
+    return {"id": task_id, "title": task_id, "subject": "Maths", "due_date": due,
+            "estimated_duration": minutes, "priority_rank": rank}
+
+def test_merge_intervals_joins_overlapping_and_touching():
+    merged = server.merge_intervals([(at(5, 12), at(5, 13)), (at(5, 9), at(5, 10)), (at(5, 9, 30), at(5, 11)),
+                                     (at(5, 11), at(5, 11, 30))])
+    assert merged == [[at(5, 9), at(5, 11, 30)], [at(5, 12), at(5, 13)]]
+
+def test_off_hours_follow_the_local_study_day():
+    # UTC+10: the local 22:00-08:00 night is 12:00-22:00 UTC
+    blocks = server.off_hours(at(5, 0), at(6, 0), 8, 22, 600)
+    assert (at(5, 12), at(5, 22)) in blocks
+    assert server.off_hours(at(5, 0), at(6, 0), 0, 24, 600) == []
+
+def test_free_slots_skip_slivers_and_stay_in_the_window():
+    busy = [(at(5, 7), at(5, 9)), (at(5, 9, 10), at(5, 12)), (at(5, 17), at(5, 20))]
+    slots = server.free_slots(busy, at(5, 8), at(5, 18), timedelta(minutes=15))
+    assert slots == [[at(5, 12), at(5, 17)]]
+
+def test_plan_is_earliest_deadline_first_with_priority_ties():
+    slots = [[at(5, 8), at(5, 9)], [at(5, 10), at(5, 22)], [at(6, 8), at(6, 22)]]
+    tasks = [
+        task("essay", at(6, 12), 120),
+        task("quiz", at(5, 9, 30), 90, rank=3),
+        task("lab", at(6, 12), 60, rank=3),
+        task("late", at(4, 17), 30, rank=1),
+        task("tight", at(5, 8, 5), 60),
+    ]
+    plan = server.plan_schedule(tasks, slots, at(5, 0), at(7, 0), timedelta(minutes=15))
+
+    assert [(block["task_id"], block["start"], block["end"]) for block in plan["blocks"]] == [
+        ("late", at(5, 8), at(5, 8, 30)),
+        ("quiz", at(5, 8, 30), at(5, 9)),
+        ("lab", at(5, 10), at(5, 11)),
+        ("essay", at(5, 11), at(5, 13)),
+    ]
+    status = {entry["task_id"]: (entry["status"], entry["scheduled_minutes"]) for entry in plan["tasks"]}
+    assert status == {
+        "late": ("scheduled", 30), "tight": ("unscheduled", 0), "quiz": ("partial", 30),
+        "lab": ("scheduled", 60), "essay": ("scheduled", 120)
+    }
+    assert [entry["overdue"] for entry in plan["tasks"]] == [True, False, False, False, False]
+
+def test_plan_splits_a_task_across_slots():
+    slots = [[at(5, 8), at(5, 9)], [at(5, 10), at(5, 11)]]
+    plan = server.plan_schedule([task("project", at(6, 0), 90)], slots, at(5, 0), at(6, 0), timedelta(minutes=15))
+    assert [block["minutes"] for block in plan["blocks"]] == [60, 30]
+    assert plan["tasks"][0]["finishes_at"] == at(5, 10, 30)
+
+def test_build_schedule_works_around_activities(run_with_db):
+    async def scenario(db):
+        await db.activities.insert_one({
+            "id": "a1", "user_id": "u1", "title": "Training", "activity_type": "sports",
+            "start_datetime": at(5, 8), "end_datetime": at(5, 10),
+            "recurrence": {"frequency": "daily"}, "updated_at": at(1, 0)
+        })
+        await db.tasks.insert_one({**task("essay", at(6, 12), 180), "user_id": "u1", "completed": False})
+        return await server.build_schedule("u1", at(5, 0), at(7, 0), day_start=8, day_end=12)
+
+    schedule = run_with_db(scenario)
+    assert [(block["start"], block["end"]) for block in schedule["blocks"]] == [
+        (at(5, 10), at(5, 12)), (at(6, 10), at(6, 11))
+    ]
+    assert schedule["free_minutes"] == 240
+    assert schedule["free_minutes_remaining"] == 60
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import server
+from tests.conftest import api_client
+
+def _now() -> datetime:
+    # MongoDB keeps milliseconds, so boundaries built from this compare exactly
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def _task(task_id: str, due_date: datetime, completed: bool = False):
+    return {"id": task_id, "user_id": "u1", "title": task_id, "subject": "Maths", "task_type": "homework",
+            "priority": "medium", "completed": completed, "due_date": due_date,
+            "created_at": datetime(2026, 1, 1), "updated_at": datetime(2026, 1, 1)}
+
+async def _insert_user(db):
+    await db.users.insert_one({"id": "u1", "name": "Sam", "email": "sam@school.edu", "year_level": 10,
+                               "created_at": datetime(2024, 1, 1)})
+
+async def _assert_matches_recount(db):
+    # The $inc-maintained document must agree with a full recount, and must
+    # not claim to be valid past the next real boundary
+    stored = await db.user_stats.find_one({"user_id": "u1"}, {"_id": 0})
+    recount = await server.compute_user_stats("u1")
+    assert {counter: stored[counter] for counter in server.STATS_COUNTERS} == \
+        {counter: recount[counter] for counter in server.STATS_COUNTERS}
+    assert stored["time_valid_until"] <= recount["time_valid_until"]
+    return stored
+
+def test_stats_deltas_match_a_full_recount(run_with_db):
+    async def scenario(db):
+        await _insert_user(db)
+        now = _now()
+        # A pending task far ahead keeps every boundary facet populated
+        await db.tasks.insert_one(_task("anchor", now + timedelta(days=30)))
+        snapshots = []
+        async with api_client() as client:
+            assert (await client.get("/api/users/u1/stats")).json()["pending_tasks"] == 1
+            snapshots.append(await _assert_matches_recount(db))
+
+            created = {}
+            for name, due_date in [("overdue", now - timedelta(days=1)),
+                                   ("upcoming", now + timedelta(days=2)),
+                                   ("later", now + timedelta(days=10))]:
+                response = await client.post("/api/users/u1/tasks", json={
+                    "title": name, "subject": "Maths", "task_type": "homework", "due_date": due_date.isoformat()
+                })
+                created[name] = response.json()["id"]
+                snapshots.append(await _assert_matches_recount(db))
+
+            steps = [
+                ("put", created["overdue"], {"completed": True}),
+                ("put", created["upcoming"], {"completed": True}),
+                ("put", created["upcoming"], {"completed": False}),
+                # Move a task across the upcoming window and then past its due date
+                ("put", created["later"], {"due_date": (now + timedelta(days=3)).isoformat()}),
+                ("put", created["later"], {"due_date": (now - timedelta(hours=1)).isoformat()}),
+                ("delete", created["upcoming"], None),
+                ("delete", created["overdue"], None),
+            ]
+            for method, task_id, body in steps:
+                if method == "put":
+                    assert (await client.put(f"/api/tasks/{task_id}", json=body)).status_code == 200
+                else:
+                    assert (await client.delete(f"/api/tasks/{task_id}")).status_code == 200
+                snapshots.append(await _assert_matches_recount(db))
+            final = (await client.get("/api/users/u1/stats")).json()
+        return now, snapshots, final
+
+    now, snapshots, final = run_with_db(scenario)
+    # Creating "later" pulls the expiry in to when it enters the upcoming window
+    assert snapshots[3]["time_valid_until"] <= now + timedelta(days=3)
+    assert [snapshot["upcoming_tasks"] for snapshot in snapshots] == [0, 0, 1, 1, 1, 0, 1, 2, 1, 0, 0]
+    assert final == {"total_tasks": 2, "completed_tasks": 0, "pending_tasks": 2, "overdue_tasks": 1,
+                     "upcoming_tasks": 0, "total_activities": 0}
+
+def test_stats_are_recounted_once_a_boundary_passes(run_with_db):
+    async def scenario(db):
+        await _insert_user(db)
+        now = _now()
+        soon = now + timedelta(milliseconds=600)
+        await db.tasks.insert_many([
+            _task("due-soon", soon),
+            _task("entering-window", soon + server.UPCOMING_WINDOW),
+            _task("anchor", now + timedelta(days=30)),
+        ])
+        before = await server.load_user_stats("u1")
+        stored = await db.user_stats.find_one({"user_id": "u1"})
+        await asyncio.sleep((soon - datetime.utcnow()).total_seconds() + 0.1)
+        after = await server.load_user_stats("u1")
+        refreshed = await _assert_matches_recount(db)
+        return soon, before, stored, after, refreshed
+
+    soon, before, stored, after, refreshed = run_with_db(scenario)
+    assert stored["time_valid_until"] == soon
+    assert (before["overdue_tasks"], before["upcoming_tasks"]) == (0, 1)
+    assert (after["overdue_tasks"], after["upcoming_tasks"]) == (1, 1)
+    assert refreshed["time_valid_until"] > soon
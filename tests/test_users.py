@@ -0,0 +1,17 @@
+from tests.conftest import api_client
+
+def test_duplicate_emails_are_a_400_on_create_and_update(run_with_db):
+    async def scenario(db):
+        async with api_client() as client:
+            sam = await client.post("/api/users", json={"name": "Sam", "email": "sam@school.edu", "year_level": 10})
+            twin = await client.post("/api/users", json={"name": "Sam", "email": "sam@school.edu", "year_level": 11})
+            alex = await client.post("/api/users", json={"name": "Alex", "email": "alex@school.edu", "year_level": 10})
+            taken = await client.put(f"/api/users/{alex.json()['id']}", json={"email": "sam@school.edu"})
+            renamed = await client.put(f"/api/users/{alex.json()['id']}", json={"email": "alex.lee@school.edu"})
+        return sam, twin, taken, renamed
+
+    sam, twin, taken, renamed = run_with_db(scenario)
+    assert sam.status_code == 200
+    assert twin.status_code == 400
+    assert taken.status_code == 400
+    assert renamed.status_code == 200 and renamed.json()["email"] == "alex.lee@school.edu"